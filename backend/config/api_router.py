@@ -39,7 +39,7 @@ from fanmo.users.api.views import (
     UserViewSet,
     VerifyEmailView,
 )
-from fanmo.webhooks.views import razorpay_webhook
+from fanmo.webhooks.views import razorpay_webhook, webhook_metrics
 
 
 def api_meta(request):
@@ -110,6 +110,7 @@ api_patterns = [
     path("auth/", include(auth_patterns)),
     path("integrations/", include(integration_patterns)),
     path("webhooks/razorpay/", razorpay_webhook),
+    path("webhooks/metrics/", webhook_metrics),
     path("stats/", AnalyticsAPIView.as_view(), name="analytics"),
     path("events/", ApplicationEventAPIView.as_view(), name="events"),
 ]
@@ -207,6 +207,11 @@ STATICFILES_FINDERS = [
 MEDIA_ROOT = str(APPS_DIR / "media")
 # https://docs.djangoproject.com/en/dev/ref/settings/#media-url
 MEDIA_URL = "/media/"
+# exports with more rows are prepared in background and emailed, 0 always streams them
+EXPORT_BACKGROUND_THRESHOLD = env.int("DJANGO_EXPORT_BACKGROUND_THRESHOLD", default=50000)
+# emailed exports contain emails of fans, they are deleted from the media storage
+# by the daily `delete_expired_exports` task once they are older than this.
+EXPORT_RETENTION_DAYS = env.int("DJANGO_EXPORT_RETENTION_DAYS", default=7)
 
 # TEMPLATES
 # ------------------------------------------------------------------------------
@@ -288,6 +293,13 @@ EMAIL_SUBJECT_PREFIX = env(
     "DJANGO_EMAIL_SUBJECT_PREFIX",
     default="",
 )
+# Bulk emails (e.g. new post notifications)
+EMAIL_BULK_BATCH_SIZE = env.int("DJANGO_EMAIL_BULK_BATCH_SIZE", default=100)
+# maximum emails sent per second by each bulk send, shared by its worker threads.
+# concurrent bulk sends, e.g. in other tasks or processes, are limited separately.
+EMAIL_BULK_RATE_LIMIT = env.float("DJANGO_EMAIL_BULK_RATE_LIMIT", default=20)
+EMAIL_BULK_WORKERS = env.int("DJANGO_EMAIL_BULK_WORKERS", default=1)
+EMAIL_BULK_RETRIES = env.int("DJANGO_EMAIL_BULK_RETRIES", default=2)
 
 # ADMIN
 # ------------------------------------------------------------------------------
@@ -349,6 +361,9 @@ Q_CLUSTER = {
     "retry": 120,
     "django_redis": "default",
 }
+# "schedule" creates a django-q schedule per task,
+# "queue" pushes tasks straight to the broker after the transaction commits.
+TASK_DISPATCH_MODE = env("DJANGO_TASK_DISPATCH_MODE", default="schedule")
 
 # django-allauth
 # ------------------------------------------------------------------------------
@@ -461,6 +476,16 @@ DEFAULT_CURRENCY = INR
 RAZORPAY_KEY = env("RAZORPAY_KEY")
 RAZORPAY_SECRET = env("RAZORPAY_SECRET")
 RAZORPAY_WEBHOOK_SECRET = env("RAZORPAY_WEBHOOK_SECRET")
+# point to `manage.py razorpay_simulator` to run payments without hitting razorpay.
+RAZORPAY_BASE_URL = env("RAZORPAY_BASE_URL", default="https://api.razorpay.com/v1")
+# keep-alive connections, timeouts (in seconds) and retries of razorpay api calls.
+# only idempotent calls are retried, with a random backoff of up to
+# RAZORPAY_RETRY_BACKOFF * 2^retry seconds.
+RAZORPAY_POOL_SIZE = env.int("RAZORPAY_POOL_SIZE", default=10)
+RAZORPAY_CONNECT_TIMEOUT = env.float("RAZORPAY_CONNECT_TIMEOUT", default=3.05)
+RAZORPAY_READ_TIMEOUT = env.float("RAZORPAY_READ_TIMEOUT", default=5)
+RAZORPAY_MAX_RETRIES = env.int("RAZORPAY_MAX_RETRIES", default=2)
+RAZORPAY_RETRY_BACKOFF = env.float("RAZORPAY_RETRY_BACKOFF", default=0.25)
 
 # business logic defaults
 DEFAULT_PLATFORM_FEE_PERCENT = 4.90
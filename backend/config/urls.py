@@ -1,14 +1,18 @@
 from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
-from django.contrib.sitemaps.views import sitemap
 from django.contrib.staticfiles.urls import staticfiles_urlpatterns
 from django.urls import path, include
 from django.views.generic import RedirectView
-from fanmo.core.sitemaps import sitemaps
 
 
-from fanmo.core.views import index_view, page_view, post_view, post_image_proxy_view
+from fanmo.core.views import (
+    index_view,
+    page_view,
+    post_view,
+    post_image_proxy_view,
+    sitemap_view,
+)
 
 urlpatterns = [
     # Django Admin, use {% url 'admin:index' %}
@@ -18,12 +22,8 @@ urlpatterns = [
         name="admin:login",
     ),
     path(settings.ADMIN_URL, admin.site.urls),
-    path(
-        "sitemap.xml",
-        sitemap,
-        {"sitemaps": sitemaps},
-        name="django.contrib.sitemaps.views.sitemap",
-    ),
+    path("sitemap.xml", sitemap_view, name="sitemap"),
+    path("sitemap-<section>-<int:page>.xml", sitemap_view, name="sitemap_section"),
     # API
     path("api/", include("config.api_router")),
     path("imageproxy/<image_uuid>/<image_size>.jpg", post_image_proxy_view, name="post_image_proxy"),
@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 from django.contrib import admin
 
-from .models import ApplicationEvent, StatisticByDateAndObject
+from .models import ApplicationEvent, StatisticByDateAndObject, StatisticCheckpoint
 
 
 @admin.register(ApplicationEvent)
@@ -36,3 +36,18 @@ class StatisticByDateAndObjectAdmin(admin.ModelAdmin):
     )
     list_filter = ("created_at", "updated_at")
     date_hierarchy = "created_at"
+
+
+@admin.register(StatisticCheckpoint)
+class StatisticCheckpointAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "period",
+        "object",
+        "metric",
+        "tracked_at",
+        "created_at",
+        "updated_at",
+    )
+    list_filter = ("created_at", "updated_at")
+    date_hierarchy = "created_at"
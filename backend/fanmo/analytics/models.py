@@ -1,10 +1,13 @@
 import time
 
-from django.db import models
+from django.db import connections, models
+from django.utils import timezone
 from trackstats.models import (
+    PERIOD_CHOICES,
     AbstractStatistic,
     ByDateMixin,
     ByObjectMixin,
+    Metric,
     StatisticByDateAndObjectQuerySet,
 )
 
@@ -12,6 +15,54 @@ from fanmo.utils.helpers import datestamp
 from fanmo.utils.models import BaseModel
 
 
+class StatisticQuerySet(StatisticByDateAndObjectQuerySet):
+    def upsert(self, statistics):
+        """
+        Insert or update values of the given statistics in a single query.
+        """
+        if not statistics:
+            return
+
+        now = timezone.now()
+        columns = [
+            "date",
+            "metric_id",
+            "object_type_id",
+            "object_id",
+            "period",
+            "value",
+            "created_at",
+            "updated_at",
+        ]
+        params = []
+        for statistic in statistics:
+            params.extend(
+                [
+                    statistic.date,
+                    statistic.metric_id,
+                    statistic.object_type_id,
+                    statistic.object_id,
+                    statistic.period,
+                    statistic.value,
+                    now,
+                    now,
+                ]
+            )
+
+        row_sql = "(%s)" % ", ".join(["%s"] * len(columns))
+        sql = (
+            "INSERT INTO {table} ({columns}) VALUES {rows} "
+            "ON CONFLICT (date, metric_id, object_type_id, object_id, period) "
+            "DO UPDATE SET value = EXCLUDED.value, updated_at = EXCLUDED.updated_at"
+        ).format(
+            table=self.model._meta.db_table,
+            columns=", ".join(columns),
+            rows=", ".join([row_sql] * len(statistics)),
+        )
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(sql, params)
+
+
 class StatisticByDateAndObject(
     ByDateMixin, ByObjectMixin, AbstractStatistic, BaseModel
 ):
@@ -20,7 +71,7 @@ class StatisticByDateAndObject(
     """
 
     value = models.DecimalField(null=True, max_digits=15, decimal_places=2)
-    objects = StatisticByDateAndObjectQuerySet.as_manager()
+    objects = StatisticQuerySet.as_manager()
 
     class Meta:
         unique_together = ["date", "metric", "object_type", "object_id", "period"]
@@ -34,6 +85,24 @@ class StatisticByDateAndObject(
         return datestamp(self.date)
 
 
+class StatisticCheckpoint(ByObjectMixin, BaseModel):
+    """
+    High-water mark of the last incremental stat refresh of an object.
+    """
+
+    metric = models.ForeignKey(Metric, on_delete=models.CASCADE)
+    period = models.IntegerField(choices=PERIOD_CHOICES)
+    tracked_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ["metric", "object_type", "object_id", "period"]
+
+    def __str__(self):
+        return "{metric}: {tracked_at}".format(
+            metric=self.metric_id, tracked_at=self.tracked_at
+        )
+
+
 class ApplicationEvent(BaseModel):
     class EventName(models.TextChoices):
         PAYMENT_FAILED = "payment_failed"
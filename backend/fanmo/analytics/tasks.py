@@ -1,62 +1,100 @@
+import structlog
+from django.core.cache import cache
+from django.db.models import Q
 from trackstats.models import Metric, Period
 
-from fanmo.core.tasks import async_task
+from fanmo.core.tasks import async_task, debounced_async_task
 from fanmo.memberships.models import Subscription
 from fanmo.payments.models import Payment, Payout
+from fanmo.users.models import User
 
-from .trackers import MembershipCountTracker, PaymentAmountTracker, PayoutAmountTracker
+from .trackers import MembershipCountTracker, PaymentAmountsTracker, PayoutAmountTracker
+
+logger = structlog.get_logger(__name__)
+
+# seconds to wait for more changes before refreshing stats of a creator
+STATS_REFRESH_WINDOW = 30
+STATS_REFRESH_METRICS_KEY = "stats_refresh_metrics:%s"
+
+
+def schedule_refresh_stats(creator_user_id):
+    """
+    Refresh stats of a creator in the background, at most once per window.
+    Refreshes requested while one is already pending are coalesced into it.
+    """
+    scheduled = debounced_async_task(
+        run_scheduled_refresh_stats,
+        creator_user_id,
+        key=creator_user_id,
+        window=STATS_REFRESH_WINDOW,
+    )
+    if not scheduled:
+        increment_stats_refresh_metric("coalesced")
+        logger.info("stats_refresh_coalesced", creator_user_id=creator_user_id)
+
+
+def run_scheduled_refresh_stats(creator_user_id):
+    refresh_stats(creator_user_id)
+    increment_stats_refresh_metric("executed")
+    logger.info("stats_refresh_executed", creator_user_id=creator_user_id)
+
+
+def increment_stats_refresh_metric(name):
+    key = STATS_REFRESH_METRICS_KEY % name
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def get_stats_refresh_metrics():
+    """
+    Number of scheduled stats refreshes which were executed or coalesced.
+    """
+    names = ["executed", "coalesced"]
+    values = cache.get_many([STATS_REFRESH_METRICS_KEY % name for name in names])
+    return {name: values.get(STATS_REFRESH_METRICS_KEY % name, 0) for name in names}
 
 
 def refresh_stats(creator_user_id):
-    refresh_total_payment_amount(creator_user_id)
-    refresh_total_donation_amount(creator_user_id)
-    refresh_total_membership_amount(creator_user_id)
+    """
+    Incrementally refresh stats of a creator, only days with
+    new or changed payments, payouts or subscriptions are recomputed.
+    """
+    refresh_payment_amounts(creator_user_id)
     refresh_total_payout_amount(creator_user_id)
     refresh_new_membership_count(creator_user_id)
 
 
 def refresh_all_stats():
-    from fanmo.users.models import User
-
     for user in User.objects.filter(is_creator=True):
         async_task(refresh_stats, user.id)
 
 
-def refresh_total_payment_amount(creator_user_id):
-    PaymentAmountTracker(
+def refresh_payment_amounts(creator_user_id):
+    """
+    Refresh total payment, donation and membership amount in a single pass.
+    """
+    PaymentAmountsTracker(
         period=Period.DAY,
-        metric=Metric.objects.TOTAL_PAYMENT_AMOUNT,
-    ).track(
+        metric_filters=[
+            (Metric.objects.TOTAL_PAYMENT_AMOUNT, Q()),
+            (
+                Metric.objects.TOTAL_DONATION_AMOUNT,
+                Q(type=Payment.Type.DONATION),
+            ),
+            (
+                Metric.objects.TOTAL_MEMBERSHIP_AMOUNT,
+                Q(type=Payment.Type.SUBSCRIPTION),
+            ),
+        ],
+    ).track_changes(
         Payment.objects.filter(
             creator_user_id=creator_user_id,
             status=Payment.Status.CAPTURED,
-        )
-    )
-
-
-def refresh_total_donation_amount(creator_user_id):
-    PaymentAmountTracker(
-        period=Period.DAY,
-        metric=Metric.objects.TOTAL_DONATION_AMOUNT,
-    ).track(
-        Payment.objects.filter(
-            creator_user_id=creator_user_id,
-            status=Payment.Status.CAPTURED,
-            type=Payment.Type.DONATION,
-        )
-    )
-
-
-def refresh_total_membership_amount(creator_user_id):
-    PaymentAmountTracker(
-        period=Period.DAY,
-        metric=Metric.objects.TOTAL_MEMBERSHIP_AMOUNT,
-    ).track(
-        Payment.objects.filter(
-            creator_user_id=creator_user_id,
-            status=Payment.Status.CAPTURED,
-            type=Payment.Type.SUBSCRIPTION,
-        )
+        ),
+        Payment.objects.filter(creator_user_id=creator_user_id),
+        User(pk=creator_user_id),
     )
 
 
@@ -64,10 +102,10 @@ def refresh_total_payout_amount(creator_user_id):
     PayoutAmountTracker(
         period=Period.DAY,
         metric=Metric.objects.TOTAL_PAYOUT_AMOUNT,
-    ).track(
-        Payout.objects.filter(
-            payment__creator_user_id=creator_user_id,
-        )
+    ).track_changes(
+        Payout.objects.filter(payment__creator_user_id=creator_user_id),
+        Payout.objects.filter(payment__creator_user_id=creator_user_id),
+        User(pk=creator_user_id),
     )
 
 
@@ -75,8 +113,8 @@ def refresh_new_membership_count(creator_user_id):
     MembershipCountTracker(
         period=Period.DAY,
         metric=Metric.objects.NEW_MEMBER_COUNT,
-    ).track(
-        Subscription.objects.filter(
-            creator_user_id=creator_user_id,
-        )
+    ).track_changes(
+        Subscription.objects.filter(creator_user_id=creator_user_id),
+        Subscription.objects.filter(creator_user_id=creator_user_id),
+        User(pk=creator_user_id),
     )
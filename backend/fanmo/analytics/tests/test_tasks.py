@@ -3,13 +3,22 @@ from decimal import Decimal
 
 import pytest
 from dateutil.relativedelta import relativedelta
+from django.core.cache import cache
 from django.utils import timezone
+from django_q.models import Schedule
 from djmoney.money import Money
 from moneyed import INR
 from trackstats.models import Metric, Period
 
 from fanmo.analytics.models import StatisticByDateAndObject
-from fanmo.analytics.tasks import refresh_stats
+from fanmo.analytics.tasks import (
+    STATS_REFRESH_METRICS_KEY,
+    get_stats_refresh_metrics,
+    refresh_payment_amounts,
+    refresh_stats,
+    run_scheduled_refresh_stats,
+    schedule_refresh_stats,
+)
 from fanmo.memberships.models import Membership, Plan
 from fanmo.memberships.tasks import refresh_creator_memberships, refresh_membership
 from fanmo.memberships.tests.factories import (
@@ -106,6 +115,82 @@ class TestRefreshStats:
         assert stats[1].date.isoformat() == "2021-01-01"
         assert stats[1].value == Decimal("1000")
 
+    def test_refresh_stats_recomputes_changed_days(
+        self, creator_user, user, time_machine
+    ):
+        def create_payment(amount):
+            return Payment.objects.create(
+                amount=Money(Decimal(amount), INR),
+                status=Payment.Status.CAPTURED,
+                type=Payment.Type.DONATION,
+                external_id="x123",
+                creator_user=creator_user,
+                fan_user=user,
+            )
+
+        def get_stats():
+            return StatisticByDateAndObject.objects.narrow(
+                metric=Metric.objects.TOTAL_DONATION_AMOUNT,
+                object=creator_user,
+                period=Period.DAY,
+            ).order_by("-date")
+
+        time_machine.move_to(datetime(2021, 1, 1))
+        create_payment("100")
+        refunded_payment = create_payment("50")
+
+        time_machine.move_to(datetime(2021, 1, 2))
+        create_payment("200")
+        time_machine.move_to(datetime(2021, 1, 2, 12))
+        refresh_stats(creator_user.id)
+        assert [stat.value for stat in get_stats()] == [Decimal("200"), Decimal("150")]
+
+        # only the day of the refunded payment is recomputed
+        time_machine.move_to(datetime(2021, 1, 3))
+        StatisticByDateAndObject.objects.filter(date="2021-01-02").update(
+            value=Decimal("1")
+        )
+        refunded_payment.status = Payment.Status.REFUNDED
+        refunded_payment.save()
+        refresh_stats(creator_user.id)
+        assert [stat.value for stat in get_stats()] == [Decimal("1"), Decimal("100")]
+
+        # stats of days without any payments left are removed
+        time_machine.move_to(datetime(2021, 1, 4))
+        Payment.objects.filter(amount=Decimal("100")).update(
+            status=Payment.Status.REFUNDED, updated_at=timezone.now()
+        )
+        refresh_stats(creator_user.id)
+        assert [stat.date.isoformat() for stat in get_stats()] == ["2021-01-02"]
+
+    def test_refresh_payment_amounts_in_single_pass(
+        self, creator_user, user, django_assert_max_num_queries
+    ):
+        for type in [Payment.Type.DONATION, Payment.Type.SUBSCRIPTION]:
+            Payment.objects.create(
+                amount=Money(Decimal("100"), INR),
+                status=Payment.Status.CAPTURED,
+                type=type,
+                external_id="x123",
+                creator_user=creator_user,
+                fan_user=user,
+            )
+
+        # the query count does not depend on the number of metrics or days
+        with django_assert_max_num_queries(8):
+            refresh_payment_amounts(creator_user.id)
+
+        assert {
+            stat.metric: stat.value
+            for stat in StatisticByDateAndObject.objects.narrow(
+                object=creator_user, period=Period.DAY
+            )
+        } == {
+            Metric.objects.TOTAL_PAYMENT_AMOUNT: Decimal("200"),
+            Metric.objects.TOTAL_DONATION_AMOUNT: Decimal("100"),
+            Metric.objects.TOTAL_MEMBERSHIP_AMOUNT: Decimal("100"),
+        }
+
     def test_refresh_payout_stats(self, creator_user, user, time_machine):
         now = timezone.now()
 
@@ -278,3 +363,27 @@ class TestRefreshStats:
             .count()
             == 2
         )
+
+
+class TestScheduleRefreshStats:
+    def test_refreshes_are_coalesced(self, creator_user, settings):
+        settings.Q_CLUSTER = {**settings.Q_CLUSTER, "sync": False}
+        cache.delete_pattern(STATS_REFRESH_METRICS_KEY % "*")
+        schedules = Schedule.objects.filter(
+            func="fanmo.analytics.tasks.run_scheduled_refresh_stats"
+        )
+
+        for _ in range(3):
+            schedule_refresh_stats(creator_user.id)
+
+        assert schedules.count() == 1
+        assert schedules.get().next_run > timezone.now()
+        assert get_stats_refresh_metrics() == {"executed": 0, "coalesced": 2}
+
+        # refreshes requested after the pending one is picked up are scheduled again
+        schedules.delete()
+        run_scheduled_refresh_stats(creator_user.id)
+        schedule_refresh_stats(creator_user.id)
+
+        assert schedules.count() == 1
+        assert get_stats_refresh_metrics() == {"executed": 1, "coalesced": 2}
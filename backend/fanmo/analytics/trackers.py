@@ -1,14 +1,19 @@
 from datetime import date, datetime, time, timedelta
 
+from django.contrib.contenttypes.models import ContentType
 from django.db import models
 from django.db.models.functions.datetime import TruncDate
 from django.utils import timezone
 from trackstats.models import Period
 from trackstats.trackers import ObjectsByDateAndObjectTracker
 
-from fanmo.analytics.models import StatisticByDateAndObject
+from fanmo.analytics.models import StatisticByDateAndObject, StatisticCheckpoint
 from fanmo.users.models import User
 
+# changes committed by transactions which started before the last checkpoint
+# can carry an older updated_at, look back a little to not miss them.
+CHECKPOINT_OVERLAP = timedelta(minutes=5)
+
 
 class ObjectTracker(ObjectsByDateAndObjectTracker):
     """
@@ -45,6 +50,108 @@ class ObjectTracker(ObjectsByDateAndObjectTracker):
         else:
             raise NotImplementedError
 
+    def get_metrics(self):
+        return [self.metric]
+
+    def get_metric_values(self, value):
+        return {self.metric: value["ts_n"]}
+
+    def track_changes(self, qs, changed_qs, object):
+        """
+        Incrementally track day-wise stats of an object.
+
+        Only the days of rows in `changed_qs` which were created or updated since
+        the last checkpoint are recomputed from `qs`. `changed_qs` should not
+        filter on mutable fields (e.g. status) so that a row moving out of `qs`
+        also marks its day for recomputation.
+        """
+        if self.period != Period.DAY:
+            raise NotImplementedError
+
+        tracked_at = timezone.now()
+        metrics = self.get_metrics()
+        object_type = ContentType.objects.get_for_model(object)
+        checkpoints = StatisticCheckpoint.objects.filter(
+            metric__in=metrics,
+            period=self.period,
+            object_type=object_type,
+            object_id=object.pk,
+        )
+
+        checkpoints_by_metric = {
+            checkpoint.metric_id: checkpoint for checkpoint in checkpoints
+        }
+        if len(checkpoints_by_metric) == len(metrics):
+            since = min(checkpoint.tracked_at for checkpoint in checkpoints)
+            changed_qs = changed_qs.filter(updated_at__gte=since - CHECKPOINT_OVERLAP)
+
+        dirty_dates = set(
+            changed_qs.annotate(ts_date=TruncDate(self.date_field))
+            .values_list("ts_date", flat=True)
+            .order_by()
+            .distinct()
+        )
+        if dirty_dates:
+            self.track_dates(qs, dirty_dates, object_type, object.pk)
+
+        checkpoints.filter(metric_id__in=checkpoints_by_metric.keys()).update(
+            tracked_at=tracked_at
+        )
+        StatisticCheckpoint.objects.bulk_create(
+            [
+                StatisticCheckpoint(
+                    metric=metric,
+                    period=self.period,
+                    object_type=object_type,
+                    object_id=object.pk,
+                    tracked_at=tracked_at,
+                )
+                for metric in metrics
+                if metric.pk not in checkpoints_by_metric
+            ]
+        )
+
+    def track_dates(self, qs, dates, object_type, object_id):
+        """
+        Recompute day-wise stats of the given dates, stats of dates
+        without any rows left are removed.
+        """
+        start_dt = timezone.make_aware(
+            datetime.combine(min(dates), time()) - timedelta(days=1)
+        )
+        statistics = []
+        for value in self.filter_day_queryset(qs, start_dt).filter(ts_date__in=dates):
+            for metric, metric_value in self.get_metric_values(value).items():
+                if metric_value is None:
+                    continue
+                statistics.append(
+                    self.statistic_model(
+                        metric=metric,
+                        value=metric_value,
+                        date=value["ts_date"],
+                        period=self.period,
+                        object_type=object_type,
+                        object_id=object_id,
+                    )
+                )
+        self.statistic_model.objects.upsert(statistics)
+
+        stale_stats = models.Q()
+        for metric in self.get_metrics():
+            tracked_dates = [
+                statistic.date
+                for statistic in statistics
+                if statistic.metric_id == metric.pk
+            ]
+            stale_stats |= models.Q(metric=metric) & ~models.Q(date__in=tracked_dates)
+        self.statistic_model.objects.filter(
+            stale_stats,
+            period=self.period,
+            object_type=object_type,
+            object_id=object_id,
+            date__in=dates,
+        ).delete()
+
     def track_lifetime(self, qs, start_date, to_date):
         """
         Track lifetime stats for a given queryset
@@ -105,6 +212,39 @@ class PaymentAmountTracker(ObjectTracker):
     date_field = "created_at"
 
 
+class PaymentAmountsTracker(PaymentAmountTracker):
+    """
+    Tracks multiple payment amount metrics with a single grouped query,
+    each metric sums the amount of payments matching its filter.
+
+    Only supports incremental tracking using `track_changes`.
+    """
+
+    metric_filters = None
+
+    def get_metrics(self):
+        return [metric for metric, _ in self.metric_filters]
+
+    def get_metric_values(self, value):
+        return {
+            metric: value["ts_n_%s" % metric.pk] for metric, _ in self.metric_filters
+        }
+
+    def filter_day_queryset(self, qs, start_dt):
+        return (
+            qs.filter(**{self.date_field + "__gte": start_dt})
+            .annotate(ts_date=TruncDate(self.date_field))
+            .values("ts_date", *self.get_track_values())
+            .annotate(
+                **{
+                    "ts_n_%s" % metric.pk: models.Sum("amount", filter=metric_filter)
+                    for metric, metric_filter in self.metric_filters
+                }
+            )
+            .order_by()
+        )
+
+
 class PayoutAmountTracker(ObjectTracker):
     aggr_op = models.Sum("amount")
     object_model = User
@@ -2,6 +2,7 @@ from decimal import Decimal
 
 import pytest
 from dateutil.relativedelta import relativedelta
+from django.core.cache import cache
 from django.utils import timezone
 from djmoney.money import Money
 from moneyed import INR
@@ -19,6 +20,9 @@ from fanmo.memberships.tests.factories import (
 )
 from fanmo.payments.models import BankAccount
 from fanmo.payments.tests.factories import BankAccountFactory
+from fanmo.posts.comments import COMMENT_TREE_CACHE_KEY
+from fanmo.posts.links import LINK_METADATA_CACHE_KEY
+from fanmo.users.entitlements import ENTITLEMENTS_CACHE_KEY
 from fanmo.users.models import User
 from fanmo.users.tests.factories import UserFactory
 
@@ -29,7 +33,25 @@ def media_storage(settings, tmpdir):
 
 
 @pytest.fixture(autouse=True)
-def initialize_helpers():
+def clear_entitlements():
+    cache.delete_pattern(ENTITLEMENTS_CACHE_KEY % "*")
+
+
+@pytest.fixture(autouse=True)
+def clear_link_metadata():
+    cache.delete_pattern(LINK_METADATA_CACHE_KEY % "*")
+
+
+@pytest.fixture(autouse=True)
+def clear_comment_trees():
+    cache.delete_pattern(COMMENT_TREE_CACHE_KEY % ("*", "*", "*"))
+
+
+@pytest.fixture(autouse=True)
+def initialize_helpers(request):
+    # helpers are stored in the database, tests without database access skip them.
+    if not request.node.get_closest_marker("django_db"):
+        return
     register_metrics()
     register_scheduled_tasks()
 
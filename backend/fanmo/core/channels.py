@@ -1,10 +1,26 @@
 from django.conf import settings
-from django.template.loader import render_to_string
+from django.template import Context
+from django.template.loader import get_template
 from django.utils import timezone
+from django.utils.functional import cached_property
 from notifications.channels import BaseNotificationChannel
 
 from fanmo.users.models import CreatorActivity
 
+_notification_templates = {}
+
+
+def get_notification_template(template_name):
+    """
+    Compiled notification template, pinned for the lifetime of the process
+    so that bulk notifications do not look it up again for every recipient.
+    """
+    if settings.DEBUG:
+        return get_template(template_name)
+    if template_name not in _notification_templates:
+        _notification_templates[template_name] = get_template(template_name)
+    return _notification_templates[template_name]
+
 
 class EmailNotificationChannel(BaseNotificationChannel):
     name = "email"
@@ -12,21 +28,28 @@ class EmailNotificationChannel(BaseNotificationChannel):
 
     def build_payload(self, provider):
         if self.context.get("bulk"):
-            return [
-                self._build_payload(recipient)
+            recipients = [
+                recipient
                 for recipient in self.context["recipients"]
                 if self.can_send(recipient)
             ]
+            if self.context.get("recipient_independent"):
+                # templates do not use the recipient, render them only once.
+                payload = self._render_payload()
+                return [
+                    {**payload, "to": [recipient.email]} for recipient in recipients
+                ]
+            return [self._build_payload(recipient) for recipient in recipients]
         return self._build_payload(self.notification.recipient)
 
     def _build_payload(self, recipient):
+        return {"to": [recipient.email], **self._render_payload(recipient=recipient)}
+
+    def _render_payload(self, **context):
         payload = {
-            "to": [recipient.email],
-            "subject": self.render_template("subject", recipient=recipient),
-            "body": self.render_template("message", recipient=recipient),
-            "body_html": self.render_template(
-                "message", format="html", recipient=recipient
-            ),
+            "subject": self.render_template("subject", **context),
+            "body": self.render_template("message", **context),
+            "body_html": self.render_template("message", format="html", **context),
         }
         if self.context.get("source_as_sender_name"):
             email_label = self.notification.source.display_name
@@ -34,17 +57,25 @@ class EmailNotificationChannel(BaseNotificationChannel):
             payload["from_email"] = f'"{email_label} (via Fanmo)" {email_address}'
         return payload
 
+    @cached_property
+    def template_context(self):
+        # same for every recipient of the notification, built only once.
+        return {
+            **self.context,
+            "notification": self.notification,
+            "obj": self.notification.obj,
+            "settings": {"BASE_URL": settings.BASE_URL},
+        }
+
     def render_template(self, suffix, format="txt", **context):
-        return render_to_string(
-            f"maizzle/{self.notification.action}_{suffix}.{format}",
-            {
-                **self.context,
-                "notification": self.notification,
-                "obj": self.notification.obj,
-                "settings": {"BASE_URL": settings.BASE_URL},
-                **context,
-            },
-        ).strip()
+        template = get_notification_template(
+            f"maizzle/{self.notification.action}_{suffix}.{format}"
+        )
+        template_context = Context(
+            self.template_context, autoescape=template.backend.engine.autoescape
+        )
+        template_context.update(context)
+        return template.template.render(template_context).strip()
 
     def notify(self, countdown=0):
         # skip sending notification if we user has disabled in preferences.
@@ -0,0 +1,78 @@
+import os
+import re
+
+from django.utils.html import escape
+
+INDEX_FILE = "/var/www/html/200.html"
+
+# meta tags replaced in the index shell, by the slot which fills them.
+INDEX_SLOTS = {
+    "title": [
+        "<title>%s</title>",
+        'name="twitter:title" content="%s" data-hid="twitter:title"',
+        'property="og:title" content="%s" data-hid="og:title"',
+    ],
+    "description": [
+        'name="description" content="%s" data-hid="description"',
+        'name="twitter:description" content="%s" data-hid="twitter:description"',
+        'property="og:description" content="%s" data-hid="og:description"',
+    ],
+    "image": [
+        'name="twitter:image" content="%s" data-hid="twitter:image"',
+        'property="og:image" content="%s" data-hid="og:image"',
+    ],
+    "keywords": [
+        'name="keywords" content="%s" data-hid="keywords"',
+    ],
+}
+
+_index_shells = {}
+
+
+class IndexShell:
+    """
+    200.html generated by nuxt, split into static segments and the slots between them.
+    """
+
+    def __init__(self, html):
+        spans = []
+        for slot, templates in INDEX_SLOTS.items():
+            for template in templates:
+                # same pattern as `replace_format`, the first match is replaced.
+                match = re.search(re.escape(template).replace("%s", "(.*)"), html)
+                if match:
+                    spans.append((match.start(1), match.end(1), slot))
+
+        # (segment before the slot, slot name, default value of the slot)
+        self.parts = []
+        position = 0
+        for start, end, slot in sorted(spans):
+            if start < position:
+                continue
+            self.parts.append((html[position:start], slot, html[start:end]))
+            position = end
+        self.tail = html[position:]
+
+    def render(self, **values):
+        values = {slot: escape(value) for slot, value in values.items() if value}
+        chunks = []
+        for segment, slot, default in self.parts:
+            chunks.append(segment)
+            chunks.append(values.get(slot, default))
+        chunks.append(self.tail)
+        return "".join(chunks)
+
+
+def get_index_shell(path=INDEX_FILE):
+    """
+    Index shell of the file at `path`, loaded again only when the file is modified.
+    """
+    mtime = os.stat(path).st_mtime_ns
+    cached = _index_shells.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    with open(path) as index_file:
+        shell = IndexShell(index_file.read())
+    _index_shells[path] = (mtime, shell)
+    return shell
@@ -0,0 +1,82 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.template.loader import render_to_string
+from notifications.utils import get_notification_model
+
+from fanmo.core.channels import EmailNotificationChannel
+from fanmo.core.models import NotificationType
+from fanmo.posts.models import Post
+from fanmo.users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark rendering of new post notification emails (subject, text and html) "
+        "for a number of recipients."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--recipients", type=int, default=10000)
+        parser.add_argument("--post-id", type=int)
+
+    def handle(self, recipients, post_id, **options):
+        posts = Post.objects.select_related("author_user", "content")
+        post = posts.filter(id=post_id).first() if post_id else posts.first()
+        if not post:
+            raise CommandError("A post is required to render notifications.")
+        post.annotate_permissions(post.author_user)
+
+        notification = get_notification_model()(
+            source=post.author_user, obj=post, action=NotificationType.NEW_POST
+        )
+        context = {"source_as_sender_name": True}
+        recipients = [
+            User(id=i, email=f"fan{i}@example.com") for i in range(recipients)
+        ]
+
+        def render_uncached(recipient):
+            for suffix, format in [
+                ("subject", "txt"),
+                ("message", "txt"),
+                ("message", "html"),
+            ]:
+                render_to_string(
+                    f"maizzle/{notification.action}_{suffix}.{format}",
+                    {
+                        **context,
+                        "notification": notification,
+                        "obj": notification.obj,
+                        "settings": {"BASE_URL": settings.BASE_URL},
+                        "recipient": recipient,
+                    },
+                ).strip()
+
+        channel = EmailNotificationChannel(notification, context=context)
+        # warm up the template loaders
+        render_uncached(recipients[0])
+        channel._build_payload(recipients[0])
+
+        self.benchmark("render_to_string per recipient", recipients, render_uncached)
+        self.benchmark(
+            "pinned templates per recipient", recipients, channel._build_payload
+        )
+
+        start = time.perf_counter()
+        payload = channel._render_payload()
+        [{**payload, "to": [recipient.email]} for recipient in recipients]
+        self.report("rendered once per batch", len(recipients), start)
+
+    def benchmark(self, name, recipients, render):
+        start = time.perf_counter()
+        for recipient in recipients:
+            render(recipient)
+        self.report(name, len(recipients), start)
+
+    def report(self, name, count, start):
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f"{name}: {count} recipients in {elapsed:.2f}s "
+            f"({count / elapsed:.0f} recipients/s)"
+        )
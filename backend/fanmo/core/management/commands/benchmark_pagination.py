@@ -0,0 +1,67 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from fanmo.donations.models import Donation
+from fanmo.memberships.models import Membership
+from fanmo.payments.models import PaymentLedger
+from fanmo.posts.models import Post
+from fanmo.users.models import CreatorActivity
+from fanmo.utils.pagination import KeysetPagination, PageNumberPagination
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark page number and keyset pagination of feeds, memberships, "
+        "donations and activities on the first and a deep page."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--page", type=int, default=500)
+        parser.add_argument("--page-size", type=int, default=10)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, page, page_size, repeat, **options):
+        if page < 2:
+            raise CommandError("Page must be greater than 1.")
+
+        querysets = {
+            "posts": Post.objects.filter(is_published=True),
+            "memberships": Membership.objects.annotate(
+                lifetime_amount=PaymentLedger.lifetime_amount("membership_amount")
+            ),
+            "donations": Donation.objects.filter(status=Donation.Status.SUCCESSFUL),
+            "activities": CreatorActivity.objects.all(),
+        }
+        for name, queryset in querysets.items():
+            queryset = queryset.order_by("-created_at")
+            # the last row of the previous page is the cursor of the deep page
+            offset = (page - 1) * page_size
+            previous_rows = list(
+                queryset.order_by("-created_at", "-id")[offset - 1 : offset + 1]
+            )
+            if len(previous_rows) < 2:
+                self.stdout.write(f"{name}: not enough rows for page {page}, skipped")
+                continue
+
+            deep_cursor = KeysetPagination.encode_cursor(previous_rows[0])
+            for label, pagination_class, params in [
+                ("page number, page 1", PageNumberPagination, {}),
+                (f"page number, page {page}", PageNumberPagination, {"page": page}),
+                ("keyset, page 1", KeysetPagination, {"cursor": ""}),
+                (f"keyset, page {page}", KeysetPagination, {"cursor": deep_cursor}),
+            ]:
+                request = Request(
+                    APIRequestFactory().get("/", {**params, "page_size": page_size})
+                )
+                timings = []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    pagination_class().paginate_queryset(queryset, request)
+                    timings.append(time.perf_counter() - start)
+                self.stdout.write(
+                    f"{name}, {label}: {min(timings) * 1000:.1f}ms "
+                    f"(best of {repeat})"
+                )
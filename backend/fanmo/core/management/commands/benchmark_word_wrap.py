@@ -0,0 +1,102 @@
+import time
+from textwrap import wrap
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.text import Truncator
+from wand.color import Color
+from wand.drawing import Drawing
+from wand.image import Image
+
+from fanmo.posts.models import Post
+from fanmo.utils import text_layout
+
+
+def legacy_word_wrap(image, ctx, text, roi_width, roi_height):
+    """
+    Wrapping loop from Wand documentation, kept as the reference layout.
+    """
+    mutable_message = text
+    iteration_attempts = 100
+
+    def eval_metrics(txt):
+        metrics = ctx.get_font_metrics(image, txt, True)
+        return (metrics.text_width, metrics.text_height)
+
+    while ctx.font_size > 0 and iteration_attempts:
+        iteration_attempts -= 1
+        width, height = eval_metrics(mutable_message)
+        if height > roi_height:
+            ctx.font_size -= 0.75
+            mutable_message = text
+        elif width > roi_width:
+            columns = len(mutable_message)
+            while columns > 0:
+                columns -= 1
+                mutable_message = "\n".join(wrap(mutable_message, columns))
+                wrapped_width, _ = eval_metrics(mutable_message)
+                if wrapped_width <= roi_width:
+                    break
+            if columns < 1:
+                ctx.font_size -= 0.75
+                mutable_message = text
+        else:
+            break
+    if iteration_attempts < 1:
+        raise RuntimeError("Unable to calculate word_wrap for " + text)
+    return mutable_message
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark word wrapping of post titles on social images "
+        "and compare the layout with the reference implementation."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=1000)
+
+    def handle(self, limit, **options):
+        titles = [
+            Truncator(title).chars(140)
+            for title in Post.objects.values_list("title", flat=True)[:limit]
+        ]
+        if not titles:
+            raise CommandError("Posts are required to benchmark word wrapping.")
+
+        with Image(width=1200, height=630, background=Color("#000")) as canvas:
+            reference, elapsed = self.benchmark(canvas, titles, legacy_word_wrap)
+            self.report("reference word_wrap", len(titles), elapsed)
+
+            text_layout._metrics_cache.clear()
+            layouts, elapsed = self.benchmark(canvas, titles, text_layout.word_wrap)
+            self.report("memoized word_wrap", len(titles), elapsed)
+
+        mismatches = [
+            title
+            for title, expected, actual in zip(titles, reference, layouts)
+            if expected != actual
+        ]
+        for title in mismatches:
+            self.stdout.write(f"layout mismatch: {title}")
+        self.stdout.write(f"{len(mismatches)} of {len(titles)} layouts differ")
+
+    def benchmark(self, canvas, titles, word_wrap):
+        layouts = []
+        elapsed = 0
+        for title in titles:
+            with Drawing() as draw:
+                draw.font = str(settings.RESOURCES_DIR / "WorkSans-Bold.ttf")
+                draw.font_size = 48
+                draw.text_antialias = True
+                draw.stroke_width = 1
+                start = time.perf_counter()
+                message = word_wrap(canvas, draw, title, 1000, 250)
+                elapsed += time.perf_counter() - start
+                layouts.append((message, draw.font_size))
+        return layouts, elapsed
+
+    def report(self, name, count, elapsed):
+        self.stdout.write(
+            f"{name}: {count} titles in {elapsed:.2f}s ({count / elapsed:.0f} titles/s)"
+        )
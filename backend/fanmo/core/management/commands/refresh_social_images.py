@@ -0,0 +1,65 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+
+from fanmo.posts.models import Post
+from fanmo.posts.tasks import refresh_post_social_images
+from fanmo.users.models import User
+from fanmo.users.tasks import refresh_user_social_images
+from fanmo.utils.images import iter_id_ranges
+
+
+def get_social_image_pool(workers=None):
+    """
+    Process pool for rendering social images, sized to the CPU cores by default.
+
+    Workers are spawned instead of forked so that they do not share
+    database connections of the parent process. Only usable outside of
+    django-q workers, which are daemonic processes and cannot have children.
+    """
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=django.setup,
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Regenerate social images of posts and creator pages whose inputs changed, "
+        "rendering them in a process pool."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--only", choices=["posts", "users"], help="Refresh only one kind of image."
+        )
+        parser.add_argument("--chunk-size", type=int, default=100)
+        parser.add_argument(
+            "--workers", type=int, help="Rendering processes, defaults to CPU cores."
+        )
+
+    def handle(self, only, chunk_size, workers, **options):
+        refreshers = {
+            "posts": (
+                Post.objects.filter(is_published=True),
+                refresh_post_social_images,
+            ),
+            "users": (User.objects.filter(is_creator=True), refresh_user_social_images),
+        }
+        with get_social_image_pool(workers) as pool:
+            for name, (queryset, refresh) in refreshers.items():
+                if only and only != name:
+                    continue
+                start = time.perf_counter()
+                refreshed = 0
+                for first_id, last_id in iter_id_ranges(queryset, chunk_size):
+                    refreshed += refresh(first_id, last_id, pool)
+                elapsed = time.perf_counter() - start
+                self.stdout.write(
+                    f"{name}: {refreshed} images in {elapsed:.2f}s "
+                    f"({refreshed / elapsed:.1f} images/s)"
+                )
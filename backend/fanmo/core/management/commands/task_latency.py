@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from fanmo.core.tasks import get_task_latency_percentiles
+
+
+class Command(BaseCommand):
+    help = "Print enqueue-to-start latency percentiles of recently started background tasks."
+
+    def handle(self, *args, **options):
+        percentiles = get_task_latency_percentiles()
+        if not percentiles:
+            self.stdout.write("No task latency samples recorded yet.")
+            return
+        for name, value in percentiles.items():
+            self.stdout.write(f"{name}: {value:.1f}ms")
@@ -4,6 +4,9 @@ from django.db.models import Q
 from notifications.utils import notify
 
 from fanmo.core.models import NotificationType
+from fanmo.core.tasks import async_task
+
+NEW_POST_NOTIFICATION_CHUNK_SIZE = 500
 
 
 def notify_new_membership(membership_id):
@@ -202,43 +205,96 @@ def notify_donation(donation_id):
         )
 
 
-def notify_new_post(post_id):
+def notify_new_post(post_id, chunk_size=NEW_POST_NOTIFICATION_CHUNK_SIZE):
+    """
+    Fan out new post notifications, recipients are split into id ranges
+    which are notified by separate tasks.
+    """
     from fanmo.posts.models import Post
-    from fanmo.users.models import User
+
+    post = Post.objects.only("author_user_id").get(id=post_id)
+    recipient_ids = (
+        get_new_post_recipients(post.author_user_id)
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+
+    last_id = 0
+    while True:
+        chunk = list(recipient_ids.filter(id__gt=last_id)[:chunk_size])
+        if not chunk:
+            break
+        async_task(notify_new_post_recipients, post_id, chunk[0], chunk[-1])
+        last_id = chunk[-1]
+
+
+def notify_new_post_recipients(post_id, from_user_id, to_user_id):
+    """
+    Notify recipients of a new post within the given id range.
+
+    Recipients are grouped by whether they can access the post, since the email
+    only depends on the post, it is rendered once per group.
+    """
+    from fanmo.posts.models import Post
+    from fanmo.users.entitlements import Entitlements
 
     post = (
         Post.objects.prefetch_related("allowed_tiers", "author_user__tiers")
         .select_related("author_user")
         .get(id=post_id)
     )
-
-    creator_user = post.author_user
-    recipients = (
-        User.objects.filter(is_active=True)
-        .filter(
-            # users who are following the creator
-            Q(followings=creator_user)
-            # users who are member of the creator
-            | Q(memberships__creator_user=creator_user, memberships__is_active=True)
-        )
-        .prefetch_related("memberships", "donations")
-        .distinct()
+    recipients = list(
+        get_new_post_recipients(post.author_user_id)
+        .filter(id__gte=from_user_id, id__lte=to_user_id)
+        .select_related("user_preferences")
     )
+    entitlements = Entitlements.for_users([recipient.pk for recipient in recipients])
+
+    recipients_by_access = {}
     for recipient in recipients:
+        recipient.entitlements = entitlements[recipient.pk]
         post.annotate_permissions(recipient)
+        recipients_by_access.setdefault(post.can_access, []).append(recipient)
+
+    for access_recipients in recipients_by_access.values():
+        post.annotate_permissions(access_recipients[0])
         notify(
-            source=creator_user,
-            recipient=recipient,
+            source=post.author_user,
             obj=post,
             action=NotificationType.NEW_POST,
             silent=True,
             channels=("email",),
             extra_data={
-                "context": {"source_as_sender_name": True},
+                "context": {
+                    "source_as_sender_name": True,
+                    "bulk": True,
+                    "recipient_independent": True,
+                    "recipients": access_recipients,
+                },
             },
         )
 
 
+def get_new_post_recipients(creator_user_id):
+    from fanmo.memberships.models import Membership
+    from fanmo.users.models import Following, User
+
+    return User.objects.filter(is_active=True).filter(
+        # users who are following the creator
+        Q(
+            id__in=Following.objects.filter(from_user_id=creator_user_id).values(
+                "to_user_id"
+            )
+        )
+        # users who are member of the creator
+        | Q(
+            id__in=Membership.objects.filter(
+                creator_user_id=creator_user_id, is_active=True
+            ).values("fan_user_id")
+        )
+    )
+
+
 def notify_comment(comment_id):
     from fanmo.posts.models import Comment
 
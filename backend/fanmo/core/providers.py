@@ -1,9 +1,44 @@
-from time import sleep
-from django.core.mail import EmailMultiAlternatives
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import structlog
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
 from notifications.providers import BaseNotificationProvider
 
 from fanmo.users.models import CreatorActivity
 
+logger = structlog.get_logger(__name__)
+
+
+class TokenBucket:
+    """
+    Thread-safe rate limiter allowing `rate` acquisitions per second
+    with bursts of up to `capacity` acquisitions.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated_at) * self.rate
+                )
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
 
 class EmailNotificationProvider(BaseNotificationProvider):
     name = "rich_email"
@@ -23,15 +58,63 @@ class EmailNotificationProvider(BaseNotificationProvider):
         email_message.send()
 
     def send_bulk(self, payloads):
-        send_count = 0
-        for payload in payloads:
-            email_message = self._get_email_message(payload)
-            email_message.send()
-
-            send_count += 1
-            # sleep for 1 second after every 20 emails
-            if send_count % 20 == 0:
-                sleep(1)
+        """
+        Send emails in batches, each batch reuses a single backend connection.
+
+        Batches are sent by `EMAIL_BULK_WORKERS` threads sharing one rate limiter,
+        emails which fail to send are retried with a fresh connection.
+        """
+        messages = [self._get_email_message(payload) for payload in payloads]
+        batch_size = settings.EMAIL_BULK_BATCH_SIZE
+        batches = [
+            messages[i : i + batch_size] for i in range(0, len(messages), batch_size)
+        ]
+        rate_limiter = TokenBucket(settings.EMAIL_BULK_RATE_LIMIT)
+
+        if settings.EMAIL_BULK_WORKERS > 1 and len(batches) > 1:
+            with ThreadPoolExecutor(settings.EMAIL_BULK_WORKERS) as executor:
+                failed = executor.map(
+                    lambda batch: self._send_batch(batch, rate_limiter), batches
+                )
+                failed = [message for messages in failed for message in messages]
+        else:
+            failed = [
+                message
+                for batch in batches
+                for message in self._send_batch(batch, rate_limiter)
+            ]
+
+        for message in failed:
+            logger.error("bulk_email_failed", to=message.to, subject=message.subject)
+        return len(messages) - len(failed)
+
+    def _send_batch(self, messages, rate_limiter):
+        """
+        Send messages over one connection, returns messages which could not be sent.
+        """
+        for _ in range(settings.EMAIL_BULK_RETRIES + 1):
+            failed = []
+            connection = get_connection()
+            try:
+                connection.open()
+                for message in messages:
+                    rate_limiter.acquire()
+                    try:
+                        connection.send_messages([message])
+                    except Exception:
+                        logger.warning("bulk_email_retry", to=message.to)
+                        failed.append(message)
+            except Exception:
+                # the connection could not be opened, retry the whole batch.
+                logger.warning("bulk_email_connection_failed", exc_info=True)
+                failed = messages
+            finally:
+                connection.close()
+
+            if not failed:
+                return []
+            messages = failed
+        return failed
 
 
 class CreatorActivityProvider(BaseNotificationProvider):
@@ -1,8 +1,14 @@
+import structlog
 from django.dispatch import receiver
+from django_q.signals import pre_execute
 from ipware import get_client_ip
 from simple_history.models import HistoricalRecords
 from simple_history.signals import pre_create_historical_record
 
+from fanmo.core.tasks import record_task_latency
+
+logger = structlog.get_logger(__name__)
+
 
 @receiver(pre_create_historical_record)
 def add_history_ip_address(sender, **kwargs):
@@ -13,3 +19,13 @@ def add_history_ip_address(sender, **kwargs):
         history_instance.ip_address = get_client_ip(HistoricalRecords.context.request)[
             0
         ]
+
+
+@receiver(pre_execute)
+def track_task_latency(sender, task, **kwargs):
+    # sent outside of the error handling of django-q workers, an error would
+    # crash the worker and drop the task.
+    try:
+        record_task_latency(task)
+    except Exception:
+        logger.exception("task_latency_failed", task_id=task.get("id"))
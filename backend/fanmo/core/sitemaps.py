@@ -1,9 +1,29 @@
+import hashlib
+
+from django.conf import settings
 from django.contrib.sitemaps import Sitemap
+from django.contrib.sites.models import Site
+from django.core.cache import cache
+from django.template.loader import render_to_string
 from django.urls import reverse
+from django.utils import timezone
 
+from fanmo.core.tasks import async_task
 from fanmo.posts.models import Post
 from fanmo.users.models import User
 
+SITEMAP_CACHE_KEY = "sitemap:%s"
+SITEMAP_INDEX = "sitemap.xml"
+# urls per child sitemap, well below the 50000 allowed by the protocol
+SITEMAP_PAGE_SIZE = 10000
+SITEMAP_BUILD_SCHEDULED_KEY = "sitemap_build_scheduled"
+# sitemaps missing from the cache are built at most once within the window.
+SITEMAP_BUILD_WINDOW = 5 * 60
+
+
+class SitemapsNotBuilt(Exception):
+    pass
+
 
 class StaticViewSitemap(Sitemap):
     priority = 0.5
@@ -28,23 +48,43 @@ class StaticViewSitemap(Sitemap):
 class CreatorSitemap(Sitemap):
     changefreq = "daily"
     priority = 1.0
+    limit = SITEMAP_PAGE_SIZE
 
     def items(self):
-        return User.objects.filter(is_active=True, is_creator=True)
+        return (
+            User.objects.filter(is_active=True, is_creator=True)
+            .order_by("id")
+            .values_list("username", "updated_at")
+        )
+
+    def location(self, item):
+        username, _ = item
+        return reverse("creator_page", args=[username])
 
-    def lastmod(self, obj):
-        return obj.updated_at
+    def lastmod(self, item):
+        _, updated_at = item
+        return updated_at
 
 
 class PostSitemap(Sitemap):
     changefreq = "daily"
     priority = 0.7
+    limit = SITEMAP_PAGE_SIZE
 
     def items(self):
-        return Post.objects.filter(is_published=True)
+        return (
+            Post.objects.filter(is_published=True)
+            .order_by("id")
+            .values_list("slug", "id", "updated_at")
+        )
+
+    def location(self, item):
+        slug, post_id, _ = item
+        return reverse("post_detail", args=[slug, post_id])
 
-    def lastmod(self, obj):
-        return obj.updated_at
+    def lastmod(self, item):
+        _, _, updated_at = item
+        return updated_at
 
 
 sitemaps = {
@@ -52,3 +92,79 @@ sitemaps = {
     "users": CreatorSitemap,
     "posts": PostSitemap,
 }
+
+
+def get_sitemap_name(section, page):
+    return f"sitemap-{section}-{page}.xml"
+
+
+def build_sitemaps():
+    """
+    Render the sitemap index and every page of each section into the cache.
+
+    A file keeps its Last-Modified time as long as its content does not change,
+    so that crawlers can revalidate it with a conditional request.
+    Pages which are not part of the new build are deleted.
+    """
+    site = Site(domain=settings.DOMAIN_NAME, name=settings.DOMAIN_NAME)
+    contents = {}
+    for section, sitemap_class in sitemaps.items():
+        sitemap = sitemap_class()
+        for page in sitemap.paginator.page_range:
+            urls = sitemap.get_urls(page=page, site=site, protocol="https")
+            contents[get_sitemap_name(section, page)] = render_to_string(
+                "sitemap.xml", {"urlset": urls}
+            )
+    contents[SITEMAP_INDEX] = render_to_string(
+        "sitemap_index.xml",
+        {"sitemaps": [f"{settings.BASE_URL}/{name}" for name in contents.keys()]},
+    )
+
+    previous_index = cache.get(SITEMAP_CACHE_KEY % SITEMAP_INDEX) or {}
+    previous = cache.get_many([SITEMAP_CACHE_KEY % name for name in contents])
+    now = timezone.now().timestamp()
+    files = {}
+    for name, content in contents.items():
+        content = content.encode()
+        etag = hashlib.md5(content).hexdigest()
+        previous_file = previous.get(SITEMAP_CACHE_KEY % name)
+        if previous_file and previous_file["etag"] == etag:
+            last_modified = previous_file["last_modified"]
+        else:
+            last_modified = now
+        files[name] = {
+            "content": content,
+            "etag": etag,
+            "last_modified": last_modified,
+        }
+
+    # pages of the build are listed in the index, to delete them once they are gone.
+    files[SITEMAP_INDEX]["pages"] = [name for name in files if name != SITEMAP_INDEX]
+
+    cache.set_many(
+        {SITEMAP_CACHE_KEY % name: value for name, value in files.items()},
+        timeout=None,
+    )
+    cache.delete_many(
+        [
+            SITEMAP_CACHE_KEY % name
+            for name in previous_index.get("pages", [])
+            if name not in files
+        ]
+    )
+    return files
+
+
+def get_sitemap(name):
+    """
+    Pre-rendered sitemap file, None if there is no such file.
+
+    Raises SitemapsNotBuilt when sitemaps are missing from the cache, e.g. after
+    it was flushed, they are built in the background instead of by each request.
+    """
+    sitemap_file = cache.get(SITEMAP_CACHE_KEY % name)
+    if sitemap_file is None and cache.get(SITEMAP_CACHE_KEY % SITEMAP_INDEX) is None:
+        if cache.add(SITEMAP_BUILD_SCHEDULED_KEY, True, SITEMAP_BUILD_WINDOW):
+            async_task(build_sitemaps)
+        raise SitemapsNotBuilt
+    return sitemap_file
@@ -1,9 +1,19 @@
+import time
+import uuid
+
 from dateutil.relativedelta import relativedelta
 from django.conf import settings
+from django.db import IntegrityError, transaction
 from django.utils import timezone
 from django_q.models import Schedule
+from django_q.signing import SignedPackage
 from django_q.tasks import async_task as q_async_task
 from django_q.tasks import schedule
+from django_redis import get_redis_connection
+
+DELAYED_TASKS_KEY = "delayed_tasks"
+TASK_LATENCY_KEY = "task_latency_samples"
+TASK_LATENCY_SAMPLE_SIZE = 1000
 
 
 def register_scheduled_tasks():
@@ -22,15 +32,142 @@ def register_scheduled_tasks():
                 "schedule_type": Schedule.DAILY,
             },
         },
+        {
+            "name": "process_webhook_messages",
+            "defaults": {
+                "func": "fanmo.webhooks.tasks.process_webhook_messages",
+                "schedule_type": Schedule.MINUTES,
+                "minutes": 1,
+            },
+        },
+        {
+            "name": "build_sitemaps",
+            "defaults": {
+                "func": "fanmo.core.sitemaps.build_sitemaps",
+                "schedule_type": Schedule.HOURLY,
+            },
+        },
+        {
+            "name": "delete_expired_exports",
+            "defaults": {
+                "func": "fanmo.utils.resources.delete_expired_exports",
+                "schedule_type": Schedule.DAILY,
+            },
+        },
+        {
+            "name": "retry_payout_transfers",
+            "defaults": {
+                "func": "fanmo.payments.tasks.retry_payout_transfers",
+                "schedule_type": Schedule.MINUTES,
+                "minutes": 15,
+            },
+        },
     ]
+    if settings.TASK_DISPATCH_MODE == "queue":
+        tasks.append(
+            {
+                "name": "dispatch_delayed_tasks",
+                "defaults": {
+                    "func": "fanmo.core.tasks.dispatch_delayed_tasks",
+                    "schedule_type": Schedule.MINUTES,
+                    "minutes": 1,
+                },
+            }
+        )
     for task in tasks:
         Schedule.objects.update_or_create(**task)
 
 
-def async_task(func, *args, **kwargs):
+def async_task(func, *args, delay=None, **kwargs):
+    """
+    Run a task in the background once the current transaction is committed.
+
+    In "schedule" dispatch mode, a django-q schedule is created to run after a few seconds.
+    In "queue" dispatch mode, the task is pushed to the broker on commit,
+    tasks with a delay (in seconds) wait in a sorted set until they are due.
+    """
     if settings.Q_CLUSTER.get("sync"):
         # task scheduling does not work while running tests
         q_async_task(func, *args, **kwargs)
+    elif settings.TASK_DISPATCH_MODE == "queue":
+        func_path = f"{func.__module__}.{func.__name__}"
+        transaction.on_commit(lambda: dispatch_task(func_path, args, kwargs, delay))
     else:
-        kwargs["next_run"] = timezone.now() + relativedelta(seconds=3)
+        kwargs["next_run"] = timezone.now() + relativedelta(seconds=delay or 3)
+        schedule(f"{func.__module__}.{func.__name__}", *args, **kwargs)
+
+
+def dispatch_task(func_path, args, kwargs, delay=None):
+    if not delay:
+        q_async_task(func_path, *args, **kwargs)
+        return
+
+    # the id keeps identical tasks from replacing each other in the set
+    pack = SignedPackage.dumps(
+        {"id": uuid.uuid4().hex, "func": func_path, "args": args, "kwargs": kwargs}
+    )
+    get_redis_connection("default").zadd(DELAYED_TASKS_KEY, {pack: time.time() + delay})
+
+
+def dispatch_delayed_tasks():
+    """
+    Push delayed tasks which are due to the broker.
+    """
+    redis = get_redis_connection("default")
+    for pack in redis.zrangebyscore(DELAYED_TASKS_KEY, 0, time.time()):
+        # only the process which removes the task from the set dispatches it
+        if redis.zrem(DELAYED_TASKS_KEY, pack):
+            task = SignedPackage.loads(pack)
+            q_async_task(task["func"], *task["args"], **task["kwargs"])
+
+
+def record_task_latency(task):
+    """
+    Record time taken by a task to start after being pushed to the broker.
+    """
+    latency = (timezone.now() - task["started"]).total_seconds() * 1000
+    redis = get_redis_connection("default")
+    pipeline = redis.pipeline()
+    pipeline.lpush(TASK_LATENCY_KEY, latency)
+    pipeline.ltrim(TASK_LATENCY_KEY, 0, TASK_LATENCY_SAMPLE_SIZE - 1)
+    pipeline.execute()
+
+
+def get_task_latency_percentiles(percentiles=(50, 95, 99)):
+    """
+    Enqueue-to-start latency percentiles (in milliseconds) of recently started tasks.
+    """
+    samples = sorted(
+        float(sample)
+        for sample in get_redis_connection("default").lrange(TASK_LATENCY_KEY, 0, -1)
+    )
+    if not samples:
+        return {}
+    return {
+        f"p{percentile}": samples[
+            min(len(samples) - 1, int(len(samples) * percentile / 100))
+        ]
+        for percentile in percentiles
+    }
+
+
+def debounced_async_task(func, *args, key, window, **kwargs):
+    """
+    Schedule a task to run after `window` seconds, unless a task with the same key
+    is already waiting to run, in which case the call is coalesced into it.
+
+    Returns whether a new task was scheduled.
+    """
+    if settings.Q_CLUSTER.get("sync"):
+        q_async_task(func, *args, **kwargs)
+        return True
+
+    kwargs["name"] = f"{func.__name__}:{key}"
+    kwargs["next_run"] = timezone.now() + relativedelta(seconds=window)
+    try:
+        # pending schedules are removed by the cluster once they are picked up,
+        # so calls made while a task is running schedule a new one.
         schedule(f"{func.__module__}.{func.__name__}", *args, **kwargs)
+    except IntegrityError:
+        return False
+    return True
@@ -0,0 +1,114 @@
+import csv
+import io
+import os
+from datetime import timedelta
+
+import pytest
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from djmoney.money import Money
+from import_export.formats.base_formats import CSV
+
+from fanmo.donations.exports import DonationExportResource
+from fanmo.memberships.exports import MembershipExportResource
+from fanmo.memberships.models import Membership
+from fanmo.payments.exports import PaymentExportResource
+from fanmo.payments.models import Payment
+from fanmo.users.tests.factories import UserFactory
+from fanmo.utils.resources import delete_expired_exports
+
+pytestmark = pytest.mark.django_db
+
+
+def assert_streamed_export(resource, creator_user, rows):
+    queryset = resource.get_export_queryset(creator_user)
+
+    response = resource.export_csv(queryset)
+    streamed = b"".join(response.streaming_content).decode()
+
+    assert response["Content-Type"] == "text/csv"
+    assert streamed == CSV().export_data(resource.export(queryset))
+    assert len(streamed.splitlines()) == rows + 1
+
+
+def test_streamed_membership_export(membership_with_scheduled_change, creator_user):
+    assert_streamed_export(MembershipExportResource(), creator_user, 1)
+
+
+def test_streamed_donation_export(donation, unpaid_donation, creator_user):
+    assert_streamed_export(DonationExportResource(), creator_user, 1)
+
+
+def test_payment_export_has_only_captured_payments(creator_user, user):
+    payments = [
+        Payment.objects.create(
+            type=Payment.Type.DONATION,
+            status=status,
+            amount=Money(100, "INR"),
+            method=Payment.Method.UPI,
+            external_id=f"pay_{status}",
+            creator_user=creator_user,
+            fan_user=user,
+        )
+        for status in [
+            Payment.Status.CAPTURED,
+            Payment.Status.FAILED,
+            Payment.Status.REFUNDED,
+        ]
+    ]
+
+    response = PaymentExportResource().export_csv_for_creator(creator_user)
+    rows = list(csv.DictReader(io.StringIO(b"".join(response).decode())))
+    assert [row["id"] for row in rows] == [str(payments[0].id)]
+
+
+def test_membership_export_excludes_unpaid_memberships(creator_user, user):
+    paid_membership = Membership.objects.create(
+        creator_user=creator_user, fan_user=user, is_active=False
+    )
+    Membership.objects.create(creator_user=creator_user, fan_user=UserFactory())
+
+    response = MembershipExportResource().export_csv_for_creator(creator_user)
+    rows = list(csv.DictReader(io.StringIO(b"".join(response).decode())))
+    assert [row["id"] for row in rows] == [str(paid_membership.id)]
+
+
+def test_export_is_streamed_below_threshold(settings, donation, mailoutbox):
+    settings.EXPORT_BACKGROUND_THRESHOLD = 1
+    response = DonationExportResource().export_csv_for_creator(donation.creator_user)
+    assert response.status_code == 200
+    assert response.streaming
+    assert not mailoutbox
+
+
+def test_export_is_emailed_above_threshold(settings, donation, mailoutbox):
+    settings.EXPORT_BACKGROUND_THRESHOLD = 0.5
+    response = DonationExportResource().export_csv_for_creator(donation.creator_user)
+    assert response.status_code == 202
+
+    assert len(mailoutbox) == 1
+    assert mailoutbox[0].to == [donation.creator_user.email]
+    assert mailoutbox[0].subject == "Your donations export is ready"
+
+    export_dir = f"exports/{donation.creator_user.id}"
+    (random_dir,), _ = default_storage.listdir(export_dir)
+    _, (file_name,) = default_storage.listdir(f"{export_dir}/{random_dir}")
+    assert random_dir in mailoutbox[0].body
+    assert "The link expires in 7 days" in mailoutbox[0].body
+    with default_storage.open(f"{export_dir}/{random_dir}/{file_name}") as export_file:
+        assert len(export_file.read().splitlines()) == 2
+
+
+def test_expired_exports_are_deleted(settings, creator_user):
+    settings.EXPORT_RETENTION_DAYS = 7
+    resource = DonationExportResource()
+    queryset = resource.get_export_queryset(creator_user)
+    expired_file = resource.export_csv_to_storage(queryset, creator_user.id)
+    recent_file = resource.export_csv_to_storage(queryset, creator_user.id)
+    expired_at = (timezone.now() - timedelta(days=8)).timestamp()
+    os.utime(default_storage.path(expired_file), (expired_at, expired_at))
+
+    delete_expired_exports()
+
+    assert not default_storage.exists(expired_file)
+    assert default_storage.exists(recent_file)
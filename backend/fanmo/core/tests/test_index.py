@@ -0,0 +1,59 @@
+import os
+
+from fanmo.core.index import INDEX_SLOTS, IndexShell, get_index_shell
+from fanmo.utils.helpers import replace_format
+
+INDEX_HTML = (
+    '<!doctype html><html><head><title>Fanmo</title><meta data-n-head="1" charset="utf-8">'
+    '<meta data-n-head="1" name="description" content="Fanmo is a platform" data-hid="description">'
+    '<meta data-n-head="1" name="twitter:title" content="Fanmo" data-hid="twitter:title">'
+    '<meta data-n-head="1" name="twitter:description" content="Fanmo is a platform" data-hid="twitter:description">'
+    '<meta data-n-head="1" name="twitter:image" content="/social.png" data-hid="twitter:image">'
+    '<meta data-n-head="1" property="og:title" content="Fanmo" data-hid="og:title">'
+    '<meta data-n-head="1" property="og:description" content="Fanmo is a platform" data-hid="og:description">'
+    '<meta data-n-head="1" property="og:image" content="/social.png" data-hid="og:image">'
+    '<meta data-n-head="1" name="keywords" content="fanmo" data-hid="keywords">'
+    '</head><body><div id="__nuxt"></div></body></html>'
+)
+
+
+def render_with_replace_format(html, **values):
+    for slot, templates in INDEX_SLOTS.items():
+        if values.get(slot):
+            for template in templates:
+                html = replace_format(html, template, values[slot])
+    return html
+
+
+def test_render_matches_replace_format():
+    shell = IndexShell(INDEX_HTML)
+    values = {
+        "title": 'Tom & Jerry "Cartoons" | Fanmo',
+        "description": "Support <creators>",
+        "image": "https://fanmo.in/media/social.png?a=1&b=2",
+        "keywords": None,
+    }
+
+    assert shell.render() == INDEX_HTML
+    assert shell.render(**values) == render_with_replace_format(INDEX_HTML, **values)
+    assert "<title>Tom &amp; Jerry &quot;Cartoons&quot; | Fanmo</title>" in (
+        shell.render(**values)
+    )
+    # values are not treated as regex replacement templates.
+    assert "<title>\\1</title>" in shell.render(title="\\1")
+
+
+def test_index_shell_is_reloaded_when_modified(tmpdir):
+    index_file = tmpdir.join("200.html")
+    index_file.write(INDEX_HTML)
+
+    shell = get_index_shell(str(index_file))
+    assert get_index_shell(str(index_file)) is shell
+
+    index_file.write(INDEX_HTML.replace("<body>", '<body class="new">'))
+    stat = os.stat(index_file)
+    os.utime(index_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+
+    reloaded = get_index_shell(str(index_file))
+    assert reloaded is not shell
+    assert '<body class="new">' in reloaded.render(title="Fanmo")
@@ -0,0 +1,70 @@
+import pytest
+from django.core import mail
+from notifications.utils import get_notification_model
+
+from fanmo.core import channels
+from fanmo.core.channels import EmailNotificationChannel
+from fanmo.core.models import NotificationType
+from fanmo.core.notifications import notify_new_post
+from fanmo.memberships.tests.factories import MembershipFactory
+from fanmo.posts.models import Content, Post
+from fanmo.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+class TestNotifyNewPost:
+    def test_notify_followers_and_members(self, creator_user, mocker):
+        followers = UserFactory.create_batch(3)
+        for follower in followers:
+            creator_user.follow(follower)
+        member = UserFactory()
+        MembershipFactory(
+            creator_user=creator_user,
+            fan_user=member,
+            tier=creator_user.tiers.get(),
+            is_active=True,
+        )
+        post = Post.objects.create(
+            title="Hello Darkness",
+            content=Content.objects.create(
+                type=Content.Type.TEXT, text="I've come to see you again."
+            ),
+            author_user=creator_user,
+            visibility=Post.Visiblity.ALL_MEMBERS,
+        )
+        render_template_spy = mocker.spy(EmailNotificationChannel, "render_template")
+
+        notify_new_post(post.id, chunk_size=2)
+
+        assert len(mail.outbox) == 4
+        emails = {email.to[0]: email for email in mail.outbox}
+        assert "I've come to see you again." in emails[member.email].body
+        for follower in followers:
+            assert "Become a member" in emails[follower.email].body
+
+        # templates are rendered once per access level in each chunk
+        assert render_template_spy.call_count == 3 * 3
+
+
+class TestEmailNotificationChannel:
+    def test_templates_are_loaded_once(self, creator_user, mocker):
+        post = Post.objects.create(
+            title="Hello Darkness",
+            content=Content.objects.create(type=Content.Type.TEXT, text="Hello"),
+            author_user=creator_user,
+        )
+        # templates pinned by earlier tests would never be loaded here.
+        mocker.patch.dict(channels._notification_templates, clear=True)
+        get_template_spy = mocker.spy(channels, "get_template")
+
+        for _ in range(2):
+            notification = get_notification_model()(
+                source=creator_user, obj=post, action=NotificationType.NEW_POST
+            )
+            channel = EmailNotificationChannel(notification, context={})
+            assert channel.render_template("subject") == "Hello Darkness"
+            assert channel.render_template("subject") == "Hello Darkness"
+
+        # loaded by the first render, reused by the rest.
+        assert get_template_spy.call_count == 1
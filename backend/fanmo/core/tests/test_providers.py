@@ -0,0 +1,98 @@
+import socketserver
+import threading
+
+import pytest
+
+from fanmo.core.providers import EmailNotificationProvider
+
+pytestmark = pytest.mark.django_db
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    """
+    Just enough SMTP to deliver plain messages, recipients listed in
+    `server.flaky_recipients` are refused temporarily on their first attempt.
+    """
+
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        self.server.connections += 1
+        self.reply("220 localhost")
+        recipient = None
+        while line := self.rfile.readline().decode().strip():
+            command = line[:4].upper()
+            if command in ("EHLO", "HELO"):
+                self.reply("250 localhost")
+            elif command == "RCPT":
+                recipient = line.split(":", 1)[1].strip("<> ")
+                if recipient in self.server.flaky_recipients:
+                    self.server.flaky_recipients.remove(recipient)
+                    self.reply("451 try again later")
+                else:
+                    self.reply("250 OK")
+            elif command == "DATA":
+                self.reply("354 go ahead")
+                while self.rfile.readline() not in (b".\r\n", b""):
+                    pass
+                self.server.delivered.append(recipient)
+                self.reply("250 OK")
+            elif command == "QUIT":
+                self.reply("221 bye")
+                return
+            else:
+                self.reply("250 OK")
+
+
+@pytest.fixture
+def smtp_server(settings):
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), SMTPHandler)
+    server.daemon_threads = True
+    server.connections = 0
+    server.delivered = []
+    server.flaky_recipients = set()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    settings.EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+    settings.EMAIL_HOST = "127.0.0.1"
+    settings.EMAIL_PORT = server.server_address[1]
+    settings.EMAIL_USE_TLS = False
+    settings.EMAIL_HOST_USER = ""
+    settings.EMAIL_HOST_PASSWORD = ""
+    settings.EMAIL_BULK_RATE_LIMIT = 1000
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class TestEmailNotificationProvider:
+    def get_payloads(self, count):
+        return [
+            {
+                "to": [f"fan{i}@example.com"],
+                "subject": "New post",
+                "body": "Hello",
+                "body_html": "<p>Hello</p>",
+            }
+            for i in range(count)
+        ]
+
+    def test_send_bulk_reuses_connection(self, smtp_server, settings):
+        settings.EMAIL_BULK_BATCH_SIZE = 10
+
+        assert EmailNotificationProvider().send_bulk(self.get_payloads(25)) == 25
+        assert len(smtp_server.delivered) == 25
+        assert smtp_server.connections == 3
+
+    def test_send_bulk_retries_failed_recipients(self, smtp_server, settings):
+        settings.EMAIL_BULK_BATCH_SIZE = 10
+        settings.EMAIL_BULK_WORKERS = 2
+        smtp_server.flaky_recipients = {"fan3@example.com", "fan15@example.com"}
+
+        assert EmailNotificationProvider().send_bulk(self.get_payloads(20)) == 20
+        assert sorted(smtp_server.delivered) == sorted(
+            f"fan{i}@example.com" for i in range(20)
+        )
+        # one connection per batch and per retried batch
+        assert smtp_server.connections == 4
@@ -0,0 +1,160 @@
+import io
+import threading
+
+import pytest
+import razorpay
+import requests
+from django.conf import settings
+from django_redis import get_redis_connection
+
+from fanmo.payments.simulator import RazorpaySimulator, make_simulator_server
+from fanmo.utils.razorpay_session import (
+    RazorpaySession,
+    get_endpoint,
+    get_razorpay_metrics,
+)
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def clear_razorpay_metrics():
+    redis = get_redis_connection("default")
+    for key in redis.keys("razorpay_metrics:*"):
+        redis.delete(key)
+
+
+@pytest.fixture
+def session():
+    return RazorpaySession(
+        pool_size=2,
+        connect_timeout=1,
+        read_timeout=2,
+        max_retries=2,
+        retry_backoff=0.1,
+    )
+
+
+@pytest.fixture
+def sleep_mock(mocker):
+    return mocker.patch("fanmo.utils.razorpay_session.time.sleep")
+
+
+def mock_responses(mocker, *results):
+    responses = []
+    for result in results:
+        if isinstance(result, int):
+            response = requests.Response()
+            response.status_code = result
+            response.raw = io.BytesIO()
+            result = response
+        responses.append(result)
+    return mocker.patch("requests.Session.request", side_effect=responses)
+
+
+def test_get_endpoint():
+    assert (
+        get_endpoint(
+            "post", "https://api.razorpay.com/v1/payments/pay_29QQoUBi66/capture"
+        )
+        == "POST /v1/payments/{id}/capture"
+    )
+    assert (
+        get_endpoint(
+            "get",
+            "https://api.razorpay.com/v1/transfers?recipient_settlement_id=setl_1",
+        )
+        == "GET /v1/transfers"
+    )
+
+
+def test_idempotent_requests_are_retried(session, sleep_mock, mocker):
+    request_mock = mock_responses(mocker, 503, requests.ReadTimeout(), 200)
+
+    response = session.get("https://api.razorpay.com/v1/payments/pay_123")
+
+    assert response.status_code == 200
+    assert request_mock.call_count == 3
+    assert request_mock.call_args.kwargs["timeout"] == (1, 2)
+    # random backoff, bounded by retry_backoff * 2^retry
+    assert sleep_mock.call_count == 2
+    assert 0 <= sleep_mock.call_args_list[0].args[0] <= 0.2
+    assert 0 <= sleep_mock.call_args_list[1].args[0] <= 0.4
+
+    metrics = get_razorpay_metrics()
+    assert metrics["GET /v1/payments/{id}"]["statuses"] == {"200": 1}
+
+
+def test_retries_are_bounded(session, sleep_mock, mocker):
+    request_mock = mock_responses(mocker, 503, 503, 503, 200)
+
+    response = session.get("https://api.razorpay.com/v1/payments/pay_123")
+
+    assert response.status_code == 503
+    assert request_mock.call_count == 3
+
+
+def test_non_idempotent_requests_are_not_retried(session, sleep_mock, mocker):
+    request_mock = mock_responses(mocker, 503)
+    response = session.post("https://api.razorpay.com/v1/payments/pay_123/capture")
+    assert response.status_code == 503
+    assert request_mock.call_count == 1
+
+    request_mock = mock_responses(mocker, requests.ReadTimeout())
+    with pytest.raises(requests.ReadTimeout):
+        session.post("https://api.razorpay.com/v1/payments/pay_123/capture")
+    assert request_mock.call_count == 1
+
+    metrics = get_razorpay_metrics()
+    assert metrics["POST /v1/payments/{id}/capture"]["statuses"] == {
+        "503": 1,
+        "error": 1,
+    }
+
+
+def test_metrics_failure_does_not_fail_the_call(session, mocker):
+    mock_responses(mocker, 200)
+    mocker.patch(
+        "fanmo.utils.razorpay_session.get_redis_connection",
+        side_effect=ConnectionError("Redis is down."),
+    )
+
+    response = session.post("https://api.razorpay.com/v1/payments/pay_123/capture")
+    assert response.status_code == 200
+
+
+def test_requests_which_failed_to_connect_are_retried(session, sleep_mock, mocker):
+    request_mock = mock_responses(mocker, requests.ConnectTimeout(), 200)
+    response = session.post("https://api.razorpay.com/v1/orders")
+    assert response.status_code == 200
+    assert request_mock.call_count == 2
+
+    mock_responses(mocker, *[requests.ConnectTimeout()] * 3)
+    with pytest.raises(requests.ConnectTimeout):
+        session.post("https://api.razorpay.com/v1/orders")
+
+    metrics = get_razorpay_metrics()
+    assert metrics["POST /v1/orders"]["statuses"] == {"200": 1, "timeout": 1}
+
+
+def test_razorpay_client(session):
+    server = make_simulator_server("127.0.0.1", 0, RazorpaySimulator())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = razorpay.Client(
+        session=session,
+        auth=(settings.RAZORPAY_KEY, settings.RAZORPAY_SECRET),
+        base_url=f"http://127.0.0.1:{server.server_port}/v1",
+    )
+    try:
+        order = client.order.create({"amount": 50_00, "currency": "INR"})
+        with pytest.raises(razorpay.errors.BadRequestError):
+            client.payment.fetch("pay_unknown")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert order["amount"] == 50_00
+    metrics = get_razorpay_metrics()
+    assert metrics["POST /v1/orders"]["statuses"] == {"200": 1}
+    assert metrics["GET /v1/payments/{id}"]["statuses"] == {"400": 1}
+    assert set(metrics["POST /v1/orders"]) == {"statuses", "p50", "p95", "p99"}
@@ -0,0 +1,137 @@
+import pytest
+from django.core.cache import cache
+
+from fanmo.core.sitemaps import (
+    SITEMAP_BUILD_SCHEDULED_KEY,
+    SITEMAP_CACHE_KEY,
+    build_sitemaps,
+)
+from fanmo.posts.models import Content, Post
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def clear_sitemaps():
+    cache.delete_pattern(SITEMAP_CACHE_KEY % "*")
+    cache.delete(SITEMAP_BUILD_SCHEDULED_KEY)
+
+
+@pytest.fixture
+def post(creator_user):
+    return Post.objects.create(
+        title="Hello world",
+        content=Content.objects.create(type=Content.Type.TEXT, text="Hello"),
+        author_user=creator_user,
+        is_published=True,
+    )
+
+
+def test_sitemaps_are_paginated(settings, mocker, creator_user, post):
+    mocker.patch("fanmo.core.sitemaps.PostSitemap.limit", 1)
+    another_post = Post.objects.create(
+        title="Another post",
+        content=Content.objects.create(type=Content.Type.TEXT, text="Hello"),
+        author_user=creator_user,
+        is_published=True,
+    )
+
+    files = build_sitemaps()
+
+    assert set(files) == {
+        "sitemap.xml",
+        "sitemap-static-1.xml",
+        "sitemap-users-1.xml",
+        "sitemap-posts-1.xml",
+        "sitemap-posts-2.xml",
+    }
+    index = files["sitemap.xml"]["content"].decode()
+    assert f"<loc>{settings.BASE_URL}/sitemap-posts-1.xml</loc>" in index
+    assert f"<loc>{settings.BASE_URL}/sitemap-posts-2.xml</loc>" in index
+    posts = files["sitemap-posts-1.xml"]["content"].decode()
+    assert f"{settings.BASE_URL}{post.get_absolute_url()}" in posts
+    posts = files["sitemap-posts-2.xml"]["content"].decode()
+    assert f"{settings.BASE_URL}{another_post.get_absolute_url()}" in posts
+    users = files["sitemap-users-1.xml"]["content"].decode()
+    assert f"{settings.BASE_URL}{creator_user.get_absolute_url()}" in users
+
+
+def test_unchanged_sitemaps_keep_last_modified(time_machine, post):
+    time_machine.move_to("2022-01-01")
+    files = build_sitemaps()
+
+    time_machine.move_to("2022-01-02")
+    post.title = "Updated title"
+    post.slug = "updated-title"
+    post.save()
+    rebuilt = build_sitemaps()
+
+    assert rebuilt["sitemap.xml"] == files["sitemap.xml"]
+    assert (
+        rebuilt["sitemap-posts-1.xml"]["etag"] != files["sitemap-posts-1.xml"]["etag"]
+    )
+    assert (
+        rebuilt["sitemap-posts-1.xml"]["last_modified"]
+        > files["sitemap-posts-1.xml"]["last_modified"]
+    )
+
+
+def test_removed_pages_are_deleted(mocker, creator_user, post):
+    mocker.patch("fanmo.core.sitemaps.PostSitemap.limit", 1)
+    another_post = Post.objects.create(
+        title="Another post",
+        content=Content.objects.create(type=Content.Type.TEXT, text="Hello"),
+        author_user=creator_user,
+        is_published=True,
+    )
+    build_sitemaps()
+    assert cache.get(SITEMAP_CACHE_KEY % "sitemap-posts-2.xml")
+
+    another_post.delete()
+    build_sitemaps()
+
+    assert cache.get(SITEMAP_CACHE_KEY % "sitemap-posts-1.xml")
+    assert cache.get(SITEMAP_CACHE_KEY % "sitemap-posts-2.xml") is None
+
+
+class TestSitemapView:
+    def test_missing_sitemaps_are_built_in_background(self, client, mocker):
+        async_task_mock = mocker.patch("fanmo.core.sitemaps.async_task")
+
+        for _ in range(2):
+            response = client.get("/sitemap-posts-1.xml")
+            assert response.status_code == 503
+            assert response["Retry-After"] == "300"
+        async_task_mock.assert_called_once_with(build_sitemaps)
+
+    def test_sitemap_is_served_from_cache(self, client, post):
+        build_sitemaps()
+        response = client.get("/sitemap.xml")
+        assert response.status_code == 200
+        assert response["Content-Type"] == "application/xml"
+        assert "noindex" in response["X-Robots-Tag"]
+
+        post_url = post.get_absolute_url()
+        post.delete()
+        response = client.get("/sitemap-posts-1.xml")
+        assert response.status_code == 200
+        assert post_url in response.content.decode()
+
+    def test_conditional_requests(self, client, post):
+        build_sitemaps()
+        response = client.get("/sitemap-posts-1.xml")
+
+        response = client.get(
+            "/sitemap-posts-1.xml", HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        assert response.status_code == 304
+
+        response = client.get(
+            "/sitemap-posts-1.xml", HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+        )
+        assert response.status_code == 304
+
+    def test_unknown_page(self, client):
+        build_sitemaps()
+        response = client.get("/sitemap-posts-2.xml")
+        assert response.status_code == 404
@@ -0,0 +1,78 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+from django_q.signals import pre_execute
+from django_redis import get_redis_connection
+
+from fanmo.analytics.tasks import refresh_stats
+from fanmo.core.tasks import (
+    DELAYED_TASKS_KEY,
+    TASK_LATENCY_KEY,
+    async_task,
+    dispatch_delayed_tasks,
+    get_task_latency_percentiles,
+    record_task_latency,
+)
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def queue_dispatch(settings):
+    settings.Q_CLUSTER = {**settings.Q_CLUSTER, "sync": False}
+    settings.TASK_DISPATCH_MODE = "queue"
+    get_redis_connection("default").delete(DELAYED_TASKS_KEY, TASK_LATENCY_KEY)
+
+
+class TestQueueDispatch:
+    def test_task_is_pushed_after_commit(
+        self, queue_dispatch, mocker, django_capture_on_commit_callbacks
+    ):
+        q_async_task_mock = mocker.patch("fanmo.core.tasks.q_async_task")
+
+        with django_capture_on_commit_callbacks(execute=True):
+            async_task(refresh_stats, 1)
+            assert not q_async_task_mock.called
+
+        q_async_task_mock.assert_called_once_with(
+            "fanmo.analytics.tasks.refresh_stats", 1
+        )
+
+    def test_delayed_task_is_pushed_when_due(
+        self, queue_dispatch, mocker, time_machine, django_capture_on_commit_callbacks
+    ):
+        q_async_task_mock = mocker.patch("fanmo.core.tasks.q_async_task")
+
+        with django_capture_on_commit_callbacks(execute=True):
+            async_task(refresh_stats, 1, delay=60)
+            async_task(refresh_stats, 1, delay=60)
+
+        dispatch_delayed_tasks()
+        assert not q_async_task_mock.called
+
+        time_machine.move_to(timezone.now() + timedelta(seconds=61))
+        dispatch_delayed_tasks()
+        assert q_async_task_mock.call_count == 2
+        assert get_redis_connection("default").zcard(DELAYED_TASKS_KEY) == 0
+
+    def test_task_latency_percentiles(self, queue_dispatch, time_machine):
+        now = timezone.now()
+        time_machine.move_to(now, tick=False)
+        for latency in range(1, 101):
+            record_task_latency({"started": now - timedelta(milliseconds=latency)})
+
+        percentiles = get_task_latency_percentiles()
+        assert percentiles["p50"] == pytest.approx(51, abs=1)
+        assert percentiles["p95"] == pytest.approx(96, abs=1)
+        assert percentiles["p99"] == pytest.approx(100, abs=1)
+
+    def test_task_latency_failure_does_not_fail_the_task(self, queue_dispatch, mocker):
+        mocker.patch(
+            "fanmo.core.tasks.get_redis_connection",
+            side_effect=ConnectionError("Redis is down."),
+        )
+
+        pre_execute.send(
+            sender="django_q", func=refresh_stats, task={"started": timezone.now()}
+        )
@@ -0,0 +1,108 @@
+from textwrap import wrap
+from types import SimpleNamespace
+
+import pytest
+
+from fanmo.utils import text_layout
+from fanmo.utils.text_layout import word_wrap
+
+# advance of characters in ems, uneven so that wrapped widths are not monotonic.
+CHARACTER_WIDTHS = {"W": 0.95, "M": 0.85, "m": 0.8, "i": 0.25, "l": 0.25, " ": 0.3}
+
+TITLES = [
+    "Hello",
+    "Behind the scenes of my latest album",
+    "Weekly Q&A: Minimalism, Illustration and Will-o'-the-Wisps",
+    "WWWWWWWWWWWWWWWW iiiiiiiiiiiiiiiiiiiiiiiiiiiiiiiii MMMMMMMMMMMMMMMMMMMM",
+    "Supercalifragilisticexpialidocious-and-other-long-unbreakable-words-in-a-row",
+    "mmmm iiii mmmm iiii mmmm iiii mmmm iiii mmmm iiii mmmm iiii mmmm iiii mmmm",
+    "Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod "
+    "tempor incididunt ut labore et dolore magna aliqua. Ut enim ad minim veniam",
+]
+
+
+def legacy_word_wrap(image, ctx, text, roi_width, roi_height):
+    """
+    Wrapping loop from Wand documentation, which word_wrap must match.
+    """
+    mutable_message = text
+    iteration_attempts = 100
+
+    def eval_metrics(txt):
+        metrics = ctx.get_font_metrics(image, txt, True)
+        return (metrics.text_width, metrics.text_height)
+
+    while ctx.font_size > 0 and iteration_attempts:
+        iteration_attempts -= 1
+        width, height = eval_metrics(mutable_message)
+        if height > roi_height:
+            ctx.font_size -= 0.75
+            mutable_message = text
+        elif width > roi_width:
+            columns = len(mutable_message)
+            while columns > 0:
+                columns -= 1
+                mutable_message = "\n".join(wrap(mutable_message, columns))
+                wrapped_width, _ = eval_metrics(mutable_message)
+                if wrapped_width <= roi_width:
+                    break
+            if columns < 1:
+                ctx.font_size -= 0.75
+                mutable_message = text
+        else:
+            break
+    if iteration_attempts < 1:
+        raise RuntimeError("Unable to calculate word_wrap for " + text)
+    return mutable_message
+
+
+class FakeDrawing:
+    def __init__(self, font_size=48):
+        self.font = "fake.ttf"
+        self.font_size = font_size
+        self.stroke_width = 1
+        self.measured = []
+
+    def get_font_metrics(self, image, text, multiline):
+        self.measured.append((self.font_size, text))
+        lines = text.split("\n")
+        return SimpleNamespace(
+            text_width=max(
+                sum(CHARACTER_WIDTHS.get(char, 0.55) for char in line) for line in lines
+            )
+            * self.font_size,
+            text_height=len(lines) * self.font_size * 1.2,
+        )
+
+
+@pytest.fixture(autouse=True)
+def clear_metrics_cache():
+    text_layout._metrics_cache.clear()
+
+
+@pytest.mark.parametrize("roi_width, roi_height", [(1000, 250), (600, 400), (300, 90)])
+def test_word_wrap_matches_legacy_layout(roi_width, roi_height):
+    for title in TITLES:
+        expected_ctx, ctx = FakeDrawing(), FakeDrawing()
+        expected = legacy_word_wrap(None, expected_ctx, title, roi_width, roi_height)
+        assert word_wrap(None, ctx, title, roi_width, roi_height) == expected
+        assert ctx.font_size == expected_ctx.font_size
+
+
+def test_word_wrap_fails_like_legacy_layout():
+    # not even a single character fits.
+    with pytest.raises(ValueError):
+        legacy_word_wrap(None, FakeDrawing(), "Hello there", 10, 250)
+    with pytest.raises(ValueError):
+        word_wrap(None, FakeDrawing(), "Hello there", 10, 250)
+
+
+def test_text_metrics_are_memoized():
+    ctx = FakeDrawing()
+    message = word_wrap(None, ctx, TITLES[2], 1000, 250)
+    # wraps which do not change the text are not measured again.
+    assert len(ctx.measured) == len(set(ctx.measured))
+
+    ctx = FakeDrawing()
+    assert word_wrap(None, ctx, TITLES[2], 1000, 250) == message
+    assert ctx.measured == []
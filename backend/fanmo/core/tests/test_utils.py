@@ -14,4 +14,20 @@ def test_scheduled_tasks():
             "func": "fanmo.analytics.tasks.refresh_all_stats",
             "schedule_type": Schedule.DAILY,
         },
+        {
+            "func": "fanmo.webhooks.tasks.process_webhook_messages",
+            "schedule_type": Schedule.MINUTES,
+        },
+        {
+            "func": "fanmo.core.sitemaps.build_sitemaps",
+            "schedule_type": Schedule.HOURLY,
+        },
+        {
+            "func": "fanmo.utils.resources.delete_expired_exports",
+            "schedule_type": Schedule.DAILY,
+        },
+        {
+            "func": "fanmo.payments.tasks.retry_payout_transfers",
+            "schedule_type": Schedule.MINUTES,
+        },
     ]
@@ -1,12 +1,22 @@
 from django.conf import settings
+from django.contrib.sitemaps.views import x_robots_tag
 from django.http.response import Http404, HttpResponse
 from django.shortcuts import get_object_or_404, redirect
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
 from versatileimagefield.utils import build_versatileimagefield_url_set
 
+from fanmo.core.index import get_index_shell
+from fanmo.core.sitemaps import (
+    SITEMAP_BUILD_WINDOW,
+    SITEMAP_INDEX,
+    SitemapsNotBuilt,
+    get_sitemap,
+    get_sitemap_name,
+)
 from fanmo.posts.models import Post, PostImage
 from fanmo.users.models import User
 from fanmo.utils.fields import VersatileImageFieldSerializer
-from fanmo.utils.helpers import replace_format
 
 
 def index_view(request, *args, **kwargs):
@@ -102,61 +112,41 @@ def post_image_proxy_view(request, image_uuid, image_size):
     return redirect(image_set[image_size])
 
 
-def serve_index(*, title=None, description=None, image=None, keywords=None, status=200):
+@x_robots_tag
+def sitemap_view(request, section=None, page=None):
     """
-    Serve and manipulate 200.html generated by nuxt.
+    Serve sitemaps pre-rendered by `build_sitemaps`.
     """
-    response_text = open("/var/www/html/200.html").read()
-    if title:
-        suffixed_title = f"{title.strip()} | Fanmo"
-        response_text = replace_format(
-            response_text, "<title>%s</title>", suffixed_title
-        )
-        response_text = replace_format(
-            response_text,
-            'name="twitter:title" content="%s" data-hid="twitter:title"',
-            suffixed_title,
-        )
-        response_text = replace_format(
-            response_text,
-            'property="og:title" content="%s" data-hid="og:title"',
-            suffixed_title,
+    name = get_sitemap_name(section, page) if section else SITEMAP_INDEX
+    try:
+        sitemap_file = get_sitemap(name)
+    except SitemapsNotBuilt:
+        response = HttpResponse(
+            "Sitemaps are being built.", content_type="text/plain", status=503
         )
+        response["Retry-After"] = SITEMAP_BUILD_WINDOW
+        return response
+    if not sitemap_file:
+        raise Http404
 
-    if description:
-        response_text = replace_format(
-            response_text,
-            'name="description" content="%s" data-hid="description"',
-            description,
-        )
-        response_text = replace_format(
-            response_text,
-            'name="twitter:description" content="%s" data-hid="twitter:description"',
-            description,
-        )
-        response_text = replace_format(
-            response_text,
-            'property="og:description" content="%s" data-hid="og:description"',
-            description,
-        )
+    etag = quote_etag(sitemap_file["etag"])
+    last_modified = int(sitemap_file["last_modified"])
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = HttpResponse(sitemap_file["content"], "application/xml")
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    return response
 
-    if image:
-        response_text = replace_format(
-            response_text,
-            'name="twitter:image" content="%s" data-hid="twitter:image"',
-            image,
-        )
-        response_text = replace_format(
-            response_text,
-            'property="og:image" content="%s" data-hid="og:image"',
-            image,
-        )
-
-    if keywords:
-        response_text = replace_format(
-            response_text,
-            'name="keywords" content="%s" data-hid="keywords"',
-            keywords,
-        )
 
+def serve_index(*, title=None, description=None, image=None, keywords=None, status=200):
+    """
+    Serve and manipulate 200.html generated by nuxt.
+    """
+    response_text = get_index_shell().render(
+        title=f"{title.strip()} | Fanmo" if title else None,
+        description=description,
+        image=image,
+        keywords=keywords,
+    )
     return HttpResponse(response_text, "text/html", status=status)
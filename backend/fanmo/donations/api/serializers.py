@@ -11,6 +11,7 @@ from fanmo.posts.api.serializers import (
     PostReactionSummarySerializer,
 )
 from fanmo.posts.models import Post, Reaction
+from fanmo.posts.reactions import add_reaction, get_reaction_summary, remove_reaction
 from fanmo.users.api.serializers import FanUserPreviewSerializer, UserPreviewSerializer
 from fanmo.utils.fields import VersatileImageFieldSerializer
 
@@ -72,13 +73,9 @@ class DonationReactionSerializer(serializers.ModelSerializer):
     def update(self, instance, validated_data):
         user = self.context["request"].user
         if validated_data["action"] == "add":
-            Reaction.objects.update_or_create(
-                donation=instance, author_user=user, emoji=validated_data["emoji"]
-            )
+            add_reaction(instance, user, validated_data["emoji"])
         else:
-            Reaction.objects.filter(
-                donation=instance, author_user=user, emoji=validated_data["emoji"]
-            ).delete()
+            remove_reaction(instance, user, validated_data["emoji"])
         return instance
 
 
@@ -91,19 +88,8 @@ class DonationSocialStatsSerializer(serializers.ModelSerializer):
         fields = ["reactions", "comment_count"]
 
     @extend_schema_field(PostReactionSummarySerializer(many=True))
-    def get_reactions(self, post):
-        reaction_summary = {}
-        for reaction in post.reactions.all():
-            reaction_summary.setdefault(
-                reaction.emoji,
-                {"count": 0, "is_reacted": False, "emoji": reaction.emoji},
-            )
-            reaction_summary[reaction.emoji]["count"] += 1
-
-            if reaction.author_user_id == self.context["request"].user.pk:
-                reaction_summary[reaction.emoji]["is_reacted"] = True
-
-        return reaction_summary.values()
+    def get_reactions(self, donation):
+        return get_reaction_summary(donation, self.context)
 
     @extend_schema_field(serializers.IntegerField())
     def get_comment_count(self, donation):
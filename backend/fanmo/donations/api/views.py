@@ -1,6 +1,6 @@
 from decimal import Decimal
 
-from django.db.models import Count, F, Q, Sum
+from django.db.models import Count, Q, Sum
 from django.db.models.functions import Coalesce
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.utils import extend_schema
@@ -21,13 +21,18 @@ from fanmo.donations.api.serializers import (
 )
 from fanmo.donations.exports import DonationExportResource
 from fanmo.donations.models import Donation
-from fanmo.payments.models import Payment
+from fanmo.payments.models import PaymentLedger
+from fanmo.posts.reactions import annotate_reactions
 from fanmo.users.api.permissions import IsCreator
+from fanmo.utils.pagination import KeysetPaginationMixin
 from fanmo.utils.throttling import Throttle
 
 
 class DonationViewSet(
-    mixins.CreateModelMixin, mixins.UpdateModelMixin, viewsets.ReadOnlyModelViewSet
+    KeysetPaginationMixin,
+    mixins.CreateModelMixin,
+    mixins.UpdateModelMixin,
+    viewsets.ReadOnlyModelViewSet,
 ):
     filter_backends = (DjangoFilterBackend, SearchFilter, OrderingFilter)
     filterset_class = DonationFilter
@@ -38,20 +43,8 @@ class DonationViewSet(
         queryset = Donation.objects.filter(
             status=Donation.Status.SUCCESSFUL
         ).select_related("fan_user", "post", "creator_user__user_preferences")
-        queryset = queryset.prefetch_related("reactions")
         queryset = queryset.annotate(
-            lifetime_amount=Sum(
-                "fan_user__payments__amount",
-                filter=Q(
-                    fan_user__payments__status=Payment.Status.CAPTURED,
-                    fan_user__payments__type=Payment.Type.DONATION,
-                    fan_user__payments__creator_user_id=F("creator_user_id"),
-                ),
-                distinct=True,
-            ),
-            comment_count=Count(
-                "comments", filter=Q(comments__is_published=True), distinct=True
-            ),
+            lifetime_amount=PaymentLedger.lifetime_amount("donation_amount")
         )
         if self.action not in ["recent", "reactions"]:
             queryset = queryset.filter(
@@ -59,6 +52,10 @@ class DonationViewSet(
             )
         return queryset.order_by("-created_at")
 
+    def paginate_queryset(self, queryset):
+        object_list = super().paginate_queryset(queryset)
+        return annotate_reactions(object_list, self.request.user)
+
     def filter_queryset(self, queryset):
         qs = super().filter_queryset(queryset)
         if self.action == "recent":
@@ -125,8 +122,7 @@ class DonationViewSet(
         permission_classes=[permissions.IsAuthenticated, IsCreator],
     )
     def export(self, *args, **kwargs):
-        queryset = self.get_queryset().filter(creator_user=self.request.user)
-        return DonationExportResource().export_csv(queryset)
+        return DonationExportResource().export_csv_for_creator(self.request.user)
 
     @extend_schema(responses=DonationSocialStatsSerializer)
     @action(
@@ -1,7 +1,7 @@
 from import_export import resources
 
 from fanmo.donations.models import Donation
-from fanmo.utils.resources import ModelResource
+from fanmo.utils.resources import ModelResource, display_name
 
 
 class DonationExportResource(ModelResource):
@@ -10,6 +10,8 @@ class DonationExportResource(ModelResource):
     fan_email = resources.Field("fan_user__email", "fan_email")
     amount = resources.Field("amount__amount", "amount")
 
+    export_expressions = {"fan_user__display_name": display_name("fan_user")}
+
     class Meta:
         model = Donation
         fields = [
@@ -27,3 +29,10 @@ class DonationExportResource(ModelResource):
             "updated_at",
         ]
         export_order = fields
+
+    def get_export_queryset(self, creator_user):
+        return (
+            super()
+            .get_export_queryset(creator_user)
+            .filter(status=Donation.Status.SUCCESSFUL)
+        )
@@ -0,0 +1,44 @@
+# Generated by Django 3.2.14 on 2026-10-18 14:29
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_comment_count(apps, schema_editor):
+    Donation = apps.get_model("donations", "Donation")
+    Comment = apps.get_model("posts", "Comment")
+    comment_count = (
+        Comment.objects.filter(donation=OuterRef("pk"), is_published=True)
+        .order_by()
+        .values("donation")
+        .annotate(count=Count("id"))
+        .values("count")
+    )
+    Donation.objects.update(
+        comment_count=Coalesce(
+            Subquery(comment_count, output_field=IntegerField()), 0
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('donations', '0004_donation_post'),
+        ('posts', '0011_post_comment_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='donation',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='historicaldonation',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_comment_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.14 on 2026-10-18 14:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('donations', '0005_donation_comment_count'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='donation',
+            index=models.Index(fields=['created_at', 'id'], name='donations_created_891ffb_idx'),
+        ),
+    ]
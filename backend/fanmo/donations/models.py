@@ -34,6 +34,10 @@ class Donation(BaseModel):
     history = HistoricalRecords(bases=[IPAddressHistoricalModel])
 
     is_hidden = models.BooleanField(default=False)
+    comment_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [models.Index(fields=["created_at", "id"])]
 
     def create_external(self):
         external_data = razorpay_client.order.create(
@@ -21,8 +21,9 @@ from fanmo.memberships.api.serializers import (
 )
 from fanmo.memberships.exports import MembershipExportResource
 from fanmo.memberships.models import Membership, Subscription
-from fanmo.payments.models import Payment
+from fanmo.payments.models import PaymentLedger
 from fanmo.users.api.permissions import IsCreator
+from fanmo.utils.pagination import KeysetPaginationMixin
 from fanmo.utils.throttling import Throttle
 
 
@@ -42,7 +43,10 @@ class TierViewSet(
 
 
 class MembershipViewSet(
-    mixins.CreateModelMixin, mixins.UpdateModelMixin, viewsets.ReadOnlyModelViewSet
+    KeysetPaginationMixin,
+    mixins.CreateModelMixin,
+    mixins.UpdateModelMixin,
+    viewsets.ReadOnlyModelViewSet,
 ):
     """
     TODO: Test and fix concurrent membership requests.
@@ -75,10 +79,7 @@ class MembershipViewSet(
             "scheduled_subscription",
         )
         queryset = queryset.annotate(
-            lifetime_amount=Sum(
-                "subscriptions__payments__amount",
-                filter=Q(subscriptions__payments__status=Payment.Status.CAPTURED),
-            )
+            lifetime_amount=PaymentLedger.lifetime_amount("membership_amount")
         )
         return queryset.order_by("-created_at")
 
@@ -122,7 +123,11 @@ class MembershipViewSet(
                 total=Count("id"),
                 active=Count("id", filter=Q(is_active=True)),
                 inactive=Count("id", filter=Q(is_active=False)),
-                total_payment=Coalesce(Sum("lifetime_amount"), Decimal(0)),
+            )
+        )
+        agg_stats.update(
+            PaymentLedger.objects.filter(creator_user=self.request.user.pk).aggregate(
+                total_payment=Coalesce(Sum("membership_amount"), Decimal(0))
             )
         )
         return Response(self.get_serializer(agg_stats).data)
@@ -133,8 +138,7 @@ class MembershipViewSet(
         permission_classes=[permissions.IsAuthenticated, IsCreator],
     )
     def export(self, *args, **kwargs):
-        queryset = self.get_queryset().filter(creator_user=self.request.user)
-        return MembershipExportResource().export_csv(queryset)
+        return MembershipExportResource().export_csv_for_creator(self.request.user)
 
 
 class SubscriptionViewSet(viewsets.ReadOnlyModelViewSet):
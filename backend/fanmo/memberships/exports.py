@@ -1,7 +1,7 @@
 from import_export import resources
 
 from fanmo.memberships.models import Membership
-from fanmo.utils.resources import ModelResource
+from fanmo.utils.resources import ModelResource, display_name
 
 
 class MembershipExportResource(ModelResource):
@@ -65,6 +65,8 @@ class MembershipExportResource(ModelResource):
         "scheduled_subscription_amount_currency",
     )
 
+    export_expressions = {"fan_user__display_name": display_name("fan_user")}
+
     class Meta:
         model = Membership
         fields = [
@@ -95,3 +97,7 @@ class MembershipExportResource(ModelResource):
             "updated_at",
         ]
         export_order = fields
+
+    def get_export_queryset(self, creator_user):
+        # memberships which were never paid for
+        return super().get_export_queryset(creator_user).exclude(is_active__isnull=True)
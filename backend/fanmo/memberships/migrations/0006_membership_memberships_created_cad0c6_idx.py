@@ -0,0 +1,17 @@
+# Generated by Django 3.2.14 on 2026-10-18 14:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('memberships', '0005_auto_20221021_1318'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='membership',
+            index=models.Index(fields=['created_at', 'id'], name='memberships_created_cad0c6_idx'),
+        ),
+    ]
@@ -26,6 +26,7 @@ from fanmo.core.tasks import async_task
 from fanmo.integrations.tasks import refresh_discord_membership
 from fanmo.memberships.querysets import SubscriptionQuerySet
 from fanmo.payments.models import Payment, Payout
+from fanmo.users.entitlements import invalidate_entitlements
 from fanmo.utils import razorpay_client
 from fanmo.utils.models import BaseModel, IPAddressHistoricalModel
 from fanmo.utils.money import money_to_sub_unit
@@ -101,6 +102,7 @@ class Membership(BaseModel):
                 fields=["creator_user", "fan_user"], name="unique_membership"
             )
         ]
+        indexes = [models.Index(fields=["created_at", "id"])]
 
     def __str__(self):
         return f"{self.fan_user} -> {self.creator_user} ({self.tier})"
@@ -128,7 +130,7 @@ class Membership(BaseModel):
         )
 
     def giveaway(self, tier, period):
-        from fanmo.analytics.tasks import refresh_stats
+        from fanmo.analytics.tasks import schedule_refresh_stats
 
         # TODO: Send different email for giveaway
         plan = Plan.for_tier(tier, period, is_giveaway=True)
@@ -170,7 +172,7 @@ class Membership(BaseModel):
         # force follow the creator
         self.creator_user.follow(self.fan_user)
 
-        async_task(refresh_stats, self.creator_user.pk)
+        schedule_refresh_stats(self.creator_user.pk)
 
     def update(self, tier, period=None):
         """Update membership with active subscription to a new tier"""
@@ -237,6 +239,7 @@ class Membership(BaseModel):
         self.tier = self.active_subscription.plan.tier
         self.is_active = True
         self.save()
+        invalidate_entitlements(self.fan_user_id)
 
 
 class Plan(BaseModel):
@@ -517,6 +520,7 @@ class Subscription(BaseModel):
         self.is_active = False
         self.membership.is_active = False
         self.membership.save()
+        invalidate_entitlements(self.fan_user_id)
         refresh_discord_membership(self.membership_id)
 
     def update(self, plan):
@@ -616,5 +620,6 @@ class Subscription(BaseModel):
         self.is_active = False
         self.membership.is_active = False
         self.membership.save()
+        invalidate_entitlements(self.fan_user_id)
         async_task(notify_membership_halted, self.membership_id)
         async_task(refresh_discord_membership, self.membership_id)
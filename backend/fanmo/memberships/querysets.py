@@ -17,6 +17,19 @@ class SubscriptionQuerySet(models.QuerySet):
         now = timezone.now()
         return self.filter(cycle_start_at__lte=now, cycle_end_at__gte=now)
 
+    def cycle_ended(self):
+        """
+        Subscriptions which need a refresh because their cycle is over.
+        """
+        return self.filter(
+            cycle_end_at__lt=timezone.now(),
+            status__in=[
+                self.model.Status.ACTIVE,
+                self.model.Status.PENDING,
+                self.model.Status.SCHEDULED_TO_CANCEL,
+            ],
+        )
+
     def active_at(self, value):
         return self.filter(cycle_start_at__gte=value).exclude(
             status__in=[
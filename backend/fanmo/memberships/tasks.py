@@ -1,10 +1,11 @@
+import structlog
 from django.db import transaction
 from django_fsm import can_proceed
 
-from fanmo.analytics.tasks import refresh_stats
-from fanmo.core.tasks import async_task
+from fanmo.analytics.tasks import schedule_refresh_stats
 from fanmo.memberships.models import Membership, Subscription
-from fanmo.users.models import User
+
+logger = structlog.get_logger(__name__)
 
 
 @transaction.atomic
@@ -24,6 +25,13 @@ def refresh_membership(membership_id: int):
     membership: Membership = Membership.objects.select_for_update().get(
         id=membership_id
     )
+    refresh_locked_membership(membership)
+
+
+def refresh_locked_membership(membership: Membership):
+    """
+    Refresh a membership which is already locked by the current transaction.
+    """
     active_subscription: Subscription = membership.active_subscription
     scheduled_subscription: Subscription = membership.scheduled_subscription
 
@@ -46,16 +54,48 @@ def refresh_membership(membership_id: int):
         active_subscription.start_renewal()
         active_subscription.save()
 
-    refresh_stats(active_subscription.creator_user_id)
+    schedule_refresh_stats(active_subscription.creator_user_id)
 
 
 def refresh_creator_memberships(creator_user_id):
-    for membership_id in Membership.objects.filter(
-        creator_user_id=creator_user_id
-    ).values_list("id", flat=True):
-        async_task(refresh_membership, membership_id)
+    refresh_due_memberships(creator_user_id=creator_user_id)
 
 
 def refresh_all_memberships():
-    for user in User.objects.filter(is_creator=True):
-        async_task(refresh_creator_memberships, user.id)
+    refresh_due_memberships()
+
+
+def refresh_due_memberships(creator_user_id=None, chunk_size=500):
+    """
+    Refresh memberships whose active subscription cycle has ended.
+
+    Memberships are processed in chunks, each in its own transaction.
+    Memberships locked by another transaction (e.g. a webhook) are skipped,
+    the next run will pick them up if they still need a refresh.
+    """
+    memberships = Membership.objects.filter(
+        active_subscription__in=Subscription.objects.cycle_ended()
+    ).order_by("id")
+    if creator_user_id:
+        memberships = memberships.filter(creator_user_id=creator_user_id)
+
+    last_id = 0
+    while True:
+        with transaction.atomic():
+            chunk = list(
+                memberships.filter(id__gt=last_id).select_for_update(skip_locked=True)[
+                    :chunk_size
+                ]
+            )
+            if not chunk:
+                break
+
+            for membership in chunk:
+                try:
+                    with transaction.atomic():
+                        refresh_locked_membership(membership)
+                except Exception:
+                    logger.exception(
+                        "membership_refresh_failed", membership_id=membership.id
+                    )
+            last_id = chunk[-1].id
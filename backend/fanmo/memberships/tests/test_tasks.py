@@ -2,7 +2,11 @@ import pytest
 from dateutil.relativedelta import relativedelta
 
 from fanmo.memberships.models import Subscription
-from fanmo.memberships.tasks import refresh_membership
+from fanmo.memberships.tasks import (
+    refresh_due_memberships,
+    refresh_locked_membership,
+    refresh_membership,
+)
 
 pytestmark = pytest.mark.django_db
 
@@ -150,3 +154,26 @@ class TestMembershipTasks:
         assert active_membership.scheduled_subscription.id == scheduled_subscription.id
         assert not add_fan_to_discord_server_mock.called
         assert remove_fan_from_discord_server_mock.called
+
+    def test_refresh_due_memberships(
+        self, active_membership, creator_user, time_machine, mocker
+    ):
+        mocker.patch("fanmo.integrations.tasks.add_fan_to_discord_server")
+        mocker.patch("fanmo.integrations.tasks.remove_fan_from_discord_server")
+        refresh_locked_membership_mock = mocker.patch(
+            "fanmo.memberships.tasks.refresh_locked_membership",
+            wraps=refresh_locked_membership,
+        )
+        subscription: Subscription = active_membership.active_subscription
+
+        # memberships in an ongoing cycle are not selected
+        time_machine.move_to(subscription.cycle_end_at - relativedelta(days=2))
+        refresh_due_memberships()
+        assert not refresh_locked_membership_mock.called
+
+        time_machine.move_to(subscription.cycle_end_at + relativedelta(days=1))
+        refresh_due_memberships(creator_user_id=creator_user.id, chunk_size=1)
+        assert refresh_locked_membership_mock.call_count == 1
+
+        subscription.refresh_from_db()
+        assert subscription.status == Subscription.Status.PENDING
@@ -76,8 +76,7 @@ class PaymentViewSet(mixins.CreateModelMixin, viewsets.ReadOnlyModelViewSet):
         permission_classes=[permissions.IsAuthenticated, IsCreator],
     )
     def export(self, *args, **kwargs):
-        queryset = self.get_queryset().filter(creator_user=self.request.user)
-        return PaymentExportResource().export_csv(queryset)
+        return PaymentExportResource().export_csv_for_creator(self.request.user)
 
 
 class PayoutViewSet(viewsets.ReadOnlyModelViewSet):
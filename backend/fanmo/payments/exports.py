@@ -1,7 +1,7 @@
 from import_export import resources
 
 from fanmo.payments.models import Payment
-from fanmo.utils.resources import ModelResource
+from fanmo.utils.resources import ModelResource, display_name
 
 
 class PaymentExportResource(ModelResource):
@@ -12,6 +12,8 @@ class PaymentExportResource(ModelResource):
     payout_amount = resources.Field("payout__amount__amount", "payout_amount")
     payout_status = resources.Field("payout__status", "payout_status")
 
+    export_expressions = {"fan_user__display_name": display_name("fan_user")}
+
     class Meta:
         model = Payment
         fields = [
@@ -30,3 +32,10 @@ class PaymentExportResource(ModelResource):
             "updated_at",
         ]
         export_order = fields
+
+    def get_export_queryset(self, creator_user):
+        return (
+            super()
+            .get_export_queryset(creator_user)
+            .filter(status=Payment.Status.CAPTURED)
+        )
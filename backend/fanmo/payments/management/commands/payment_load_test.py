@@ -0,0 +1,303 @@
+import json
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+
+from fanmo.payments.simulator import sign_webhook
+from fanmo.users.models import User
+
+SCENARIOS = ["signup", "membership", "donation", "charge", "settlement"]
+
+
+class ScenarioFailed(Exception):
+    pass
+
+
+class PaymentLoadTest:
+    """
+    Drives the payment flow of fanmo against the razorpay simulator at fixed rates.
+
+    Each scenario is started at its own rate (per second) regardless of how long the
+    previous ones take, response times are recorded by endpoint. Scenario times are
+    measured from their scheduled start, so time spent waiting for a free worker
+    shows up instead of lowering the offered rate unnoticed.
+    """
+
+    def __init__(self, base_url, simulator_url, creator_user, tier):
+        self.base_url = base_url.rstrip("/")
+        self.simulator_url = simulator_url.rstrip("/")
+        self.creator_user = creator_user
+        self.tier = tier
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.timings = {}
+        self.errors = {}
+        # unexpected exceptions by scenario, i.e. bugs of the load test.
+        self.exceptions = {}
+        self.subscription_ids = []
+
+    @property
+    def session(self):
+        if not hasattr(self.local, "session"):
+            self.local.session = requests.Session()
+        return self.local.session
+
+    def request(self, method, path, label=None, session=None, **kwargs):
+        label = f"{method} {label or path}"
+        session = session or self.session
+        started = time.perf_counter()
+        try:
+            response = session.request(
+                method, f"{self.base_url}{path}", timeout=30, **kwargs
+            )
+        except requests.RequestException:
+            response = None
+        elapsed = time.perf_counter() - started
+
+        failed = response is None or response.status_code >= 400
+        with self.lock:
+            self.timings.setdefault(label, []).append(elapsed)
+            if failed:
+                self.errors[label] = self.errors.get(label, 0) + 1
+        if failed:
+            raise ScenarioFailed(label)
+        if response.headers.get("Content-Type", "").startswith("application/json"):
+            return response.json()
+        return None
+
+    def simulate(self, path, data):
+        response = self.session.post(
+            f"{self.simulator_url}/_simulator/{path}", json=data, timeout=30
+        )
+        if response.status_code >= 400:
+            raise ScenarioFailed(f"simulator {path}")
+        return response.json()
+
+    def send_webhook(self, event):
+        body = json.dumps(event)
+        self.request(
+            "POST",
+            "/api/webhooks/razorpay/",
+            label=f"/api/webhooks/razorpay/ ({event['event']})",
+            data=body,
+            headers={
+                "Content-Type": "application/json",
+                "X-Razorpay-Signature": sign_webhook(body),
+                "X-Razorpay-Event-Id": f"evt_{uuid.uuid4().hex}",
+            },
+        )
+
+    def new_email(self):
+        return f"loadtest-{uuid.uuid4().hex}@example.com"
+
+    def signup(self):
+        # not the shared session, the user stays logged in after signing up.
+        with requests.Session() as session:
+            self.request(
+                "POST",
+                "/api/auth/register/",
+                session=session,
+                json={
+                    "name": "Load Test",
+                    "email": self.new_email(),
+                    "password": uuid.uuid4().hex,
+                },
+            )
+
+    def membership(self):
+        membership = self.request(
+            "POST",
+            "/api/memberships/",
+            json={
+                "tier_id": self.tier.id,
+                "creator_username": self.creator_user.username,
+                "email": self.new_email(),
+            },
+        )
+        subscription = membership["scheduled_subscription"]
+        external_id = subscription["payment"]["payload"]["subscription_id"]
+        checkout = self.simulate("checkout", {"subscription_id": external_id})
+        self.request(
+            "POST",
+            "/api/payments/",
+            label="/api/payments/ (subscription)",
+            json={
+                "type": "subscription",
+                "subscription_id": subscription["id"],
+                "processor": "razorpay",
+                "payload": checkout,
+            },
+        )
+        with self.lock:
+            self.subscription_ids.append(external_id)
+
+        # first charge of the subscription
+        self.send_webhook(
+            self.simulate(
+                "events",
+                {"event": "subscription.charged", "subscription_id": external_id},
+            )
+        )
+
+    def donation(self):
+        donation = self.request(
+            "POST",
+            "/api/donations/",
+            json={
+                "creator_username": self.creator_user.username,
+                "email": self.new_email(),
+                "amount": random.choice([50, 100, 500]),
+            },
+        )
+        order_id = donation["payment"]["payload"]["order_id"]
+        checkout = self.simulate("checkout", {"order_id": order_id})
+        self.request(
+            "POST",
+            "/api/payments/",
+            label="/api/payments/ (donation)",
+            json={
+                "type": "donation",
+                "donation_id": donation["id"],
+                "processor": "razorpay",
+                "payload": checkout,
+            },
+        )
+        self.send_webhook(
+            self.simulate("events", {"event": "order.paid", "order_id": order_id})
+        )
+
+    def charge(self):
+        """
+        Renewal of a subscription created by the membership scenario.
+        """
+        with self.lock:
+            if not self.subscription_ids:
+                return
+            external_id = random.choice(self.subscription_ids)
+        self.send_webhook(
+            self.simulate(
+                "events",
+                {"event": "subscription.charged", "subscription_id": external_id},
+            )
+        )
+
+    def settlement(self):
+        event = self.simulate("events", {"event": "settlement.processed"})
+        # fanmo expects every settlement to have transfers.
+        if event["payload"]["settlement"]["entity"]["amount"]:
+            self.send_webhook(event)
+
+    def run_scenario(self, scenario, scheduled_at):
+        failed = False
+        try:
+            getattr(self, scenario)()
+        except ScenarioFailed:
+            failed = True
+        except Exception as error:
+            failed = True
+            with self.lock:
+                self.exceptions.setdefault(scenario, []).append(repr(error))
+        elapsed = time.perf_counter() - scheduled_at
+
+        label = f"scenario {scenario}"
+        with self.lock:
+            self.timings.setdefault(label, []).append(elapsed)
+            if failed:
+                self.errors[label] = self.errors.get(label, 0) + 1
+
+    def run(self, rates, duration, workers):
+        schedule = sorted(
+            (index / rate, scenario)
+            for scenario, rate in rates.items()
+            if rate
+            for index in range(int(rate * duration))
+        )
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = []
+            for offset, scenario in schedule:
+                delay = started + offset - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                futures.append(
+                    executor.submit(self.run_scenario, scenario, started + offset)
+                )
+        for future in futures:
+            future.result()
+
+    def get_report(self, percentiles=(50, 95, 99)):
+        """
+        Request count, error count and percentiles (in ms) of response times by endpoint.
+        """
+        report = {}
+        for label, timings in sorted(self.timings.items()):
+            timings = sorted(timings)
+            report[label] = {
+                "count": len(timings),
+                "errors": self.errors.get(label, 0),
+                **{
+                    f"p{percentile}": timings[
+                        min(len(timings) - 1, int(len(timings) * percentile / 100))
+                    ]
+                    * 1000
+                    for percentile in percentiles
+                },
+            }
+        return report
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test signups, memberships, donations, subscription charges and "
+        "settlements against a running server which uses the razorpay simulator."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("creator_username")
+        parser.add_argument("--base-url", default="http://localhost:8000")
+        parser.add_argument("--simulator-url", default="http://127.0.0.1:8500")
+        parser.add_argument("--duration", type=int, default=60, help="In seconds.")
+        parser.add_argument("--workers", type=int, default=50)
+        for scenario in SCENARIOS:
+            parser.add_argument(
+                f"--{scenario}-rate",
+                type=float,
+                default=1 if scenario != "settlement" else 0.1,
+                help=f"{scenario.capitalize()} scenarios started per second.",
+            )
+
+    def handle(
+        self, creator_username, base_url, simulator_url, duration, workers, **options
+    ):
+        try:
+            creator_user = User.objects.get(
+                username=creator_username, user_preferences__is_accepting_payments=True
+            )
+        except User.DoesNotExist:
+            raise CommandError("No such creator who is accepting payments.")
+
+        tier = creator_user.tiers.filter(is_active=True, is_public=True).first()
+        if tier is None:
+            raise CommandError("The creator does not have a public tier.")
+        if not creator_user.bank_accounts.exists():
+            raise CommandError("The creator does not have a bank account for payouts.")
+
+        load_test = PaymentLoadTest(base_url, simulator_url, creator_user, tier)
+        rates = {scenario: options[f"{scenario}_rate"] for scenario in SCENARIOS}
+        load_test.run(rates, duration, workers)
+
+        for label, stats in load_test.get_report().items():
+            self.stdout.write(
+                f"{label}: {stats['count']} requests, {stats['errors']} errors, "
+                f"p50 {stats['p50']:.1f}ms, p95 {stats['p95']:.1f}ms, "
+                f"p99 {stats['p99']:.1f}ms"
+            )
+        for scenario, exceptions in load_test.exceptions.items():
+            self.stderr.write(
+                f"{scenario}: {len(exceptions)} unexpected errors, e.g. {exceptions[0]}"
+            )
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from fanmo.utils.razorpay_session import get_razorpay_metrics
+
+
+class Command(BaseCommand):
+    help = (
+        "Print latency percentiles and response statuses of recent razorpay api calls."
+    )
+
+    def handle(self, *args, **options):
+        metrics = get_razorpay_metrics()
+        if not metrics:
+            self.stdout.write("No razorpay api calls recorded yet.")
+            return
+        for endpoint, endpoint_metrics in metrics.items():
+            statuses = ", ".join(
+                f"{status}: {count}"
+                for status, count in sorted(endpoint_metrics["statuses"].items())
+            )
+            self.stdout.write(
+                f"{endpoint}: p50 {endpoint_metrics['p50'] * 1000:.1f}ms, "
+                f"p95 {endpoint_metrics['p95'] * 1000:.1f}ms, "
+                f"p99 {endpoint_metrics['p99'] * 1000:.1f}ms ({statuses})"
+            )
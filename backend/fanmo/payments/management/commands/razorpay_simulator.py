@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from fanmo.payments.simulator import RazorpaySimulator, make_simulator_server
+
+
+class Command(BaseCommand):
+    help = (
+        "Run an in-memory stand-in of the Razorpay API, "
+        "set RAZORPAY_BASE_URL to http://<host>:<port>/v1 to use it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8500)
+        parser.add_argument(
+            "--latency", type=float, default=0, help="Delay of each request in ms."
+        )
+        parser.add_argument(
+            "--jitter",
+            type=float,
+            default=0,
+            help="Random extra delay of each request, up to the given ms.",
+        )
+
+    def handle(self, host, port, latency, jitter, **options):
+        simulator = RazorpaySimulator(latency=latency / 1000, jitter=jitter / 1000)
+        server = make_simulator_server(host, port, simulator)
+        self.stdout.write(f"Razorpay simulator running at http://{host}:{port}/v1")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
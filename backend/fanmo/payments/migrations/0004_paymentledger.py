@@ -0,0 +1,64 @@
+# Generated by Django 3.2.14 on 2026-10-18 14:35
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Q, Sum
+
+
+def populate_payment_ledgers(apps, schema_editor):
+    Payment = apps.get_model("payments", "Payment")
+    PaymentLedger = apps.get_model("payments", "PaymentLedger")
+    PaymentLedger.objects.bulk_create(
+        [
+            PaymentLedger(
+                creator_user_id=row["creator_user_id"],
+                fan_user_id=row["fan_user_id"],
+                membership_amount=row["membership_amount"] or 0,
+                donation_amount=row["donation_amount"] or 0,
+            )
+            for row in Payment.objects.filter(
+                status="captured", fan_user__isnull=False
+            )
+            .order_by()
+            .values("creator_user_id", "fan_user_id")
+            .annotate(
+                membership_amount=Sum("amount", filter=Q(type="subscription")),
+                donation_amount=Sum("amount", filter=Q(type="donation")),
+            )
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('payments', '0003_alter_payout_bank_account'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaymentLedger',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('membership_amount', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('donation_amount', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('creator_user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fan_ledgers', to=settings.AUTH_USER_MODEL)),
+                ('fan_user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='payment_ledgers', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'payment_ledgers',
+                'ordering': ('-created_at',),
+                'default_related_name': 'payment_ledgers',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='paymentledger',
+            constraint=models.UniqueConstraint(fields=('creator_user', 'fan_user'), name='unique_payment_ledger'),
+        ),
+        migrations.RunPython(populate_payment_ledgers, migrations.RunPython.noop),
+    ]
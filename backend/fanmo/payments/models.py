@@ -1,10 +1,15 @@
+from decimal import Decimal
+
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django_fsm import FSMField, can_proceed
 from djmoney.models.fields import MoneyField
 
 from fanmo.core.notifications import notify_donation
 from fanmo.core.tasks import async_task
+from fanmo.users.entitlements import invalidate_entitlements
 from fanmo.utils import razorpay_client
 from fanmo.utils.models import BaseModel
 from fanmo.utils.money import (
@@ -54,6 +59,25 @@ class Payment(BaseModel):
     amount = MoneyField(max_digits=7, decimal_places=2)
     external_id = models.CharField(max_length=255)
 
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            previous_status = (
+                Payment.objects.filter(pk=self.pk)
+                .values_list("status", flat=True)
+                .first()
+                if self.pk
+                else None
+            )
+            super().save(*args, **kwargs)
+
+            # keep lifetime amounts in sync with captured and refunded payments.
+            was_captured = previous_status == self.Status.CAPTURED
+            is_captured = self.status == self.Status.CAPTURED
+            if was_captured != is_captured:
+                PaymentLedger.record(
+                    self, self.amount.amount if is_captured else -self.amount.amount
+                )
+
     @classmethod
     def for_subscription(cls, subscription, payload):
         payment, _ = Payment.objects.get_or_create(
@@ -75,6 +99,9 @@ class Payment(BaseModel):
         # only usable for "created" subscription
         razorpay_client.utility.verify_payment_signature(payload)
 
+        # fetched before locking the subscription, a slow api call should not hold the lock.
+        razorpay_payment = razorpay_client.payment.fetch(payload["razorpay_order_id"])
+
         # how to identify the payment for which the user is creating subscription?
         # only possible if there is 1:1 reference between local and external subscription.
         try:
@@ -91,7 +118,6 @@ class Payment(BaseModel):
 
         subscription.authenticate()
 
-        razorpay_payment = razorpay_client.payment.fetch(payload["razorpay_order_id"])
         # TODO: figure out what to with authentication payments.
         # make sure payment is not already processed?
         # allow soft reprocessing if it is for real local subscription.
@@ -133,6 +159,7 @@ class Payment(BaseModel):
         )
         donation.status = Donation.Status.SUCCESSFUL
         donation.save()
+        invalidate_entitlements(donation.fan_user_id)
 
         payment, _ = Payment.objects.get_or_create(
             type=Payment.Type.DONATION,
@@ -152,6 +179,59 @@ class Payment(BaseModel):
         return payment
 
 
+class PaymentLedger(BaseModel):
+    """
+    Lifetime amounts of captured payments from a fan to a creator.
+    """
+
+    creator_user = models.ForeignKey(
+        "users.User", on_delete=models.CASCADE, related_name="fan_ledgers"
+    )
+    fan_user = models.ForeignKey("users.User", on_delete=models.CASCADE)
+
+    membership_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    donation_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["creator_user", "fan_user"], name="unique_payment_ledger"
+            )
+        ]
+
+    @classmethod
+    def record(cls, payment, amount):
+        if not payment.fan_user_id:
+            return
+
+        field = (
+            "membership_amount"
+            if payment.type == Payment.Type.SUBSCRIPTION
+            else "donation_amount"
+        )
+        cls.objects.get_or_create(
+            creator_user_id=payment.creator_user_id, fan_user_id=payment.fan_user_id
+        )
+        cls.objects.filter(
+            creator_user_id=payment.creator_user_id, fan_user_id=payment.fan_user_id
+        ).update(**{field: F(field) + amount})
+
+    @classmethod
+    def lifetime_amount(cls, field):
+        """
+        Lifetime amount of the (creator_user, fan_user) pair of the outer queryset.
+        """
+        return Coalesce(
+            Subquery(
+                cls.objects.filter(
+                    creator_user_id=OuterRef("creator_user_id"),
+                    fan_user_id=OuterRef("fan_user_id"),
+                ).values(field)[:1]
+            ),
+            Decimal(0),
+        )
+
+
 class Payout(BaseModel):
     class Status(models.TextChoices):
         SCHEDULED = "scheduled"
@@ -180,9 +260,20 @@ class Payout(BaseModel):
             bank_account=payment.creator_user.bank_accounts.first(),
         )
         if _created:
-            payout.create_external()
+            from fanmo.payments.tasks import create_payout_transfer
+
+            # transfer once the rows locked while recording the payment are released,
+            # failed transfers are retried by retry_payout_transfers.
+            async_task(create_payout_transfer, payout.id)
         return payout
 
+    def find_external(self):
+        """
+        Id of the transfer already created from the payment, if any.
+        """
+        transfers = razorpay_client.payment.transfers(self.payment.external_id)
+        return transfers["items"][0]["id"] if transfers["items"] else None
+
     def create_external(self):
         external_data = razorpay_client.payment.transfer(
             self.payment.external_id,
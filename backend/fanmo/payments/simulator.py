@@ -0,0 +1,389 @@
+import hashlib
+import hmac
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime
+from socketserver import ThreadingMixIn
+from urllib.parse import parse_qs
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+from dateutil.relativedelta import relativedelta
+from django.conf import settings
+from django.utils import timezone
+from django.utils.crypto import get_random_string
+
+PERIOD_DELTAS = {
+    "daily": "days",
+    "weekly": "weeks",
+    "monthly": "months",
+    "yearly": "years",
+}
+
+
+def sign_payment(first_id, second_id):
+    """
+    Signature of a checkout response, as verified by `verify_payment_signature`.
+
+    Orders are signed as "<order_id>|<payment_id>", subscriptions
+    as "<payment_id>|<subscription_id>".
+    """
+    return hmac.new(
+        settings.RAZORPAY_SECRET.encode(),
+        f"{first_id}|{second_id}".encode(),
+        hashlib.sha256,
+    ).hexdigest()
+
+
+def sign_webhook(body):
+    return hmac.new(
+        settings.RAZORPAY_WEBHOOK_SECRET.encode(), body.encode(), hashlib.sha256
+    ).hexdigest()
+
+
+class SimulatorError(Exception):
+    def __init__(self, status, description):
+        super().__init__(description)
+        self.status = status
+        self.description = description
+
+
+class RazorpaySimulator:
+    """
+    In-memory stand-in of the Razorpay API endpoints used by fanmo, as a WSGI application.
+
+    Point `RAZORPAY_BASE_URL` to it to run the payment flow without hitting Razorpay.
+    Besides the API, `/_simulator/` endpoints return what Razorpay would send
+    to fanmo: the checkout response of a payment and the payload of webhook events.
+    Every request is delayed by `latency` seconds, plus up to `jitter` seconds.
+    """
+
+    def __init__(self, latency=0, jitter=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.lock = threading.Lock()
+        self.plans = {}
+        self.subscriptions = {}
+        self.orders = {}
+        self.payments = {}
+        self.transfers = {}
+        self.routes = [
+            ("POST", r"/v1/plans", self.create_plan),
+            ("POST", r"/v1/subscriptions", self.create_subscription),
+            ("PATCH", r"/v1/subscriptions/(\w+)", self.update_subscription),
+            ("POST", r"/v1/subscriptions/(\w+)/cancel", self.cancel_subscription),
+            ("POST", r"/v1/orders", self.create_order),
+            ("GET", r"/v1/payments/(\w+)", self.fetch_payment),
+            ("POST", r"/v1/payments/(\w+)/capture", self.capture_payment),
+            ("POST", r"/v1/payments/(\w+)/transfers", self.create_transfers),
+            ("GET", r"/v1/payments/(\w+)/transfers", self.list_payment_transfers),
+            ("GET", r"/v1/transfers", self.list_transfers),
+            ("POST", r"/_simulator/checkout", self.checkout),
+            ("POST", r"/_simulator/events", self.create_event),
+        ]
+
+    def __call__(self, environ, start_response):
+        if self.latency or self.jitter:
+            time.sleep(self.latency + random.uniform(0, self.jitter))
+
+        method = environ["REQUEST_METHOD"]
+        path = environ["PATH_INFO"]
+        try:
+            for route_method, pattern, handler in self.routes:
+                match = re.fullmatch(pattern, path)
+                if match and route_method == method:
+                    break
+            else:
+                raise SimulatorError(404, f"{method} {path} is not supported.")
+
+            content_length = int(environ.get("CONTENT_LENGTH") or 0)
+            body = environ["wsgi.input"].read(content_length) if content_length else b""
+            data = json.loads(body) if body else {}
+            data.update(
+                {
+                    key: values[0]
+                    for key, values in parse_qs(environ.get("QUERY_STRING", "")).items()
+                }
+            )
+            with self.lock:
+                status, response = 200, handler(data, *match.groups())
+        except SimulatorError as error:
+            status = error.status
+            response = {
+                "error": {
+                    "code": "BAD_REQUEST_ERROR",
+                    "description": error.description,
+                }
+            }
+
+        start_response(
+            f"{status} {'OK' if status == 200 else 'Error'}",
+            [("Content-Type", "application/json")],
+        )
+        return [json.dumps(response).encode()]
+
+    def get_object(self, objects, object_id):
+        try:
+            return objects[object_id]
+        except KeyError:
+            raise SimulatorError(400, f"The id provided does not exist: {object_id}")
+
+    def new_id(self, prefix):
+        return f"{prefix}_{get_random_string(14)}"
+
+    def now(self):
+        return int(timezone.now().timestamp())
+
+    def create_plan(self, data):
+        plan = {
+            "id": self.new_id("plan"),
+            "entity": "plan",
+            "period": data["period"],
+            "interval": data["interval"],
+            "item": data["item"],
+            "notes": data.get("notes", {}),
+            "created_at": self.now(),
+        }
+        self.plans[plan["id"]] = plan
+        return plan
+
+    def create_subscription(self, data):
+        self.get_object(self.plans, data["plan_id"])
+        subscription = {
+            "id": self.new_id("sub"),
+            "entity": "subscription",
+            "plan_id": data["plan_id"],
+            "status": "created",
+            "total_count": data["total_count"],
+            "paid_count": 0,
+            "start_at": data.get("start_at"),
+            "current_start": None,
+            "current_end": None,
+            "notes": data.get("notes", {}),
+            "created_at": self.now(),
+        }
+        self.subscriptions[subscription["id"]] = subscription
+        return subscription
+
+    def update_subscription(self, data, subscription_id):
+        subscription = self.get_object(self.subscriptions, subscription_id)
+        self.get_object(self.plans, data["plan_id"])
+        subscription["plan_id"] = data["plan_id"]
+        return subscription
+
+    def cancel_subscription(self, data, subscription_id):
+        subscription = self.get_object(self.subscriptions, subscription_id)
+        subscription["status"] = "cancelled"
+        return subscription
+
+    def create_order(self, data):
+        order = {
+            "id": self.new_id("order"),
+            "entity": "order",
+            "amount": data["amount"],
+            "currency": data["currency"],
+            "status": "created",
+            "notes": data.get("notes", {}),
+            "created_at": self.now(),
+        }
+        self.orders[order["id"]] = order
+        return order
+
+    def create_payment(self, amount, currency, status, **kwargs):
+        payment = {
+            "id": self.new_id("pay"),
+            "entity": "payment",
+            "amount": amount,
+            "currency": currency,
+            "status": status,
+            "method": "card",
+            "created_at": self.now(),
+            **kwargs,
+        }
+        self.payments[payment["id"]] = payment
+        return payment
+
+    def fetch_payment(self, data, payment_id):
+        return self.get_object(self.payments, payment_id)
+
+    def capture_payment(self, data, payment_id):
+        payment = self.get_object(self.payments, payment_id)
+        if payment["status"] != "authorized":
+            raise SimulatorError(400, "This payment has already been captured")
+        if int(data["amount"]) != payment["amount"]:
+            raise SimulatorError(
+                400, "Capture amount must be equal to the amount authorized"
+            )
+        payment["status"] = "captured"
+        if payment.get("order_id"):
+            self.orders[payment["order_id"]]["status"] = "paid"
+        return payment
+
+    def create_transfers(self, data, payment_id):
+        payment = self.get_object(self.payments, payment_id)
+        if payment["status"] != "captured":
+            raise SimulatorError(400, "Only captured payments can be transferred")
+
+        transfers = []
+        for transfer_data in data["transfers"]:
+            transfer = {
+                "id": self.new_id("trf"),
+                "entity": "transfer",
+                "source": payment_id,
+                "recipient": transfer_data["account"],
+                "amount": transfer_data["amount"],
+                "currency": transfer_data["currency"],
+                "recipient_settlement_id": None,
+                "created_at": self.now(),
+            }
+            self.transfers[transfer["id"]] = transfer
+            transfers.append(transfer)
+        return {"entity": "collection", "count": len(transfers), "items": transfers}
+
+    def list_payment_transfers(self, data, payment_id):
+        self.get_object(self.payments, payment_id)
+        transfers = [
+            transfer
+            for transfer in self.transfers.values()
+            if transfer["source"] == payment_id
+        ]
+        return {"entity": "collection", "count": len(transfers), "items": transfers}
+
+    def list_transfers(self, data):
+        transfers = [
+            transfer
+            for transfer in self.transfers.values()
+            if "recipient_settlement_id" not in data
+            or transfer["recipient_settlement_id"] == data["recipient_settlement_id"]
+        ]
+        return {"entity": "collection", "count": len(transfers), "items": transfers}
+
+    def checkout(self, data):
+        """
+        Pay an order or authenticate a subscription, returns the response
+        of the checkout form which is sent to fanmo by the browser.
+        """
+        if "order_id" in data:
+            order = self.get_object(self.orders, data["order_id"])
+            payment = self.create_payment(
+                order["amount"], order["currency"], "authorized", order_id=order["id"]
+            )
+            return {
+                "razorpay_order_id": order["id"],
+                "razorpay_payment_id": payment["id"],
+                "razorpay_signature": sign_payment(order["id"], payment["id"]),
+            }
+
+        subscription = self.get_object(self.subscriptions, data["subscription_id"])
+        plan = self.plans[subscription["plan_id"]]
+        payment = self.create_payment(
+            plan["item"]["amount"], plan["item"]["currency"], "captured"
+        )
+        subscription["status"] = "authenticated"
+        return {
+            "razorpay_subscription_id": subscription["id"],
+            "razorpay_payment_id": payment["id"],
+            "razorpay_signature": sign_payment(payment["id"], subscription["id"]),
+        }
+
+    def create_event(self, data):
+        """
+        Payload of a webhook event, the state of the simulator is updated to match it.
+        """
+        builders = {
+            "subscription.charged": self.subscription_charged,
+            "order.paid": self.order_paid,
+            "settlement.processed": self.settlement_processed,
+        }
+        if data.get("event") not in builders:
+            raise SimulatorError(400, f"Unsupported event: {data.get('event')}")
+
+        entities = builders[data["event"]](data)
+        return {
+            "entity": "event",
+            "account_id": "acc_simulator",
+            "event": data["event"],
+            "contains": list(entities),
+            "payload": {name: {"entity": entity} for name, entity in entities.items()},
+            "created_at": self.now(),
+        }
+
+    def subscription_charged(self, data):
+        subscription = self.get_object(self.subscriptions, data["subscription_id"])
+        plan = self.plans[subscription["plan_id"]]
+        payment = self.create_payment(
+            plan["item"]["amount"],
+            plan["item"]["currency"],
+            "captured",
+            invoice_id=self.new_id("inv"),
+        )
+
+        current_start = subscription["current_end"] or subscription["start_at"]
+        current_start = datetime.fromtimestamp(
+            current_start or self.now(), tz=timezone.utc
+        )
+        current_end = current_start + relativedelta(
+            **{PERIOD_DELTAS[plan["period"]]: plan["interval"]}
+        )
+        subscription.update(
+            {
+                "status": "active",
+                "paid_count": subscription["paid_count"] + 1,
+                "current_start": int(current_start.timestamp()),
+                "current_end": int(current_end.timestamp()),
+            }
+        )
+        return {"subscription": subscription, "payment": payment}
+
+    def order_paid(self, data):
+        order = self.get_object(self.orders, data["order_id"])
+        payment = next(
+            (
+                payment
+                for payment in self.payments.values()
+                if payment.get("order_id") == order["id"]
+                and payment["status"] == "captured"
+            ),
+            None,
+        )
+        if payment is None:
+            raise SimulatorError(400, "The order has not been paid yet")
+        return {"payment": payment, "order": order}
+
+    def settlement_processed(self, data):
+        """
+        Settle all transfers which are not settled yet.
+        """
+        settlement = {
+            "id": self.new_id("setl"),
+            "entity": "settlement",
+            "amount": 0,
+            "status": "processed",
+            "created_at": self.now(),
+        }
+        for transfer in self.transfers.values():
+            if transfer["recipient_settlement_id"] is None:
+                transfer["recipient_settlement_id"] = settlement["id"]
+                settlement["amount"] += transfer["amount"]
+        return {"settlement": settlement}
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class QuietWSGIRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def make_simulator_server(host, port, simulator):
+    return make_server(
+        host,
+        port,
+        simulator,
+        server_class=ThreadingWSGIServer,
+        handler_class=QuietWSGIRequestHandler,
+    )
@@ -0,0 +1,45 @@
+import structlog
+from django.db import transaction
+from django.utils import timezone
+
+from fanmo.payments.models import Payout
+
+logger = structlog.get_logger(__name__)
+
+# payouts without a transfer are retried once their first attempt had time to finish.
+PAYOUT_TRANSFER_RETRY_AFTER = timezone.timedelta(minutes=10)
+
+
+def create_payout_transfer(payout_id, retry=False):
+    with transaction.atomic():
+        # only the payout row is locked, concurrent attempts never transfer twice.
+        payout = (
+            Payout.objects.select_related("payment", "bank_account")
+            .select_for_update(of=("self",))
+            .get(id=payout_id)
+        )
+        if payout.external_id:
+            return
+        # a transfer request which timed out may have been completed by razorpay.
+        external_id = payout.find_external() if retry else None
+        if external_id:
+            payout.external_id = external_id
+            payout.save()
+        else:
+            payout.create_external()
+
+
+def retry_payout_transfers():
+    """
+    Create transfers of payouts whose transfer failed, e.g. on a gateway timeout.
+    """
+    payout_ids = Payout.objects.filter(
+        external_id="",
+        bank_account__isnull=False,
+        created_at__lte=timezone.now() - PAYOUT_TRANSFER_RETRY_AFTER,
+    ).values_list("id", flat=True)
+    for payout_id in payout_ids:
+        try:
+            create_payout_transfer(payout_id, retry=True)
+        except Exception:
+            logger.exception("payout_transfer_failed", payout_id=payout_id)
@@ -0,0 +1,75 @@
+from decimal import Decimal
+
+import pytest
+from djmoney.money import Money
+
+from fanmo.payments.models import Payment, PaymentLedger
+from fanmo.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def create_payment(creator_user, fan_user, type, amount, status):
+    return Payment.objects.create(
+        type=type,
+        status=status,
+        amount=Money(amount, "INR"),
+        method=Payment.Method.UPI,
+        external_id="pay_123",
+        creator_user=creator_user,
+        fan_user=fan_user,
+    )
+
+
+class TestPaymentLedger:
+    def test_captured_payments_are_recorded(self, creator_user, user):
+        create_payment(
+            creator_user, user, Payment.Type.SUBSCRIPTION, 100, Payment.Status.CAPTURED
+        )
+        create_payment(
+            creator_user, user, Payment.Type.DONATION, 50, Payment.Status.CAPTURED
+        )
+        create_payment(
+            creator_user, user, Payment.Type.DONATION, 25, Payment.Status.CAPTURED
+        )
+        create_payment(
+            creator_user, user, Payment.Type.DONATION, 10, Payment.Status.FAILED
+        )
+
+        ledger = PaymentLedger.objects.get(creator_user=creator_user, fan_user=user)
+        assert ledger.membership_amount == Decimal("100")
+        assert ledger.donation_amount == Decimal("75")
+
+    def test_payment_leaving_captured_is_subtracted(self, creator_user, user):
+        payment = create_payment(
+            creator_user, user, Payment.Type.DONATION, 50, Payment.Status.CREATED
+        )
+        assert not PaymentLedger.objects.exists()
+
+        payment.status = Payment.Status.CAPTURED
+        payment.save()
+        payment.save()
+        assert PaymentLedger.objects.get().donation_amount == Decimal("50")
+
+        payment.status = Payment.Status.REFUNDED
+        payment.save()
+        assert PaymentLedger.objects.get().donation_amount == Decimal("0")
+
+    def test_anonymous_payments_are_not_recorded(self, creator_user):
+        create_payment(
+            creator_user, None, Payment.Type.DONATION, 50, Payment.Status.CAPTURED
+        )
+        assert not PaymentLedger.objects.exists()
+
+    def test_lifetime_amount(self, creator_user, user):
+        other_user = UserFactory()
+        create_payment(
+            creator_user, user, Payment.Type.DONATION, 50, Payment.Status.CAPTURED
+        )
+        payments = {
+            payment.fan_user_id: payment.lifetime_amount
+            for payment in Payment.objects.annotate(
+                lifetime_amount=PaymentLedger.lifetime_amount("donation_amount")
+            ).filter(fan_user__in=[user, other_user])
+        }
+        assert payments == {user.id: Decimal("50")}
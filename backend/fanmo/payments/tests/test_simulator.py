@@ -0,0 +1,142 @@
+import threading
+
+import pytest
+import razorpay
+from django.conf import settings
+from razorpay.errors import BadRequestError
+
+from fanmo.payments.simulator import (
+    RazorpaySimulator,
+    make_simulator_server,
+    sign_webhook,
+)
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def simulator():
+    simulator = RazorpaySimulator()
+    server = make_simulator_server("127.0.0.1", 0, simulator)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    simulator.url = f"http://127.0.0.1:{server.server_port}"
+    yield simulator
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client(simulator):
+    return razorpay.Client(
+        auth=(settings.RAZORPAY_KEY, settings.RAZORPAY_SECRET),
+        base_url=f"{simulator.url}/v1",
+    )
+
+
+def simulate(client, simulator, path, data):
+    return client.session.post(f"{simulator.url}/_simulator/{path}", json=data).json()
+
+
+class TestRazorpaySimulator:
+    def test_donation(self, client, simulator):
+        order = client.order.create({"amount": 50_00, "currency": "INR"})
+        checkout = simulate(client, simulator, "checkout", {"order_id": order["id"]})
+        client.utility.verify_payment_signature(checkout)
+
+        payment = client.payment.capture(
+            checkout["razorpay_payment_id"], 50_00, {"currency": "INR"}
+        )
+        assert payment["status"] == "captured"
+        assert payment["amount"] == 50_00
+        with pytest.raises(BadRequestError):
+            client.payment.capture(payment["id"], 50_00, {"currency": "INR"})
+
+        event = simulate(
+            client,
+            simulator,
+            "events",
+            {"event": "order.paid", "order_id": order["id"]},
+        )
+        assert event["payload"]["order"]["entity"]["status"] == "paid"
+        assert event["payload"]["payment"]["entity"]["id"] == payment["id"]
+
+    def test_subscription(self, client, simulator):
+        plan = client.plan.create(
+            {
+                "period": "monthly",
+                "interval": 1,
+                "item": {"name": "Tier", "amount": 100_00, "currency": "INR"},
+            }
+        )
+        subscription = client.subscription.create(
+            {"plan_id": plan["id"], "total_count": 12}
+        )
+        checkout = simulate(
+            client, simulator, "checkout", {"subscription_id": subscription["id"]}
+        )
+        # signature of subscriptions is verified with swapped ids
+        client.utility.verify_payment_signature(
+            {
+                "razorpay_order_id": checkout["razorpay_payment_id"],
+                "razorpay_payment_id": checkout["razorpay_subscription_id"],
+                "razorpay_signature": checkout["razorpay_signature"],
+            }
+        )
+        payment = client.payment.fetch(checkout["razorpay_payment_id"])
+        assert payment["amount"] == 100_00
+
+        first_charge = simulate(
+            client,
+            simulator,
+            "events",
+            {"event": "subscription.charged", "subscription_id": subscription["id"]},
+        )
+        second_charge = simulate(
+            client,
+            simulator,
+            "events",
+            {"event": "subscription.charged", "subscription_id": subscription["id"]},
+        )
+        first_entity = first_charge["payload"]["subscription"]["entity"]
+        second_entity = second_charge["payload"]["subscription"]["entity"]
+        assert second_entity["current_start"] == first_entity["current_end"]
+        assert second_entity["paid_count"] == 2
+        assert second_charge["payload"]["payment"]["entity"]["amount"] == 100_00
+
+        client.subscription.cancel(subscription["id"], {"cancel_at_cycle_end": 1})
+        assert simulator.subscriptions[subscription["id"]]["status"] == "cancelled"
+
+    def test_settlement(self, client, simulator):
+        order = client.order.create({"amount": 100_00, "currency": "INR"})
+        checkout = simulate(client, simulator, "checkout", {"order_id": order["id"]})
+        client.payment.capture(
+            checkout["razorpay_payment_id"], 100_00, {"currency": "INR"}
+        )
+        transfers = client.payment.transfer(
+            checkout["razorpay_payment_id"],
+            {"transfers": [{"account": "acc_123", "amount": 95_10, "currency": "INR"}]},
+        )
+
+        assert (
+            client.payment.transfers(checkout["razorpay_payment_id"])["items"]
+            == transfers["items"]
+        )
+
+        event = simulate(client, simulator, "events", {"event": "settlement.processed"})
+        settlement = event["payload"]["settlement"]["entity"]
+        assert settlement["amount"] == 95_10
+        assert client.transfer.all({"recipient_settlement_id": settlement["id"]})[
+            "items"
+        ] == [{**transfers["items"][0], "recipient_settlement_id": settlement["id"]}]
+
+    def test_unknown_object(self, client):
+        with pytest.raises(BadRequestError):
+            client.payment.fetch("pay_unknown")
+
+
+def test_sign_webhook():
+    body = '{"event": "order.paid"}'
+    razorpay.Client().utility.verify_webhook_signature(
+        body, sign_webhook(body), settings.RAZORPAY_WEBHOOK_SECRET
+    )
@@ -0,0 +1,91 @@
+from decimal import Decimal
+
+import pytest
+import requests
+import time_machine
+from django.utils import timezone
+from djmoney.money import Money
+from moneyed import INR
+
+from fanmo.payments.models import Payment, Payout
+from fanmo.payments.tasks import create_payout_transfer, retry_payout_transfers
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def payout(creator_user, user):
+    payment = Payment.objects.create(
+        type=Payment.Type.DONATION,
+        status=Payment.Status.CAPTURED,
+        amount=Money(Decimal("100"), INR),
+        method=Payment.Method.UPI,
+        external_id="pay_123",
+        creator_user=creator_user,
+        fan_user=user,
+    )
+    return Payout.objects.create(
+        payment=payment,
+        amount=Money(Decimal("95.10"), INR),
+        bank_account=creator_user.bank_accounts.get(),
+    )
+
+
+class TestRetryPayoutTransfers:
+    def test_failed_transfer_is_retried(self, payout, mocker):
+        transfer_mock = mocker.patch(
+            "fanmo.payments.models.razorpay_client.payment.transfer",
+            side_effect=[requests.ConnectionError(), {"items": [{"id": "trf_123"}]}],
+        )
+        transfers_mock = mocker.patch(
+            "fanmo.payments.models.razorpay_client.payment.transfers",
+            return_value={"items": []},
+        )
+
+        with pytest.raises(requests.ConnectionError):
+            create_payout_transfer(payout.id)
+
+        # too recent, the first attempt may still be running.
+        retry_payout_transfers()
+        assert transfer_mock.call_count == 1
+
+        with time_machine.travel(timezone.now() + timezone.timedelta(minutes=15)):
+            retry_payout_transfers()
+
+        payout.refresh_from_db()
+        assert payout.external_id == "trf_123"
+        transfers_mock.assert_called_once_with("pay_123")
+        assert transfer_mock.call_count == 2
+
+        # transferred payouts are not retried.
+        with time_machine.travel(timezone.now() + timezone.timedelta(minutes=15)):
+            retry_payout_transfers()
+        assert transfer_mock.call_count == 2
+
+    def test_timed_out_transfer_is_not_repeated(self, payout, mocker):
+        transfer_mock = mocker.patch(
+            "fanmo.payments.models.razorpay_client.payment.transfer"
+        )
+        mocker.patch(
+            "fanmo.payments.models.razorpay_client.payment.transfers",
+            return_value={"items": [{"id": "trf_123"}]},
+        )
+
+        with time_machine.travel(timezone.now() + timezone.timedelta(minutes=15)):
+            retry_payout_transfers()
+
+        payout.refresh_from_db()
+        assert payout.external_id == "trf_123"
+        transfer_mock.assert_not_called()
+
+    def test_failures_do_not_stop_other_payouts(self, payout, mocker):
+        mocker.patch(
+            "fanmo.payments.models.razorpay_client.payment.transfers",
+            side_effect=requests.ReadTimeout(),
+        )
+
+        with time_machine.travel(timezone.now() + timezone.timedelta(minutes=15)):
+            retry_payout_transfers()
+
+        payout.refresh_from_db()
+        assert payout.external_id == ""
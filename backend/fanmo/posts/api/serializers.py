@@ -10,6 +10,8 @@ from rest_framework import serializers
 from fanmo.donations.models import Donation
 from fanmo.memberships.api.serializers import TierPreviewSerializer
 from fanmo.memberships.models import Tier
+from fanmo.posts.comments import get_comment_target, invalidate_comment_tree
+from fanmo.posts.links import get_link_metadata
 from fanmo.posts.models import (
     Comment,
     Content,
@@ -20,6 +22,7 @@ from fanmo.posts.models import (
     Reaction,
     Section,
 )
+from fanmo.posts.reactions import add_reaction, get_reaction_summary, remove_reaction
 from fanmo.users.api.serializers import PublicUserSerializer, UserPreviewSerializer
 from fanmo.utils.fields import FileField, VersatileImageFieldSerializer
 
@@ -209,18 +212,7 @@ class PostStatsSerializer(serializers.ModelSerializer):
 
     @extend_schema_field(PostReactionSummarySerializer(many=True))
     def get_reactions(self, post):
-        reaction_summary = {}
-        for reaction in post.reactions.all():
-            reaction_summary.setdefault(
-                reaction.emoji,
-                {"count": 0, "is_reacted": False, "emoji": reaction.emoji},
-            )
-            reaction_summary[reaction.emoji]["count"] += 1
-
-            if reaction.author_user_id == self.context["request"].user.pk:
-                reaction_summary[reaction.emoji]["is_reacted"] = True
-
-        return reaction_summary.values()
+        return get_reaction_summary(post, self.context)
 
     @extend_schema_field(serializers.IntegerField())
     def get_comment_count(self, post):
@@ -407,10 +399,16 @@ class PostUpdateSerializer(PostDetailSerializer):
         if content:
             if "text" in content:
                 post.content.text = content["text"]
-            if "link" in content and post.content.type == Content.Type.LINK:
+            link_changed = (
+                "link" in content
+                and post.content.type == Content.Type.LINK
+                and post.content.link != content["link"]
+            )
+            if link_changed:
                 post.content.link = content["link"]
-                post.content.update_link_metadata()
             post.content.save()
+            if link_changed:
+                post.content.update_link_metadata()
 
         if meta_payload:
             if post.meta:
@@ -440,13 +438,9 @@ class PostReactionSerializer(serializers.ModelSerializer):
     def update(self, instance, validated_data):
         user = self.context["request"].user
         if validated_data["action"] == "add":
-            Reaction.objects.update_or_create(
-                post=instance, author_user=user, emoji=validated_data["emoji"]
-            )
+            add_reaction(instance, user, validated_data["emoji"])
         else:
-            Reaction.objects.filter(
-                post=instance, author_user=user, emoji=validated_data["emoji"]
-            ).delete()
+            remove_reaction(instance, user, validated_data["emoji"])
         return instance
 
 
@@ -482,13 +476,10 @@ class CommentReactionSerializer(serializers.ModelSerializer):
     def update(self, instance, validated_data):
         user = self.context["request"].user
         if validated_data["action"] == "add":
-            Reaction.objects.update_or_create(
-                comment=instance, author_user=user, emoji=validated_data["emoji"]
-            )
+            add_reaction(instance, user, validated_data["emoji"])
         else:
-            Reaction.objects.filter(
-                comment=instance, author_user=user, emoji=validated_data["emoji"]
-            ).delete()
+            remove_reaction(instance, user, validated_data["emoji"])
+        invalidate_comment_tree(*get_comment_target(instance))
         return instance
 
 
@@ -565,18 +556,7 @@ class CommentSerializer(serializers.ModelSerializer):
 
     @extend_schema_field(CommentReactionSerializer(many=True))
     def get_reactions(self, comment):
-        reaction_summary = {}
-        for reaction in comment.reactions.all():
-            reaction_summary.setdefault(
-                reaction.emoji,
-                {"count": 0, "is_reacted": False, "emoji": reaction.emoji},
-            )
-            reaction_summary[reaction.emoji]["count"] += 1
-
-            if reaction.author_user_id == self.context["request"].user.pk:
-                reaction_summary[reaction.emoji]["is_reacted"] = True
-
-        return reaction_summary.values()
+        return get_reaction_summary(comment, self.context)
 
     def validate(self, attrs):
         if not attrs.get("post") and not attrs.get("donation"):
@@ -637,10 +617,7 @@ class LinkPreviewSerializer(serializers.Serializer):
     link_og = serializers.JSONField(write_only=True, required=False)
 
     def validate(self, attrs):
-        content = Content(type=Content.Type.LINK, link=attrs["link"])
-        content.update_link_metadata(commit=False)
-        attrs["link_og"] = content.link_og
-        attrs["link_embed"] = content.link_embed
+        attrs.update(get_link_metadata(attrs["link"]))
         return attrs
 
 
@@ -9,6 +9,7 @@ from rest_framework import mixins, permissions, viewsets
 from rest_framework.decorators import action
 from rest_framework.filters import OrderingFilter, SearchFilter
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 
 from fanmo.core.notifications import notify_comment, notify_new_post
 from fanmo.core.tasks import async_task
@@ -27,13 +28,21 @@ from fanmo.posts.api.serializers import (
     PostUpdateSerializer,
     SectionSerializer,
 )
+from fanmo.posts.comments import (
+    get_comment_tree,
+    personalize_comment_tree,
+    update_comment_count,
+)
 from fanmo.posts.models import Comment, Post, Section, annotate_post_permissions
+from fanmo.posts.reactions import annotate_reactions
 from fanmo.posts.tasks import refresh_post_social_image
 from fanmo.users.api.permissions import IsCreator, IsCreatorOrReadOnly
+from fanmo.utils.pagination import IdCursorPagination, KeysetPaginationMixin
 from fanmo.utils.throttling import Throttle
 
 
 class PostViewSet(
+    KeysetPaginationMixin,
     mixins.CreateModelMixin,
     mixins.UpdateModelMixin,
     mixins.DestroyModelMixin,
@@ -55,17 +64,13 @@ class PostViewSet(
 
         queryset = (
             queryset.select_related("content", "author_user")
-            .prefetch_related(
-                "reactions", "allowed_tiers", "content__files", "author_user__tiers"
-            )
-            .annotate(
-                comment_count=Count("comments", filter=Q(comments__is_published=True))
-            )
+            .prefetch_related("allowed_tiers", "content__files", "author_user__tiers")
         )
         return queryset.order_by("-created_at")
 
     def paginate_queryset(self, queryset):
         object_list = super().paginate_queryset(queryset)
+        annotate_reactions(object_list, self.request.user)
         return annotate_post_permissions(object_list, self.request.user)
 
     def get_object(self):
@@ -137,27 +142,11 @@ class CommentViewSet(
     throttle_classes = [Throttle("comment_hour", "create")]
 
     def get_queryset(self):
-        queryset = (
-            Comment.objects.filter(is_published=True)
-            .select_related("author_user")
-            .prefetch_related("reactions")
+        queryset = Comment.objects.filter(is_published=True).select_related(
+            "author_user"
         )
-        if self.action == "list":
-            if "post_id" in self.request.query_params:
-                post = self.get_post()
-                if post.can_access:
-                    return queryset.filter(post=post).get_cached_trees()
-                else:
-                    return queryset.none()
-            elif "donation_id" in self.request.query_params:
-                return queryset.filter(donation=self.get_donation()).get_cached_trees()
-            else:
-                raise ValidationError(
-                    "Either post_id or donation_id are required.", "required"
-                )
-
         # let comment and post authors delete the comment
-        elif self.action == "destroy":
+        if self.action == "destroy":
             return queryset.filter(
                 Q(author_user=self.request.user)
                 | Q(post__author_user=self.request.user)
@@ -171,6 +160,31 @@ class CommentViewSet(
             return CommentReactionSerializer
         return super().get_serializer_class()
 
+    @property
+    def pagination_class(self):
+        if "cursor" in self.request.query_params:
+            return IdCursorPagination
+        return api_settings.DEFAULT_PAGINATION_CLASS
+
+    def list(self, request, *args, **kwargs):
+        if "post_id" in self.request.query_params:
+            post = self.get_post()
+            target = "post", post.id
+            if not post.can_access:
+                return self.get_paginated_response(self.paginate_queryset([]))
+        elif "donation_id" in self.request.query_params:
+            target = "donation", self.get_donation().id
+        else:
+            raise ValidationError(
+                "Either post_id or donation_id are required.", "required"
+            )
+
+        # threads are served from the cached comment tree of the post or donation
+        tree = get_comment_tree(*target, context=self.get_serializer_context())
+        threads = self.paginate_queryset(tree["threads"])
+        personalize_comment_tree(threads, tree["author_ids"], request.user, *target)
+        return self.get_paginated_response(threads)
+
     def perform_create(self, serializer):
         super().perform_create(serializer)
         async_task(notify_comment, serializer.instance.pk)
@@ -199,7 +213,12 @@ class CommentViewSet(
             raise ValidationError("Invalid donation_id.")
 
     def perform_destroy(self, instance):
-        instance.get_descendants(include_self=True).update(is_published=False)
+        deleted = (
+            instance.get_descendants(include_self=True)
+            .filter(is_published=True)
+            .update(is_published=False)
+        )
+        update_comment_count(instance, -deleted)
 
     @extend_schema(responses=CommentSerializer)
     @action(
@@ -212,7 +231,10 @@ class CommentViewSet(
         serializer.save()
 
         comment_trees = get_cached_trees(
-            comment.get_descendants(include_self=True).filter(is_published=True)
+            annotate_reactions(
+                comment.get_descendants(include_self=True).filter(is_published=True),
+                request.user,
+            )
         )
         response_serializer = CommentSerializer(
             comment_trees[0], context=self.get_serializer_context()
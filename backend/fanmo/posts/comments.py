@@ -0,0 +1,119 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from mptt.utils import get_cached_trees
+
+COMMENT_TREE_CACHE_KEY = "comment_tree:%s:%s:%s"
+COMMENT_TREE_VERSION_KEY = "comment_tree_version:%s:%s"
+# invalidation takes care of comment changes, timeout refreshes commenter details.
+# avatar and cover urls of commenters are signed for an hour and reused by the
+# media storage for 45 minutes, a cached tree must expire before they do.
+COMMENT_TREE_CACHE_TIMEOUT = 10 * 60
+
+
+def get_comment_target(comment):
+    """
+    Post or donation a comment belongs to, as a ("post"|"donation", id) pair.
+    """
+    if comment.post_id:
+        return "post", comment.post_id
+    return "donation", comment.donation_id
+
+
+def get_comment_tree_version(target, target_id):
+    return cache.get(COMMENT_TREE_VERSION_KEY % (target, target_id), 0)
+
+
+def invalidate_comment_tree(target, target_id):
+    """
+    Bump the version of a cached comment tree, again after commit so that
+    a request running in parallel does not cache uncommitted state.
+    """
+    version_key = COMMENT_TREE_VERSION_KEY % (target, target_id)
+
+    def bump_version():
+        cache.add(version_key, 0, None)
+        cache.incr(version_key)
+
+    bump_version()
+    transaction.on_commit(bump_version)
+
+
+def update_comment_count(comment, delta):
+    """
+    Update the comment count of the post or donation of a comment.
+    """
+    from fanmo.donations.models import Donation
+    from fanmo.posts.models import Post
+
+    target, target_id = get_comment_target(comment)
+    model = Post if target == "post" else Donation
+    model.objects.filter(pk=target_id).update(comment_count=F("comment_count") + delta)
+    invalidate_comment_tree(target, target_id)
+
+
+def get_comment_tree(target, target_id, context):
+    """
+    Serialized comment threads of a post or donation, oldest first.
+
+    The payload is shared by all users, user specific fields are filled by
+    `personalize_comment_tree`.
+    """
+    from fanmo.posts.api.serializers import CommentSerializer
+    from fanmo.posts.models import Comment
+    from fanmo.posts.reactions import annotate_reactions
+
+    version = get_comment_tree_version(target, target_id)
+    cache_key = COMMENT_TREE_CACHE_KEY % (target, target_id, version)
+    tree = cache.get(cache_key)
+    if tree is None:
+        comments = annotate_reactions(
+            Comment.objects.filter(
+                is_published=True, **{target: target_id}
+            ).select_related("author_user"),
+            context["request"].user,
+            shared=True,
+        )
+        tree = {
+            "threads": CommentSerializer(
+                get_cached_trees(comments),
+                many=True,
+                context={**context, "shared": True},
+            ).data,
+            "author_ids": {
+                comment.author_user.username: comment.author_user_id
+                for comment in comments
+            },
+        }
+        cache.set(cache_key, tree, COMMENT_TREE_CACHE_TIMEOUT)
+    return tree
+
+
+def personalize_comment_tree(threads, author_ids, user, target, target_id):
+    """
+    Fill reactions and author details specific to a user in shared comment threads.
+    """
+    from fanmo.posts.models import Reaction
+
+    if not user.is_authenticated:
+        return threads
+
+    reactions = set(
+        Reaction.objects.filter(
+            author_user=user, **{f"comment__{target}_id": target_id}
+        ).values_list("comment_id", "emoji")
+    )
+
+    def personalize(comments):
+        for comment in comments:
+            for reaction in comment["reactions"]:
+                reaction["is_reacted"] = (comment["id"], reaction["emoji"]) in reactions
+
+            author_user = comment["author_user"]
+            author_id = author_ids[author_user["username"]]
+            author_user["is_following"] = user.entitlements.is_following(author_id)
+            author_user["is_member"] = user.get_membership(author_id) is not None
+            personalize(comment["children"])
+
+    personalize(threads)
+    return threads
@@ -0,0 +1,154 @@
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import metadata_parser
+import structlog
+from django.core.cache import cache
+from django.template.defaultfilters import truncatewords
+from micawber.exceptions import ProviderException
+from micawber.providers import bootstrap_oembed
+
+from fanmo.core.tasks import debounced_async_task
+
+logger = structlog.get_logger(__name__)
+
+LINK_METADATA_CACHE_KEY = "link_metadata:%s"
+# metadata older than this is served as is while it is refreshed in the background.
+LINK_METADATA_MAX_AGE = 60 * 60 * 24
+LINK_METADATA_CACHE_TIMEOUT = 60 * 60 * 24 * 30
+LINK_METADATA_REFRESH_WINDOW = 5
+LINK_METADATA_FETCH_TIMEOUT = 10
+LINK_METADATA_BULK_WORKERS = 20
+
+TRACKING_PARAMS = {"fbclid", "gclid", "igshid", "ref_src"}
+
+
+def normalize_url(url):
+    """
+    Normalize a link so that different spellings of it share the cached metadata.
+    Only used for cache keys, links are fetched as they were posted.
+
+    Scheme and host are lowercased, default ports, fragments and tracking
+    parameters are dropped and query parameters are sorted.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    default_port = {"http": ":80", "https": ":443"}.get(scheme)
+    if default_port and netloc.endswith(default_port):
+        netloc = netloc[: -len(default_port)]
+    query = urlencode(
+        sorted(
+            (key, value)
+            for key, value in parse_qsl(parts.query, keep_blank_values=True)
+            if not key.startswith("utm_") and key not in TRACKING_PARAMS
+        )
+    )
+    return urlunsplit((scheme, netloc, parts.path, query, ""))
+
+
+def get_cache_key(url):
+    return (
+        LINK_METADATA_CACHE_KEY % hashlib.sha1(normalize_url(url).encode()).hexdigest()
+    )
+
+
+@lru_cache(maxsize=None)
+def get_oembed_providers():
+    """
+    oEmbed provider registry, built once per process.
+    """
+    return bootstrap_oembed(cache)
+
+
+def fetch_link_metadata(url):
+    """
+    Fetch oEmbed and OpenGraph metadata of a link from third-party sites.
+    """
+    metadata = {"link_og": {"og": None, "page": None, "meta": None}, "link_embed": None}
+
+    try:
+        metadata["link_embed"] = get_oembed_providers().request(url)
+    except ProviderException:
+        logger.exception("link_preview_embed_failed", link=url)
+
+    try:
+        parsed = metadata_parser.MetadataParser(
+            url=url,
+            support_malformed=True,
+            search_head_only=False,
+            requests_timeout=LINK_METADATA_FETCH_TIMEOUT,
+        ).metadata
+        for key in ["og", "page", "meta"]:
+            if parsed.get(key):
+                metadata["link_og"][key] = truncate_metadata(parsed[key])
+    except metadata_parser.NotParsable:
+        logger.exception("link_preview_meta_failed", link=url)
+
+    return metadata
+
+
+def truncate_metadata(metadata):
+    new_metadata = {}
+    for key, value in metadata.items():
+        meta_key = key.lower()
+        meta_value = (
+            truncatewords(value, 30)
+            if meta_key.endswith("description") or meta_key.endswith("keywords")
+            else value
+        )
+        new_metadata[meta_key] = meta_value
+    return new_metadata
+
+
+def refresh_link_metadata(url):
+    """
+    Fetch metadata of a link and store it in the shared cache.
+    """
+    metadata = fetch_link_metadata(url)
+    cache.set(
+        get_cache_key(url),
+        {"metadata": metadata, "fetched_at": time.time()},
+        LINK_METADATA_CACHE_TIMEOUT,
+    )
+    return metadata
+
+
+def get_link_metadata(url, fetch=True):
+    """
+    Get metadata of a link from the shared cache.
+
+    Stale metadata is returned right away and refreshed in the background.
+    Missing metadata is fetched when `fetch` is set, otherwise None is returned.
+    """
+    cached = cache.get(get_cache_key(url))
+    if cached:
+        if time.time() - cached["fetched_at"] > LINK_METADATA_MAX_AGE:
+            debounced_async_task(
+                refresh_link_metadata,
+                url,
+                key=get_cache_key(url),
+                window=LINK_METADATA_REFRESH_WINDOW,
+            )
+        return cached["metadata"]
+
+    if not fetch:
+        return None
+    return refresh_link_metadata(url)
+
+
+def refresh_link_metadata_in_bulk(urls, workers=LINK_METADATA_BULK_WORKERS):
+    """
+    Fetch metadata of many links concurrently, returns metadata by link.
+
+    Links sharing cached metadata are fetched only once.
+    """
+    links = {}
+    for url in urls:
+        links.setdefault(get_cache_key(url), url)
+    with ThreadPoolExecutor(workers) as executor:
+        fetched = dict(zip(links, executor.map(refresh_link_metadata, links.values())))
+    return {url: fetched[get_cache_key(url)] for url in urls}
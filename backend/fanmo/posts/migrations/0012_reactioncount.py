@@ -0,0 +1,54 @@
+# Generated by Django 3.2.14 on 2026-10-18 14:32
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_reaction_counts(apps, schema_editor):
+    Reaction = apps.get_model("posts", "Reaction")
+    ReactionCount = apps.get_model("posts", "ReactionCount")
+    for target in ["post", "comment", "donation"]:
+        ReactionCount.objects.bulk_create(
+            [
+                ReactionCount(
+                    target=target,
+                    target_id=row[f"{target}_id"],
+                    emoji=row["emoji"],
+                    count=row["count"],
+                )
+                for row in Reaction.objects.filter(**{f"{target}__isnull": False})
+                .order_by()
+                .values(f"{target}_id", "emoji")
+                .annotate(count=Count("id"))
+            ],
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_post_comment_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReactionCount',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('target', models.CharField(choices=[('post', 'Post'), ('comment', 'Comment'), ('donation', 'Donation')], max_length=16)),
+                ('target_id', models.PositiveBigIntegerField()),
+                ('emoji', models.CharField(choices=[('heart', 'Heart')], max_length=16)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'reaction_counts',
+                'ordering': ('-created_at',),
+                'default_related_name': 'reaction_counts',
+                'unique_together': {('target', 'target_id', 'emoji')},
+            },
+        ),
+        migrations.RunPython(populate_reaction_counts, migrations.RunPython.noop),
+    ]
@@ -1,62 +1,91 @@
 import uuid
 
-import metadata_parser
 import structlog
-from django.core.cache import cache
-from django.db import models
-from django.template.defaultfilters import truncatewords
+from django.db import models, transaction
 from django.urls import reverse
 from django.utils.functional import cached_property
 from django_extensions.db.fields import AutoSlugField
 from djmoney.models.fields import MoneyField
-from micawber.exceptions import ProviderException
-from micawber.providers import bootstrap_oembed
 from mptt.models import MPTTModel, TreeForeignKey
 from versatileimagefield.fields import VersatileImageField
 
+from fanmo.posts.comments import update_comment_count
+from fanmo.posts.links import get_link_metadata
+from fanmo.posts.reactions import update_reaction_count
 from fanmo.utils.helpers import slugify
 from fanmo.utils.models import BaseModel
 
 logger = structlog.get_logger(__name__)
 
 
-def annotate_post_permissions(object_list, fan_user):
+class PostPermissionResolver:
     """
-    Annotate `can_access` and `can_comment` attributes to post objects based on the fan user.
+    Resolve post permissions of a fan user for a batch of posts.
+
+    Posts are resolved using dictionary and set lookups over the entitlements snapshot
+    of the fan user instead of scanning memberships and donations per post.
     """
 
-    posts = []
-    for post in object_list:
-        membership = (
-            fan_user.get_membership(post.author_user_id)
-            if fan_user.is_authenticated
-            else None
-        )
-        donation = (
-            fan_user.get_donation(post.author_user_id, post.id)
-            if fan_user.is_authenticated
-            else None
+    def __init__(self, fan_user):
+        self.fan_user = fan_user
+        # creator_user_id -> tier_id of the active membership
+        self.membership_tiers = {}
+        # (creator_user_id, post_id) of the purchased posts
+        self.purchased_posts = set()
+        # creator_user_id -> cheapest public and active tier
+        self.minimum_tiers = {}
+
+        if fan_user.is_authenticated:
+            entitlements = fan_user.entitlements
+            self.membership_tiers = entitlements.memberships
+            self.purchased_posts = entitlements.purchased_posts
+
+    def get_minimum_tier(self, creator_user):
+        if creator_user.pk not in self.minimum_tiers:
+            self.minimum_tiers[creator_user.pk] = self.get_cheapest_tier(
+                creator_user.tiers.all()
+            )
+        return self.minimum_tiers[creator_user.pk]
+
+    @staticmethod
+    def get_cheapest_tier(tiers, exclude_tier_id=None):
+        return min(
+            (
+                tier
+                for tier in tiers
+                if tier.is_public and tier.is_active and tier.id != exclude_tier_id
+            ),
+            key=lambda t: t.amount.amount,
+            default=None,
         )
+
+    def resolve(self, post):
+        """
+        Annotate `can_access`, `can_comment` and `minimum_tier` attributes to the post.
+        """
+        is_member = post.author_user_id in self.membership_tiers
+        tier_id = self.membership_tiers.get(post.author_user_id)
+
         # post authors can access and comment
-        if post.author_user_id == fan_user.pk:
+        if post.author_user_id == self.fan_user.pk:
             can_access = True
             can_comment = True
         # purchased post can seen and commented by fan
-        elif donation is not None:
+        elif (post.author_user_id, post.id) in self.purchased_posts:
             can_access = True
             can_comment = True
         # public posts can be seen by anyone, but commented by members
         elif post.visibility == Post.Visiblity.PUBLIC:
             can_access = True
-            can_comment = membership is not None
+            can_comment = is_member
         # member posts can be seen by members, and commented by members
         elif post.visibility == Post.Visiblity.ALL_MEMBERS:
-            can_access = membership is not None
+            can_access = is_member
             can_comment = can_access
         # select member posts can be seen select members, and commented by select members
         elif post.visibility == Post.Visiblity.ALLOWED_TIERS:
-            can_access = membership is not None and any(
-                (tier.id == membership.tier_id for tier in post.allowed_tiers.all())
+            can_access = is_member and any(
+                tier.id == tier_id for tier in post.allowed_tiers.all()
             )
             can_comment = can_access
         else:
@@ -68,34 +97,27 @@ def annotate_post_permissions(object_list, fan_user):
             Post.Visiblity.PUBLIC,
             Post.Visiblity.ALL_MEMBERS,
         ]:
-            tiers = sorted(
-                filter(
-                    lambda t: t.is_public and t.is_active, post.author_user.tiers.all()
-                ),
-                key=lambda t: t.amount.amount,
-            )
-            minimum_tier = next(iter(tiers), None)
+            minimum_tier = self.get_minimum_tier(post.author_user)
         elif not can_comment and post.visibility == Post.Visiblity.ALLOWED_TIERS:
-            current_tier_id = membership.tier_id if membership else None
-            tiers = sorted(
-                filter(
-                    # tiers which are public, not already subscribed, and only selected
-                    lambda t: t.is_public and t.is_active and t.id != current_tier_id,
-                    post.allowed_tiers.all(),
-                ),
-                key=lambda t: t.amount.amount,
+            # tiers which are public, not already subscribed, and only selected
+            minimum_tier = self.get_cheapest_tier(
+                post.allowed_tiers.all(), exclude_tier_id=tier_id
             )
-            minimum_tier = next(iter(tiers), None)
         else:
             minimum_tier = None
 
         post.can_access = can_access
         post.can_comment = can_comment
         post.minimum_tier = minimum_tier
+        return post
 
-        posts.append(post)
 
-    return posts
+def annotate_post_permissions(object_list, fan_user):
+    """
+    Annotate `can_access` and `can_comment` attributes to post objects based on the fan user.
+    """
+    resolver = PostPermissionResolver(fan_user)
+    return [resolver.resolve(post) for post in object_list]
 
 
 class Post(BaseModel):
@@ -131,6 +153,10 @@ class Post(BaseModel):
     minimum_amount = MoneyField(max_digits=7, decimal_places=2, default=0)
 
     social_image = models.ImageField(upload_to="posts/social/", blank=True)
+    comment_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [models.Index(fields=["created_at", "id"])]
 
     def annotate_permissions(self, fan_user):
         annotate_post_permissions([self], fan_user)
@@ -188,48 +214,27 @@ class Content(BaseModel):
     link_embed = models.JSONField(blank=True, null=True, default=None)
 
     def update_link_metadata(self, commit=True):
+        """
+        Set link metadata from the shared link metadata cache.
+
+        Links missing in the cache are fetched in the background,
+        which updates the saved content afterwards.
+        """
+        from fanmo.core.tasks import async_task
+        from fanmo.posts.tasks import refresh_content_link_metadata
+
         if self.type != self.Type.LINK:
             return
 
-        try:
-            oembed_providers = bootstrap_oembed(cache)
-            self.link_embed = oembed_providers.request(self.link)
-        except ProviderException:
-            logger.exception("link_preview_embed_failed", link=self.link)
-
-        try:
-            self.link_og = {"og": None, "page": None, "meta": None}
-            metadata = metadata_parser.MetadataParser(
-                url=self.link,
-                support_malformed=True,
-                search_head_only=False,
-                requests_timeout=10,
-            ).metadata
-            if metadata.get("og"):
-                self.link_og["og"] = self._truncate_metadata(metadata["og"])
-            if metadata.get("page"):
-                self.link_og["page"] = self._truncate_metadata(metadata["page"])
-            if metadata.get("meta"):
-                self.link_og["meta"] = self._truncate_metadata(metadata["meta"])
-
-        except metadata_parser.NotParsable:
-            logger.exception("link_preview_meta_failed", link=self.link)
+        metadata = get_link_metadata(self.link, fetch=False)
+        if metadata:
+            self.link_og = metadata["link_og"]
+            self.link_embed = metadata["link_embed"]
 
         if commit:
             self.save()
-
-    @staticmethod
-    def _truncate_metadata(metadata):
-        new_metadata = {}
-        for key, value in metadata.items():
-            meta_key = key.lower()
-            meta_value = (
-                truncatewords(value, 30)
-                if meta_key.endswith("description") or meta_key.endswith("keywords")
-                else value
-            )
-            new_metadata[meta_key] = meta_value
-        return new_metadata
+            if not metadata:
+                async_task(refresh_content_link_metadata, self.id)
 
 
 class ContentFile(BaseModel):
@@ -280,6 +285,12 @@ class Comment(BaseModel, MPTTModel, metaclass=CommentModelMeta):
     class MPTTMeta:
         order_insertion_by = ["created_at"]
 
+    def save(self, *args, **kwargs):
+        created = self._state.adding
+        super().save(*args, **kwargs)
+        if created and self.is_published:
+            update_comment_count(self, 1)
+
     @cached_property
     def creator_user(self):
         if self.post:
@@ -303,3 +314,37 @@ class Reaction(BaseModel):
         "donations.Donation", on_delete=models.CASCADE, null=True, blank=True
     )
     author_user = models.ForeignKey("users.User", on_delete=models.CASCADE)
+
+    @property
+    def target(self):
+        if self.post_id:
+            return ReactionCount.Target.POST, self.post_id
+        elif self.comment_id:
+            return ReactionCount.Target.COMMENT, self.comment_id
+        return ReactionCount.Target.DONATION, self.donation_id
+
+    def save(self, *args, **kwargs):
+        created = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if created:
+                update_reaction_count(*self.target, self.emoji, 1)
+
+
+class ReactionCount(BaseModel):
+    """
+    Number of reactions with an emoji on a post, comment or donation.
+    """
+
+    class Target(models.TextChoices):
+        POST = "post"
+        COMMENT = "comment"
+        DONATION = "donation"
+
+    target = models.CharField(max_length=16, choices=Target.choices)
+    target_id = models.PositiveBigIntegerField()
+    emoji = models.CharField(max_length=16, choices=Reaction.Emoji.choices)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ["target", "target_id", "emoji"]
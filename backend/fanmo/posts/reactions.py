@@ -0,0 +1,94 @@
+from django.db.models import F
+
+
+def get_reaction_target(obj):
+    """
+    Target of reactions on a post, comment or donation, as a (target, id) pair.
+    """
+    return obj._meta.model_name, obj.pk
+
+
+def update_reaction_count(target, target_id, emoji, delta):
+    from fanmo.posts.models import ReactionCount
+
+    ReactionCount.objects.get_or_create(target=target, target_id=target_id, emoji=emoji)
+    ReactionCount.objects.filter(
+        target=target, target_id=target_id, emoji=emoji
+    ).update(count=F("count") + delta)
+
+
+def add_reaction(obj, author_user, emoji):
+    from fanmo.posts.models import Reaction
+
+    target, _ = get_reaction_target(obj)
+    # the reaction counter is incremented when a reaction is created.
+    Reaction.objects.get_or_create(
+        author_user=author_user, emoji=emoji, **{target: obj}
+    )
+
+
+def remove_reaction(obj, author_user, emoji):
+    from fanmo.posts.models import Reaction
+
+    target, _ = get_reaction_target(obj)
+    # the reaction counter is decremented when a reaction is deleted.
+    Reaction.objects.filter(
+        author_user=author_user, emoji=emoji, **{target: obj}
+    ).delete()
+
+
+def annotate_reactions(objects, user, shared=False):
+    """
+    Set reaction summaries of posts, comments or donations of the same type.
+
+    Counts are read from reaction counters and is_reacted from reactions
+    of the user, with one query each regardless of the number of reactions.
+    Summaries of shared payloads are not specific to the user.
+    """
+    from fanmo.posts.models import Reaction, ReactionCount
+
+    objects = list(objects)
+    if not objects:
+        return objects
+
+    target, _ = get_reaction_target(objects[0])
+    target_ids = [obj.pk for obj in objects]
+
+    reacted = set()
+    if user.is_authenticated and not shared:
+        reacted = set(
+            Reaction.objects.filter(
+                author_user=user, **{f"{target}_id__in": target_ids}
+            ).values_list(f"{target}_id", "emoji")
+        )
+
+    summaries = {target_id: [] for target_id in target_ids}
+    for target_id, emoji, count in (
+        ReactionCount.objects.filter(
+            target=target, target_id__in=target_ids, count__gt=0
+        )
+        .order_by("created_at")
+        .values_list("target_id", "emoji", "count")
+    ):
+        summaries[target_id].append(
+            {
+                "count": count,
+                "is_reacted": (target_id, emoji) in reacted,
+                "emoji": emoji,
+            }
+        )
+
+    for obj in objects:
+        obj.reaction_summary = summaries[obj.pk]
+    return objects
+
+
+def get_reaction_summary(obj, context):
+    """
+    Reaction summary of an object for serializers, annotated on demand.
+    """
+    if not hasattr(obj, "reaction_summary"):
+        annotate_reactions(
+            [obj], context["request"].user, shared=context.get("shared", False)
+        )
+    return obj.reaction_summary
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from fanmo.posts.models import Reaction
+from fanmo.posts.reactions import update_reaction_count
+
+
+@receiver(post_delete, sender=Reaction)
+def decrement_reaction_count(sender, instance, *args, **__):
+    # also sent for reactions deleted by cascade, e.g. of a deleted user or comment.
+    update_reaction_count(*instance.target, instance.emoji, -1)
@@ -1,6 +1,16 @@
 from fanmo.core.tasks import async_task
-from fanmo.posts.models import Post
-from fanmo.utils.images import generate_post_summary
+from fanmo.posts.links import get_link_metadata, refresh_link_metadata_in_bulk
+from fanmo.posts.models import Content, Post
+from fanmo.utils.images import (
+    generate_post_summary,
+    get_post_summary_hash,
+    iter_id_ranges,
+    refresh_social_images,
+    render_post_summary,
+)
+
+# posts rendered by a task, small enough to finish within the task timeout.
+SOCIAL_IMAGE_CHUNK_SIZE = 20
 
 
 def refresh_post_social_image(post_id):
@@ -9,9 +19,71 @@ def refresh_post_social_image(post_id):
         .prefetch_related("content__files")
         .get(pk=post_id)
     )
-    post.social_image.save(f"post_{post_id}.jpg", generate_post_summary(post))
+    # the image file name contains the hash of its inputs, skip when nothing changed.
+    summary_hash = get_post_summary_hash(post)
+    if summary_hash in post.social_image.name:
+        return
+
+    previous_image = post.social_image.name
+    post.social_image.save(
+        f"post_{post_id}_{summary_hash}.jpg", generate_post_summary(post)
+    )
+    if previous_image:
+        post.social_image.storage.delete(previous_image)
+
 
+def refresh_all_post_social_images(chunk_size=SOCIAL_IMAGE_CHUNK_SIZE):
+    """
+    Refresh social images of all published posts, one task per chunk of posts.
+    """
+    posts = Post.objects.filter(is_published=True)
+    for first_id, last_id in iter_id_ranges(posts, chunk_size):
+        async_task(refresh_post_social_images, first_id, last_id)
 
-def refresh_all_post_social_images():
-    for post_id in Post.objects.filter(is_published=True).values_list("id", flat=True):
-        async_task(refresh_post_social_image, post_id)
+
+def refresh_post_social_images(first_id, last_id, pool=None):
+    """
+    Refresh social images of published posts with ids in the given range.
+
+    Posts are fetched with their authors and files in one go, rendered in the
+    process pool (if given) and uploaded concurrently. Returns the number of
+    refreshed images.
+    """
+    posts = (
+        Post.objects.filter(is_published=True, id__gte=first_id, id__lte=last_id)
+        .select_related("content", "author_user")
+        .prefetch_related("content__files")
+        .order_by("id")
+    )
+    return refresh_social_images(
+        posts, get_post_summary_hash, render_post_summary, "post", pool
+    )
+
+
+def refresh_content_link_metadata(content_id):
+    """
+    Fill link metadata of a content, unless its link was changed in the meantime.
+    """
+    content = Content.objects.filter(pk=content_id, type=Content.Type.LINK).first()
+    if not content or not content.link:
+        return
+
+    metadata = get_link_metadata(content.link)
+    Content.objects.filter(pk=content_id, link=content.link).update(**metadata)
+
+
+def refresh_all_link_metadata():
+    """
+    Fetch metadata of all linked pages concurrently and update their contents.
+    """
+    contents = list(
+        Content.objects.filter(type=Content.Type.LINK)
+        .exclude(link="")
+        .only("id", "link")
+    )
+    metadata = refresh_link_metadata_in_bulk({content.link for content in contents})
+    for content in contents:
+        link_metadata = metadata[content.link]
+        content.link_og = link_metadata["link_og"]
+        content.link_embed = link_metadata["link_embed"]
+    Content.objects.bulk_update(contents, ["link_og", "link_embed"], batch_size=500)
@@ -5,6 +5,7 @@ from djmoney.money import Money
 from micawber.exceptions import ProviderException
 from moneyed import INR
 
+from fanmo.donations.models import Donation
 from fanmo.memberships.tests.factories import MembershipFactory, TierFactory
 from fanmo.posts.models import Comment, Content, Post, Reaction
 from fanmo.users.tests.factories import UserFactory
@@ -43,6 +44,31 @@ class TestPostAPIForAnonymousUsers:
             "link_og": None,
         }
 
+    def test_list_cursor_pagination(self, creator_user, api_client):
+        posts = [
+            Post.objects.create(
+                title=f"Post {i}",
+                content=Content.objects.create(type=Content.Type.TEXT, text="Hello"),
+                author_user=creator_user,
+            )
+            for i in range(3)
+        ]
+
+        response = api_client.get("/api/posts/", {"cursor": "", "page_size": 2})
+        assert response.status_code == 200
+        data = response.json()
+        assert "count" not in data
+        assert [post["id"] for post in data["results"]] == [posts[2].id, posts[1].id]
+
+        data = api_client.get(data["next"]).json()
+        assert [post["id"] for post in data["results"]] == [posts[0].id]
+        assert data["next"] is None
+
+        response = api_client.get(
+            "/api/posts/", {"cursor": "", "ordering": "updated_at"}
+        )
+        assert response.status_code == 400
+
     def test_detail_text(self, creator_user, api_client):
         post = Post.objects.create(
             title="Hello Darkness",
@@ -306,6 +332,61 @@ class TestPostAPIForUser:
         assert data["can_comment"]
         assert data["minimum_tier"] is None
 
+    def test_list_permissions_across_creators(self, creator_user, user, api_client):
+        api_client.force_authenticate(user)
+
+        other_creator_user = UserFactory(is_creator=True)
+        other_tier = TierFactory(creator_user=other_creator_user)
+        MembershipFactory(
+            creator_user=creator_user,
+            fan_user=user,
+            tier=creator_user.tiers.first(),
+            is_active=True,
+        )
+
+        member_post = Post.objects.create(
+            title="Hello Darkness",
+            content=Content.objects.create(type=Content.Type.TEXT, text="Hello"),
+            visibility=Post.Visiblity.ALL_MEMBERS,
+            author_user=creator_user,
+        )
+        locked_post = Post.objects.create(
+            title="My old friend",
+            content=Content.objects.create(type=Content.Type.TEXT, text="Friend"),
+            visibility=Post.Visiblity.ALL_MEMBERS,
+            author_user=other_creator_user,
+        )
+        purchased_post = Post.objects.create(
+            title="I've come to talk with you again",
+            content=Content.objects.create(type=Content.Type.TEXT, text="Again"),
+            visibility=Post.Visiblity.ALLOWED_TIERS,
+            author_user=other_creator_user,
+        )
+        purchased_post.allowed_tiers.add(other_tier)
+        Donation.objects.create(
+            fan_user=user,
+            creator_user=other_creator_user,
+            post=purchased_post,
+            amount=Money(Decimal("100"), INR),
+            status=Donation.Status.SUCCESSFUL,
+        )
+
+        response = api_client.get("/api/posts/")
+        assert response.status_code == 200
+        results = {post["id"]: post for post in response.json()["results"]}
+
+        assert results[member_post.id]["can_access"]
+        assert results[member_post.id]["can_comment"]
+        assert results[member_post.id]["minimum_tier"] is None
+
+        assert not results[locked_post.id]["can_access"]
+        assert not results[locked_post.id]["can_comment"]
+        assert results[locked_post.id]["minimum_tier"]["id"] == other_tier.id
+
+        assert results[purchased_post.id]["can_access"]
+        assert results[purchased_post.id]["can_comment"]
+        assert results[purchased_post.id]["minimum_tier"] is None
+
     def test_detail_stats(self, creator_user, user, api_client):
         api_client.force_authenticate(user)
 
@@ -466,10 +547,10 @@ class TestPostCrudAPI:
     def test_create_link_embed(self, creator_user, api_client, mocker):
         request_embed_mock = mocker.Mock(return_value={"foo": "bar"})
         mocker.patch(
-            "fanmo.posts.models.bootstrap_oembed",
+            "fanmo.posts.links.get_oembed_providers",
         ).return_value.request = request_embed_mock
         mocker.patch(
-            "fanmo.posts.models.metadata_parser.MetadataParser",
+            "fanmo.posts.links.metadata_parser.MetadataParser",
             return_value=mocker.Mock(
                 metadata={
                     "og": {"hello": "world"},
@@ -495,18 +576,20 @@ class TestPostCrudAPI:
         assert response.status_code == 201
         data = response.json()
         assert data["content"]["link"] == "https://youtube.com"
-        assert data["content"]["link_embed"] == {"foo": "bar"}
+        # metadata is fetched in the background
+        content = Post.objects.get(id=data["id"]).content
+        assert content.link_embed == {"foo": "bar"}
         request_embed_mock.assert_called_with("https://youtube.com")
 
     def test_create_link_og(self, creator_user, api_client, mocker):
         # mock oembed to treat this URL as unsupported
         request_embed_mock = mocker.Mock(side_effect=ProviderException)
         mocker.patch(
-            "fanmo.posts.models.bootstrap_oembed",
+            "fanmo.posts.links.get_oembed_providers",
         ).return_value.request = request_embed_mock
 
         mocker.patch(
-            "fanmo.posts.models.metadata_parser.MetadataParser",
+            "fanmo.posts.links.metadata_parser.MetadataParser",
             return_value=mocker.Mock(
                 metadata={
                     "og": {"hello": "world"},
@@ -531,8 +614,9 @@ class TestPostCrudAPI:
         assert response.status_code == 201
         data = response.json()
         assert data["content"]["link"] == "https://google.com"
-        assert data["content"]["link_embed"] is None
-        assert data["content"]["link_og"] == {
+        content = Post.objects.get(id=data["id"]).content
+        assert content.link_embed is None
+        assert content.link_og == {
             "og": {"hello": "world"},
             "page": {"hey": "there"},
             "meta": {"foo": "bar"},
@@ -649,11 +733,11 @@ class TestPostCrudAPI:
     def test_link_preview(self, creator_user, mocker, api_client):
         request_embed_mock = mocker.Mock(return_value={"foo": "bar"})
         mocker.patch(
-            "fanmo.posts.models.bootstrap_oembed",
+            "fanmo.posts.links.get_oembed_providers",
         ).return_value.request = request_embed_mock
 
         mocker.patch(
-            "fanmo.posts.models.metadata_parser.MetadataParser",
+            "fanmo.posts.links.metadata_parser.MetadataParser",
             return_value=mocker.Mock(
                 metadata={
                     "og": {"hello": "world"},
@@ -1056,6 +1140,34 @@ class TestCommentAPI:
             == active_membership.fan_user.username
         )
 
+    def test_list_cursor_pagination(self, api_client, creator_user):
+        post = Post.objects.create(
+            title="Hello darkness my old friend",
+            visibility=Post.Visiblity.PUBLIC,
+            author_user=creator_user,
+            content=Content.objects.create(type=Content.Type.TEXT, text="Hello world!"),
+        )
+        comments = [
+            Comment.objects.create(post=post, author_user=creator_user, body=str(i))
+            for i in range(3)
+        ]
+
+        response = api_client.get(
+            "/api/comments/", {"post_id": post.id, "cursor": "", "page_size": 2}
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert [comment["id"] for comment in data["results"]] == [
+            comments[0].id,
+            comments[1].id,
+        ]
+        assert f"cursor={comments[1].id}" in data["next"]
+
+        response = api_client.get(data["next"])
+        data = response.json()
+        assert [comment["id"] for comment in data["results"]] == [comments[2].id]
+        assert data["next"] is None
+
     def test_delete_as_creator(self, api_client, active_membership):
         post = Post.objects.create(
             title="Hello darkness my old friend",
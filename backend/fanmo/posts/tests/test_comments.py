@@ -0,0 +1,82 @@
+import pytest
+from rest_framework.test import APIRequestFactory
+
+from fanmo.posts.comments import (
+    get_comment_tree,
+    invalidate_comment_tree,
+    personalize_comment_tree,
+    update_comment_count,
+)
+from fanmo.posts.models import Comment, Content, Post, Reaction
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def post(creator_user):
+    return Post.objects.create(
+        title="Hello Darkness",
+        content=Content.objects.create(type=Content.Type.TEXT, text="Hello"),
+        author_user=creator_user,
+    )
+
+
+def get_context(user):
+    request = APIRequestFactory().get("/api/comments/")
+    request.user = user
+    return {"request": request}
+
+
+class TestCommentTree:
+    def test_comment_count(self, post, user):
+        comment = Comment.objects.create(post=post, body="hello", author_user=user)
+        Comment.objects.create(post=post, body="hi", author_user=user, parent=comment)
+        Comment.objects.create(
+            post=post, body="hidden", author_user=user, is_published=False
+        )
+        post.refresh_from_db()
+        assert post.comment_count == 2
+
+        update_comment_count(comment, -2)
+        post.refresh_from_db()
+        assert post.comment_count == 0
+
+    def test_tree_is_cached_until_invalidated(
+        self, post, user, django_assert_num_queries
+    ):
+        comment = Comment.objects.create(post=post, body="hello", author_user=user)
+        Comment.objects.create(post=post, body="hi", author_user=user, parent=comment)
+
+        tree = get_comment_tree("post", post.id, get_context(user))
+        assert [thread["body"] for thread in tree["threads"]] == ["hello"]
+        assert tree["threads"][0]["children"][0]["body"] == "hi"
+
+        with django_assert_num_queries(0):
+            assert get_comment_tree("post", post.id, get_context(user)) == tree
+
+        Reaction.objects.create(
+            comment=comment, emoji=Reaction.Emoji.HEART, author_user=user
+        )
+        invalidate_comment_tree("post", post.id)
+        tree = get_comment_tree("post", post.id, get_context(user))
+        assert tree["threads"][0]["reactions"] == [
+            {"count": 1, "is_reacted": False, "emoji": Reaction.Emoji.HEART.value}
+        ]
+
+    def test_personalize_tree(self, post, creator_user, user):
+        comment = Comment.objects.create(
+            post=post, body="hello", author_user=creator_user
+        )
+        Reaction.objects.create(
+            comment=comment, emoji=Reaction.Emoji.HEART, author_user=user
+        )
+        creator_user.follow(user)
+        user.refresh_entitlements()
+
+        tree = get_comment_tree("post", post.id, get_context(user))
+        threads = personalize_comment_tree(
+            tree["threads"], tree["author_ids"], user, "post", post.id
+        )
+        assert threads[0]["reactions"][0]["is_reacted"]
+        assert threads[0]["author_user"]["is_following"]
+        assert not threads[0]["author_user"]["is_member"]
@@ -0,0 +1,83 @@
+import pytest
+import time_machine
+from django.utils import timezone
+
+from fanmo.posts.links import (
+    get_link_metadata,
+    normalize_url,
+    refresh_link_metadata_in_bulk,
+)
+
+pytestmark = pytest.mark.django_db
+
+
+class TestLinkMetadata:
+    def test_normalize_url(self):
+        assert normalize_url("https://youtube.com") == "https://youtube.com"
+        assert (
+            normalize_url("HTTPS://YouTube.com:443/watch?v=1&utm_source=x&a=2#top")
+            == "https://youtube.com/watch?a=2&v=1"
+        )
+
+    def test_get_link_metadata_is_shared(self, mocker):
+        fetch_mock = mocker.patch(
+            "fanmo.posts.links.fetch_link_metadata",
+            return_value={"link_og": None, "link_embed": {"foo": "bar"}},
+        )
+
+        assert get_link_metadata("https://fanmo.in", fetch=False) is None
+        assert get_link_metadata("https://fanmo.in") == {
+            "link_og": None,
+            "link_embed": {"foo": "bar"},
+        }
+        assert get_link_metadata("https://FANMO.in?utm_source=twitter") == {
+            "link_og": None,
+            "link_embed": {"foo": "bar"},
+        }
+        fetch_mock.assert_called_once_with("https://fanmo.in")
+
+    def test_links_are_fetched_as_posted(self, mocker):
+        fetch_mock = mocker.patch(
+            "fanmo.posts.links.fetch_link_metadata",
+            return_value={"link_og": None, "link_embed": None},
+        )
+
+        get_link_metadata("https://fanmo.in/search?q=a+b&flag#results")
+
+        fetch_mock.assert_called_once_with("https://fanmo.in/search?q=a+b&flag#results")
+
+    def test_get_link_metadata_refreshes_stale_metadata(self, mocker):
+        fetch_mock = mocker.patch(
+            "fanmo.posts.links.fetch_link_metadata",
+            side_effect=[
+                {"link_og": None, "link_embed": {"version": 1}},
+                {"link_og": None, "link_embed": {"version": 2}},
+            ],
+        )
+        get_link_metadata("https://fanmo.in")
+
+        with time_machine.travel(timezone.now() + timezone.timedelta(days=2)):
+            # stale metadata is served while it is refreshed
+            assert get_link_metadata("https://fanmo.in")["link_embed"] == {"version": 1}
+            assert get_link_metadata("https://fanmo.in")["link_embed"] == {"version": 2}
+        assert fetch_mock.call_count == 2
+
+    def test_refresh_link_metadata_in_bulk(self, mocker):
+        fetch_mock = mocker.patch(
+            "fanmo.posts.links.fetch_link_metadata",
+            return_value={"link_og": None, "link_embed": {"foo": "bar"}},
+        )
+
+        metadata = refresh_link_metadata_in_bulk(
+            ["https://fanmo.in?utm_source=x", "https://FANMO.in", "https://fanmo.in"]
+        )
+
+        assert metadata == {
+            "https://fanmo.in?utm_source=x": {
+                "link_og": None,
+                "link_embed": {"foo": "bar"},
+            },
+            "https://FANMO.in": {"link_og": None, "link_embed": {"foo": "bar"}},
+            "https://fanmo.in": {"link_og": None, "link_embed": {"foo": "bar"}},
+        }
+        fetch_mock.assert_called_once_with("https://fanmo.in?utm_source=x")
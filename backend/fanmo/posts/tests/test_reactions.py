@@ -0,0 +1,69 @@
+import pytest
+
+from fanmo.posts.models import Comment, Content, Post, Reaction, ReactionCount
+from fanmo.posts.reactions import add_reaction, annotate_reactions, remove_reaction
+from fanmo.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def posts(creator_user):
+    return [
+        Post.objects.create(
+            title=f"Post {i}",
+            content=Content.objects.create(type=Content.Type.TEXT, text="Hello"),
+            author_user=creator_user,
+        )
+        for i in range(2)
+    ]
+
+
+class TestReactions:
+    def test_reaction_count(self, posts, user):
+        post = posts[0]
+        add_reaction(post, user, Reaction.Emoji.HEART)
+        add_reaction(post, user, Reaction.Emoji.HEART)
+        add_reaction(post, UserFactory(), Reaction.Emoji.HEART)
+
+        counter = ReactionCount.objects.get(target="post", target_id=post.id)
+        assert counter.count == 2
+
+        remove_reaction(post, user, Reaction.Emoji.HEART)
+        remove_reaction(post, user, Reaction.Emoji.HEART)
+        counter.refresh_from_db()
+        assert counter.count == 1
+
+    def test_reaction_count_of_cascade_deletions(self, posts, user):
+        comment = Comment.objects.create(
+            post=posts[0], body="Hello", author_user=posts[0].author_user
+        )
+        reacting_user = UserFactory()
+        add_reaction(posts[0], user, Reaction.Emoji.HEART)
+        add_reaction(posts[0], reacting_user, Reaction.Emoji.HEART)
+        add_reaction(comment, reacting_user, Reaction.Emoji.HEART)
+
+        reacting_user.delete()
+
+        post_counter = ReactionCount.objects.get(target="post", target_id=posts[0].id)
+        comment_counter = ReactionCount.objects.get(
+            target="comment", target_id=comment.id
+        )
+        assert post_counter.count == 1
+        assert comment_counter.count == 0
+
+    def test_annotate_reactions(self, posts, user, django_assert_num_queries):
+        add_reaction(posts[0], user, Reaction.Emoji.HEART)
+        for _ in range(3):
+            add_reaction(posts[0], UserFactory(), Reaction.Emoji.HEART)
+        add_reaction(posts[1], UserFactory(), Reaction.Emoji.HEART)
+
+        with django_assert_num_queries(2):
+            annotate_reactions(posts, user)
+
+        assert posts[0].reaction_summary == [
+            {"count": 4, "is_reacted": True, "emoji": Reaction.Emoji.HEART.value}
+        ]
+        assert posts[1].reaction_summary == [
+            {"count": 1, "is_reacted": False, "emoji": Reaction.Emoji.HEART.value}
+        ]
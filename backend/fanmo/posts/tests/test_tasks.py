@@ -0,0 +1,91 @@
+import pytest
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+
+from fanmo.posts import tasks
+from fanmo.posts.models import Content, Post
+from fanmo.posts.tasks import refresh_all_post_social_images, refresh_post_social_image
+
+pytestmark = pytest.mark.django_db
+
+
+class TestPostTasks:
+    def test_refresh_social_image_skips_unchanged_post(self, creator_user, mocker):
+        generate_post_summary_mock = mocker.patch(
+            "fanmo.posts.tasks.generate_post_summary",
+            side_effect=lambda post: ContentFile(b"image"),
+        )
+        post = Post.objects.create(
+            title="Hello Darkness",
+            content=Content.objects.create(type=Content.Type.TEXT, text="Hello"),
+            author_user=creator_user,
+        )
+
+        refresh_post_social_image(post.id)
+        refresh_post_social_image(post.id)
+        assert generate_post_summary_mock.call_count == 1
+
+        post.refresh_from_db()
+        previous_image = post.social_image.name
+        post.title = "Hello Light"
+        post.save()
+
+        refresh_post_social_image(post.id)
+        assert generate_post_summary_mock.call_count == 2
+
+        post.refresh_from_db()
+        assert post.social_image.name != previous_image
+        assert not post.social_image.storage.exists(previous_image)
+
+    def test_refresh_all_social_images(self, creator_user, mocker):
+        async_task_spy = mocker.spy(tasks, "async_task")
+        render_post_summary_mock = mocker.patch(
+            "fanmo.posts.tasks.render_post_summary", side_effect=lambda post: b"image"
+        )
+        posts = [
+            Post.objects.create(
+                title=f"Post {i}",
+                content=Content.objects.create(type=Content.Type.TEXT, text="Hello"),
+                author_user=creator_user,
+                is_published=True,
+            )
+            for i in range(3)
+        ]
+
+        refresh_all_post_social_images(chunk_size=2)
+        # one task per chunk of posts
+        assert [call.args[1:] for call in async_task_spy.call_args_list] == [
+            (posts[0].id, posts[1].id),
+            (posts[2].id, posts[2].id),
+        ]
+        assert render_post_summary_mock.call_count == 3
+        for post in posts:
+            post.refresh_from_db()
+            assert post.social_image.name.startswith(f"posts/social/post_{post.id}_")
+            assert post.social_image.storage.exists(post.social_image.name)
+
+        # unchanged posts are not rendered again
+        refresh_all_post_social_images(chunk_size=2)
+        assert render_post_summary_mock.call_count == 3
+
+    def test_refresh_social_images_command(self, creator_user):
+        """
+        Images are rendered by the spawned process pool of the management command.
+        """
+        posts = [
+            Post.objects.create(
+                title=f"Post {i}",
+                content=Content.objects.create(type=Content.Type.TEXT, text="Hello"),
+                author_user=creator_user,
+                is_published=True,
+            )
+            for i in range(3)
+        ]
+
+        call_command("refresh_social_images", only="posts", chunk_size=2, workers=2)
+
+        for post in posts:
+            post.refresh_from_db()
+            assert post.social_image.name.startswith(f"posts/social/post_{post.id}_")
+            with post.social_image.open() as image_file:
+                assert image_file.read(3) == b"\xff\xd8\xff"
@@ -218,19 +218,15 @@ class ComputedUserFieldSerializer(serializers.Serializer):
     @extend_schema_field(serializers.BooleanField())
     def get_is_following(self, user):
         request_user = self.context["request"].user
-        if not request_user.is_authenticated:
+        if not request_user.is_authenticated or self.context.get("shared"):
             return False
 
-        following_user = next(
-            (user for f_user in request_user.followings.all() if f_user.id == user.id),
-            None,
-        )
-        return following_user is not None
+        return request_user.entitlements.is_following(user.pk)
 
     @extend_schema_field(serializers.BooleanField())
     def get_is_member(self, user):
         request_user = self.context["request"].user
-        if not request_user.is_authenticated:
+        if not request_user.is_authenticated or self.context.get("shared"):
             return False
         return request_user.get_membership(user.pk) is not None
 
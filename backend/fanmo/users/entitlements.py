@@ -0,0 +1,125 @@
+from collections import namedtuple
+
+from django.core.cache import cache
+from django.db import transaction
+
+ENTITLEMENTS_CACHE_KEY = "user_entitlements:%s"
+# invalidation takes care of freshness, timeout only evicts snapshots of inactive users.
+ENTITLEMENTS_CACHE_TIMEOUT = 60 * 60 * 24
+
+MembershipEntitlement = namedtuple(
+    "MembershipEntitlement", ["creator_user_id", "tier_id"]
+)
+DonationEntitlement = namedtuple("DonationEntitlement", ["creator_user_id", "post_id"])
+
+
+class Entitlements:
+    """
+    Compact snapshot of what a fan user has access to.
+
+    The snapshot only stores ids so that it is cheap to build, cache and look up,
+    regardless of how many memberships or donations a fan user has.
+    """
+
+    def __init__(self, memberships=None, purchased_posts=None, followings=None):
+        # creator_user_id -> tier_id of the active membership
+        self.memberships = memberships or {}
+        # (creator_user_id, post_id) of posts unlocked with a donation
+        self.purchased_posts = purchased_posts or set()
+        # ids of creators followed by the fan user
+        self.followings = followings or set()
+
+    @classmethod
+    def for_user(cls, user_id):
+        return cls.for_users([user_id])[user_id]
+
+    @classmethod
+    def for_users(cls, user_ids):
+        """
+        Get entitlements of multiple users, snapshots missing in cache are built in bulk.
+        """
+        cache_keys = {ENTITLEMENTS_CACHE_KEY % user_id: user_id for user_id in user_ids}
+        cached = cache.get_many(cache_keys.keys())
+        entitlements = {
+            cache_keys[key]: cls.from_dict(value) for key, value in cached.items()
+        }
+
+        missing_user_ids = [
+            user_id for user_id in user_ids if user_id not in entitlements
+        ]
+        if missing_user_ids:
+            built = cls.build(missing_user_ids)
+            cache.set_many(
+                {
+                    ENTITLEMENTS_CACHE_KEY % user_id: value.to_dict()
+                    for user_id, value in built.items()
+                },
+                ENTITLEMENTS_CACHE_TIMEOUT,
+            )
+            entitlements.update(built)
+        return entitlements
+
+    @classmethod
+    def build(cls, user_ids):
+        from fanmo.donations.models import Donation
+        from fanmo.memberships.models import Membership
+        from fanmo.users.models import Following
+
+        entitlements = {user_id: cls() for user_id in user_ids}
+
+        for fan_user_id, creator_user_id, tier_id in Membership.objects.filter(
+            fan_user_id__in=user_ids, is_active=True
+        ).values_list("fan_user_id", "creator_user_id", "tier_id"):
+            entitlements[fan_user_id].memberships[creator_user_id] = tier_id
+
+        for fan_user_id, creator_user_id, post_id in Donation.objects.filter(
+            fan_user_id__in=user_ids,
+            status=Donation.Status.SUCCESSFUL,
+            post__isnull=False,
+        ).values_list("fan_user_id", "creator_user_id", "post_id"):
+            entitlements[fan_user_id].purchased_posts.add((creator_user_id, post_id))
+
+        for fan_user_id, creator_user_id in Following.objects.filter(
+            to_user_id__in=user_ids
+        ).values_list("to_user_id", "from_user_id"):
+            entitlements[fan_user_id].followings.add(creator_user_id)
+
+        return entitlements
+
+    @classmethod
+    def from_dict(cls, value):
+        return cls(
+            memberships=value["memberships"],
+            purchased_posts=set(value["purchased_posts"]),
+            followings=set(value["followings"]),
+        )
+
+    def to_dict(self):
+        return {
+            "memberships": self.memberships,
+            "purchased_posts": list(self.purchased_posts),
+            "followings": list(self.followings),
+        }
+
+    def get_membership(self, creator_user_id):
+        if creator_user_id not in self.memberships:
+            return None
+        return MembershipEntitlement(creator_user_id, self.memberships[creator_user_id])
+
+    def get_donation(self, creator_user_id, post_id):
+        if (creator_user_id, post_id) not in self.purchased_posts:
+            return None
+        return DonationEntitlement(creator_user_id, post_id)
+
+    def is_following(self, creator_user_id):
+        return creator_user_id in self.followings
+
+
+def invalidate_entitlements(user_id):
+    """
+    Drop the cached snapshot of a user, again after commit so that a request
+    running in parallel does not cache uncommitted state.
+    """
+    cache_key = ENTITLEMENTS_CACHE_KEY % user_id
+    cache.delete(cache_key)
+    transaction.on_commit(lambda: cache.delete(cache_key))
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.14 on 2026-10-18 14:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_donation_tiers_and_default_amount'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='creatoractivity',
+            index=models.Index(fields=['created_at', 'id'], name='creator_act_created_b3a566_idx'),
+        ),
+    ]
@@ -1,5 +1,5 @@
 import base64
-from functools import cached_property, lru_cache
+from functools import cached_property
 
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
@@ -20,8 +20,8 @@ from fanmo.core.models import (
     POST_NOTIFICATIONS,
 )
 from fanmo.donations.constants import DONATION_TIERS
-from fanmo.donations.models import Donation
 from fanmo.payments.models import BankAccount
+from fanmo.users.entitlements import Entitlements, invalidate_entitlements
 from fanmo.users.validators import ASCIIUsernameValidator, validate_username
 from fanmo.utils.models import BaseModel, IPAddressHistoricalModel
 
@@ -72,11 +72,6 @@ class User(BaseModel, AbstractUser):
 
     social_image = models.ImageField(upload_to="profiles/social/", blank=True)
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.get_membership = lru_cache()(self._get_membership)
-        self.get_donation = lru_cache()(self._get_donation)
-
     @property
     def display_name(self):
         return self.name or self.username
@@ -113,39 +108,30 @@ class User(BaseModel, AbstractUser):
         self.followers.add(follower_user)
         self.follower_count = self.followers.count()
         self.save()
+        follower_user.refresh_entitlements()
 
     def unfollow(self, follower_user):
         self.followers.remove(follower_user)
         self.follower_count = self.followers.count()
         self.save()
+        follower_user.refresh_entitlements()
 
     def email_base64(self):
         return base64.urlsafe_b64encode(self.email.encode()).decode("utf-8")
 
-    def _get_membership(self, creator_user_id):
-        # PERF: assumes memberships are prefetched!
-        return next(
-            (
-                membership
-                for membership in self.memberships.all()
-                if membership.is_active
-                and membership.creator_user_id == creator_user_id
-            ),
-            None,
-        )
+    @cached_property
+    def entitlements(self):
+        return Entitlements.for_user(self.pk)
 
-    def _get_donation(self, creator_user_id, post_id):
-        # PERF: assumes donations are prefetched!
-        return next(
-            (
-                donation
-                for donation in self.donations.all()
-                if donation.status == Donation.Status.SUCCESSFUL
-                and donation.creator_user_id == creator_user_id
-                and donation.post_id == post_id
-            ),
-            None,
-        )
+    def refresh_entitlements(self):
+        invalidate_entitlements(self.pk)
+        self.__dict__.pop("entitlements", None)
+
+    def get_membership(self, creator_user_id):
+        return self.entitlements.get_membership(creator_user_id)
+
+    def get_donation(self, creator_user_id, post_id):
+        return self.entitlements.get_donation(creator_user_id, post_id)
 
 
 class SocialLink(models.Model):
@@ -293,3 +279,6 @@ class CreatorActivity(BaseModel):
 
     # {tier: {id, name}, old_tier: {id, name}}
     data = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+
+    class Meta:
+        indexes = [models.Index(fields=["created_at", "id"])]
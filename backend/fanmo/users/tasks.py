@@ -1,6 +1,15 @@
 from fanmo.core.tasks import async_task
 from fanmo.users.models import User
-from fanmo.utils.images import generate_page_summary
+from fanmo.utils.images import (
+    generate_page_summary,
+    get_page_summary_hash,
+    iter_id_ranges,
+    refresh_social_images,
+    render_page_summary,
+)
+
+# creators rendered by a task, small enough to finish within the task timeout.
+SOCIAL_IMAGE_CHUNK_SIZE = 20
 
 
 def refresh_user_social_image(creator_user_id):
@@ -8,9 +17,38 @@ def refresh_user_social_image(creator_user_id):
     if not user.is_creator:
         return
 
-    user.social_image.save(f"user_{creator_user_id}.jpg", generate_page_summary(user))
+    # the image file name contains the hash of its inputs, skip when nothing changed.
+    summary_hash = get_page_summary_hash(user)
+    if summary_hash in user.social_image.name:
+        return
+
+    previous_image = user.social_image.name
+    user.social_image.save(
+        f"user_{creator_user_id}_{summary_hash}.jpg", generate_page_summary(user)
+    )
+    if previous_image:
+        user.social_image.storage.delete(previous_image)
+
+
+def refresh_all_user_social_images(chunk_size=SOCIAL_IMAGE_CHUNK_SIZE):
+    """
+    Refresh social images of all creators, one task per chunk of creators.
+    """
+    users = User.objects.filter(is_creator=True)
+    for first_id, last_id in iter_id_ranges(users, chunk_size):
+        async_task(refresh_user_social_images, first_id, last_id)
+
 
+def refresh_user_social_images(first_id, last_id, pool=None):
+    """
+    Refresh social images of creators with ids in the given range.
 
-def refresh_all_user_social_images():
-    for user_id in User.objects.filter(is_creator=True).values_list("id", flat=True):
-        async_task(refresh_user_social_image, user_id)
+    Images are rendered in the process pool (if given) and uploaded concurrently.
+    Returns the number of refreshed images.
+    """
+    users = User.objects.filter(
+        is_creator=True, id__gte=first_id, id__lte=last_id
+    ).order_by("id")
+    return refresh_social_images(
+        users, get_page_summary_hash, render_page_summary, "user", pool
+    )
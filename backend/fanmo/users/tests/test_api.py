@@ -622,6 +622,21 @@ class TestUserAPI:
         assert response.status_code == 200
         assert not response.json()["is_following"]
 
+    def test_follow_refreshes_entitlements(self, api_client, creator_user, user):
+        api_client.force_authenticate(user)
+        response = api_client.get(f"/api/users/{creator_user.username}/")
+        assert not response.json()["is_following"]
+
+        response = api_client.post(f"/api/users/{creator_user.username}/follow/")
+        assert response.json()["is_following"]
+        response = api_client.get(f"/api/users/{creator_user.username}/")
+        assert response.json()["is_following"]
+
+        response = api_client.post(f"/api/users/{creator_user.username}/unfollow/")
+        assert not response.json()["is_following"]
+        response = api_client.get(f"/api/users/{creator_user.username}/")
+        assert not response.json()["is_following"]
+
     def test_membership(self, api_client, active_membership):
         api_client.force_authenticate(active_membership.fan_user)
         response = api_client.get(
@@ -1,7 +1,17 @@
 import razorpay
 from django.conf import settings
 
+from fanmo.utils.razorpay_session import RazorpaySession
+
 razorpay_client = razorpay.Client(
-    auth=(settings.RAZORPAY_KEY, settings.RAZORPAY_SECRET)
+    session=RazorpaySession(
+        pool_size=settings.RAZORPAY_POOL_SIZE,
+        connect_timeout=settings.RAZORPAY_CONNECT_TIMEOUT,
+        read_timeout=settings.RAZORPAY_READ_TIMEOUT,
+        max_retries=settings.RAZORPAY_MAX_RETRIES,
+        retry_backoff=settings.RAZORPAY_RETRY_BACKOFF,
+    ),
+    auth=(settings.RAZORPAY_KEY, settings.RAZORPAY_SECRET),
+    base_url=settings.RAZORPAY_BASE_URL,
 )
 razorpay_client.set_app_details({"title": "fanmo", "version": "0.1"})
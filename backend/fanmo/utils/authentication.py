@@ -1,5 +1,4 @@
 from django.conf import settings
-from django.db.models import prefetch_related_objects
 from rest_framework import authentication, exceptions
 
 from fanmo.users.models import User
@@ -32,14 +31,7 @@ class UsernameAuthentication(authentication.BaseAuthentication):
 
 
 class SessionAuthentication(authentication.SessionAuthentication):
-    def authenticate(self, request):
-        value = super().authenticate(request)
-        if not value:
-            return None
-
-        user, token = value
-        users_to_prefetch = [user]
-        prefetch_related_objects(
-            users_to_prefetch, "memberships", "followings", "donations"
-        )
-        return (users_to_prefetch[0], token)
+    """
+    Session authentication, memberships, donations and followings of the user are
+    not prefetched anymore, they are read from the cached `User.entitlements` snapshot.
+    """
@@ -1,13 +1,56 @@
-from textwrap import wrap
+import hashlib
+import json
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 
 from django.conf import settings
 from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
 from wand.color import Color
 from wand.drawing import Drawing
 from wand.image import Image
 from django.utils.text import Truncator
 
 from fanmo.posts.models import Content, Post
+from fanmo.utils.text_layout import word_wrap
+
+# bump to regenerate all social images, e.g. after changing their design.
+SOCIAL_IMAGE_VERSION = 1
+SOCIAL_IMAGE_UPLOAD_WORKERS = 8
+
+
+def get_summary_hash(*inputs):
+    """
+    Short hash of everything a summary image is generated from.
+    """
+    payload = json.dumps([SOCIAL_IMAGE_VERSION, *inputs])
+    return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+
+def get_page_summary_hash(creator_user):
+    return get_summary_hash(
+        "page",
+        creator_user.display_name,
+        creator_user.one_liner,
+        creator_user.page_link,
+        creator_user.avatar.name,
+        creator_user.cover.name,
+    )
+
+
+def get_post_summary_hash(post):
+    background = post.author_user.cover.name
+    if post.content.type == Content.Type.IMAGES:
+        background = post.content.files.first().image.name
+    return get_summary_hash(
+        "post",
+        post.title,
+        background,
+        post.author_user.display_name,
+        post.author_user.one_liner,
+        post.author_user.page_link,
+        post.author_user.avatar.name,
+    )
 
 
 def generate_page_summary(creator_user):
@@ -160,16 +203,60 @@ def draw_text(
         draw(canvas)
 
 
-def draw_background(canvas, cover, blur=5):
+@lru_cache(maxsize=None)
+def get_resource_image(name):
     """
-    Draw cover image and a grey overlay on a blank canvas.
+    Decoded static image from the resources directory, kept for the lifetime of the process.
     """
-    if cover:
-        with Image(file=cover.file) as cover_image:
+    image = Image(filename=str(settings.RESOURCES_DIR / name))
+    if name == "logo.png":
+        image.transform(resize="180x34^")
+    return image
+
+
+@lru_cache(maxsize=32)
+def get_background_blob(name, blur):
+    """
+    Resized and blurred cover image, uploaded files are never overwritten
+    so the file name is enough to identify its content.
+    """
+    with default_storage.open(name) as cover_file:
+        with Image(file=cover_file) as cover_image:
             cover_image.auto_orient()
             cover_image.transform(resize="1200x630^")
             cover_image.extent(1200, 630, gravity="center")
             cover_image.blur(sigma=blur)
+            return cover_image.make_blob("png")
+
+
+@lru_cache(maxsize=128)
+def get_avatar_blob(name=None):
+    """
+    Resized and masked avatar image, the default icon is used when no name is given.
+    """
+    if name:
+        with default_storage.open(name) as avatar_file:
+            avatar_image = Image(file=avatar_file)
+    else:
+        avatar_image = get_resource_image("icon.png").clone()
+
+    with avatar_image:
+        avatar_image.auto_orient()
+        avatar_image.transform(resize="250x250^")
+        avatar_image.extent(250, 250, gravity="center")
+        avatar_image.composite(
+            get_resource_image("avatar_mask.png"), operator="copy_opacity"
+        )
+        avatar_image.resize(200, 200)
+        return avatar_image.make_blob("png")
+
+
+def draw_background(canvas, cover, blur=5):
+    """
+    Draw cover image and a grey overlay on a blank canvas.
+    """
+    if cover:
+        with Image(blob=get_background_blob(cover.name, blur)) as cover_image:
             canvas.composite(cover_image)
 
     with Color("rgba(43, 43, 43, 0.7)") as overlay_color:
@@ -192,20 +279,7 @@ def draw_avatar(canvas, creator_user, left=0, top=0):
     top: int
         top position/co-ordinate for drawing
     """
-    avatar_image = (
-        Image(file=creator_user.avatar.file)
-        if creator_user.avatar
-        else Image(filename=str(settings.RESOURCES_DIR / "icon.png"))
-    )
-    with avatar_image:
-        avatar_image.auto_orient()
-        avatar_image.transform(resize="250x250^")
-        avatar_image.extent(250, 250, gravity="center")
-        with Image(
-            filename=str(settings.RESOURCES_DIR / "avatar_mask.png")
-        ) as mask_image:
-            avatar_image.composite(mask_image, operator="copy_opacity")
-        avatar_image.resize(200, 200)
+    with Image(blob=get_avatar_blob(creator_user.avatar.name or None)) as avatar_image:
         canvas.composite(avatar_image, left, top)
 
 
@@ -213,46 +287,73 @@ def draw_logo(canvas):
     """
     Draw fanmo logo on the bottom right of the canvas.
     """
-    with Image(filename=str(settings.RESOURCES_DIR / "logo.png")) as logo_image:
-        logo_image.transform(resize="180x34^")
-        canvas.composite(logo_image, 970, 560)
+    canvas.composite(get_resource_image("logo.png"), 970, 560)
 
 
-def word_wrap(image, ctx, text, roi_width, roi_height):
+def render_post_summary(post):
     """
-    Copied verbatim from Wand documentation.
+    Render post summary image as raw bytes, picklable for a worker process.
+    """
+    return generate_post_summary(post).read()
+
 
-    Break long text to multiple lines, and reduce point size until all text fits within a bounding box.
+def render_page_summary(creator_user):
     """
-    mutable_message = text
-    iteration_attempts = 100
-
-    def eval_metrics(txt):
-        """Quick helper function to calculate width/height of text."""
-        metrics = ctx.get_font_metrics(image, txt, True)
-        return (metrics.text_width, metrics.text_height)
-
-    while ctx.font_size > 0 and iteration_attempts:
-        iteration_attempts -= 1
-        width, height = eval_metrics(mutable_message)
-        if height > roi_height:
-            ctx.font_size -= 0.75  # Reduce pointsize
-            mutable_message = text  # Restore original text
-        elif width > roi_width:
-            columns = len(mutable_message)
-            while columns > 0:
-                columns -= 1
-                mutable_message = "\n".join(wrap(mutable_message, columns))
-                wrapped_width, _ = eval_metrics(mutable_message)
-                if wrapped_width <= roi_width:
-                    break
-            if columns < 1:
-                ctx.font_size -= 0.75  # Reduce pointsize
-                mutable_message = text  # Restore original text
-        else:
-            break
-    # in theory this should never happen because the text supplied
-    # to it is never expected to be so large.
-    if iteration_attempts < 1:
-        raise RuntimeError("Unable to calculate word_wrap for " + text)
-    return mutable_message
+    Render page summary image as raw bytes, picklable for a worker process.
+    """
+    return generate_page_summary(creator_user).read()
+
+
+def iter_id_ranges(queryset, chunk_size):
+    """
+    (first id, last id) of consecutive chunks of `chunk_size` rows of the queryset.
+    """
+    ids = queryset.order_by("id").values_list("id", flat=True)
+    last_id = 0
+    while True:
+        chunk = list(ids.filter(id__gt=last_id)[:chunk_size])
+        if not chunk:
+            return
+        yield chunk[0], chunk[-1]
+        last_id = chunk[-1]
+
+
+def refresh_social_images(instances, get_hash, render, name_prefix, pool=None):
+    """
+    Render social images of instances whose inputs changed and upload them.
+
+    Images are rendered in the given process pool, or in the current process
+    without one, uploaded concurrently and saved with a single query.
+    Returns the number of refreshed images.
+    """
+    changed = []
+    for instance in instances:
+        summary_hash = get_hash(instance)
+        if summary_hash not in instance.social_image.name:
+            changed.append((instance, summary_hash))
+    if not changed:
+        return 0
+
+    rendered = (pool.map if pool else map)(
+        render, [instance for instance, _ in changed]
+    )
+
+    def upload(change, content):
+        instance, summary_hash = change
+        image = instance.social_image
+        name = image.field.generate_filename(
+            instance, f"{name_prefix}_{instance.pk}_{summary_hash}.jpg"
+        )
+        previous_image = image.name
+        image.name = image.storage.save(name, ContentFile(content))
+        return previous_image
+
+    with ThreadPoolExecutor(SOCIAL_IMAGE_UPLOAD_WORKERS) as uploads:
+        previous_images = list(uploads.map(upload, changed, rendered))
+        model = type(changed[0][0])
+        model.objects.bulk_update(
+            [instance for instance, _ in changed], ["social_image"]
+        )
+        storage = changed[0][0].social_image.storage
+        list(uploads.map(storage.delete, filter(None, previous_images)))
+    return len(changed)
@@ -1,4 +1,12 @@
+import base64
+import json
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
 from rest_framework import pagination
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 
@@ -24,3 +32,156 @@ class PageNumberPagination(pagination.PageNumberPagination):
         if page_number == 1:
             return remove_query_param(url, self.page_query_param)
         return replace_query_param(url, self.page_query_param, page_number)
+
+
+class IdCursorPagination(pagination.BasePagination):
+    """
+    Cursor pagination over a list of serialized items in ascending id order,
+    e.g. cached payloads which can not be paginated in the database.
+
+    The cursor is the id of the last item of the previous page.
+    """
+
+    cursor_query_param = "cursor"
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+    def paginate_queryset(self, items, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            try:
+                cursor = int(cursor)
+            except ValueError:
+                raise NotFound("Invalid cursor")
+            items = [item for item in items if item["id"] > cursor]
+
+        self.has_next = len(items) > page_size
+        self.page = items[:page_size]
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            return pagination._positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size,
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.get_full_path()
+        return replace_query_param(url, self.cursor_query_param, self.page[-1]["id"])
+
+    def get_paginated_response(self, data):
+        return Response(
+            {"next": self.get_next_link(), "previous": None, "results": data}
+        )
+
+
+class KeysetPagination(pagination.BasePagination):
+    """
+    Cursor pagination keyed on (created_at, id), without counting the results.
+
+    Pages are fetched with an indexed range condition instead of an offset,
+    so deep pages are as fast as the first one. Only orderings on created_at
+    are supported, other orderings need page number pagination.
+    """
+
+    cursor_query_param = "cursor"
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+
+        ordering = queryset.query.order_by or queryset.model._meta.ordering
+        if (
+            queryset.query.is_sliced
+            or not ordering
+            or not isinstance(ordering[0], str)
+            or ordering[0].lstrip("-") != "created_at"
+        ):
+            raise ValidationError(
+                "Cursor pagination is only supported when ordering by created_at.",
+                "unsupported_ordering",
+            )
+        self.descending = ordering[0].startswith("-")
+        prefix = "-" if self.descending else ""
+        queryset = queryset.order_by(f"{prefix}created_at", f"{prefix}id")
+
+        cursor = self.decode_cursor(request)
+        if cursor:
+            created_at, pk = cursor
+            lookup = "lt" if self.descending else "gt"
+            queryset = queryset.filter(
+                Q(**{f"created_at__{lookup}": created_at})
+                | Q(created_at=created_at, **{f"id__{lookup}": pk})
+            )
+
+        results = list(queryset[: page_size + 1])
+        self.has_next = len(results) > page_size
+        self.page = results[:page_size]
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            return pagination._positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size,
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            created_at, pk = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            created_at = parse_datetime(created_at)
+            pk = int(pk)
+        except (TypeError, ValueError):
+            raise NotFound("Invalid cursor")
+        if created_at is None:
+            raise NotFound("Invalid cursor")
+        return created_at, pk
+
+    @staticmethod
+    def encode_cursor(obj):
+        payload = json.dumps([obj.created_at.isoformat(), obj.pk])
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.get_full_path()
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(self.page[-1])
+        )
+
+    def get_paginated_response(self, data):
+        return Response(
+            {"next": self.get_next_link(), "previous": None, "results": data}
+        )
+
+
+class KeysetPaginationMixin:
+    """
+    Let clients opt into keyset pagination by passing a (possibly empty) cursor.
+    """
+
+    @property
+    def pagination_class(self):
+        if "cursor" in self.request.query_params:
+            return KeysetPagination
+        return api_settings.DEFAULT_PAGINATION_CLASS
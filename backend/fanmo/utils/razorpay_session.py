@@ -0,0 +1,133 @@
+import random
+import re
+import time
+from urllib.parse import urlsplit
+
+import requests
+import structlog
+from django_redis import get_redis_connection
+from requests.adapters import HTTPAdapter
+
+logger = structlog.get_logger(__name__)
+
+RAZORPAY_ENDPOINTS_KEY = "razorpay_metrics:endpoints"
+RAZORPAY_STATUSES_KEY = "razorpay_metrics:statuses:%s"
+RAZORPAY_SAMPLES_KEY = "razorpay_metrics:samples:%s"
+RAZORPAY_SAMPLE_SIZE = 1000
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# ids of razorpay entities, e.g. pay_29QQoUBi66xm2f
+ENTITY_ID_PATTERN = re.compile(r"/[a-z]+_[A-Za-z0-9]+")
+
+
+def get_endpoint(method, url):
+    """
+    Method and path of a request, with entity ids replaced by a placeholder.
+    """
+    return f"{method.upper()} {ENTITY_ID_PATTERN.sub('/{id}', urlsplit(url).path)}"
+
+
+class RazorpaySession(requests.Session):
+    """
+    Session of razorpay api calls with a pool of keep-alive connections and default timeouts.
+
+    Requests which failed to connect are retried, responses with a retryable status
+    and failures after connecting are retried only for idempotent methods.
+    The latency of each call, including its retries, is recorded by endpoint.
+    """
+
+    def __init__(
+        self, pool_size, connect_timeout, read_timeout, max_retries, retry_backoff
+    ):
+        super().__init__()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        is_idempotent = method.upper() in IDEMPOTENT_METHODS
+        started = time.perf_counter()
+        retries = 0
+        while True:
+            try:
+                response = super().request(method, url, **kwargs)
+            except requests.ConnectTimeout:
+                if retries == self.max_retries:
+                    self.record(method, url, "timeout", started, retries)
+                    raise
+            except (requests.ConnectionError, requests.Timeout):
+                if not is_idempotent or retries == self.max_retries:
+                    self.record(method, url, "error", started, retries)
+                    raise
+            else:
+                if (
+                    not is_idempotent
+                    or response.status_code not in RETRY_STATUSES
+                    or retries == self.max_retries
+                ):
+                    self.record(method, url, response.status_code, started, retries)
+                    return response
+                # release the connection back to the pool
+                response.close()
+
+            retries += 1
+            time.sleep(random.uniform(0, self.retry_backoff * 2**retries))
+
+    def record(self, method, url, status, started, retries):
+        endpoint = get_endpoint(method, url)
+        duration = time.perf_counter() - started
+        logger.info(
+            "razorpay_request",
+            endpoint=endpoint,
+            status=status,
+            duration=duration,
+            retries=retries,
+        )
+
+        # metrics must never fail a call, e.g. after a payment is captured.
+        try:
+            pipeline = get_redis_connection("default").pipeline()
+            pipeline.sadd(RAZORPAY_ENDPOINTS_KEY, endpoint)
+            pipeline.hincrby(RAZORPAY_STATUSES_KEY % endpoint, status, 1)
+            pipeline.lpush(RAZORPAY_SAMPLES_KEY % endpoint, duration)
+            pipeline.ltrim(RAZORPAY_SAMPLES_KEY % endpoint, 0, RAZORPAY_SAMPLE_SIZE - 1)
+            pipeline.execute()
+        except Exception:
+            logger.exception("razorpay_metrics_failed", endpoint=endpoint)
+
+
+def get_razorpay_metrics(percentiles=(50, 95, 99)):
+    """
+    Status counts and latency percentiles (in seconds) of recent razorpay api calls, by endpoint.
+    """
+    redis = get_redis_connection("default")
+    endpoints = sorted(name.decode() for name in redis.smembers(RAZORPAY_ENDPOINTS_KEY))
+
+    pipeline = redis.pipeline()
+    for endpoint in endpoints:
+        pipeline.hgetall(RAZORPAY_STATUSES_KEY % endpoint)
+        pipeline.lrange(RAZORPAY_SAMPLES_KEY % endpoint, 0, -1)
+    results = iter(pipeline.execute())
+
+    metrics = {}
+    for endpoint in endpoints:
+        statuses = next(results)
+        samples = sorted(float(sample) for sample in next(results))
+        metrics[endpoint] = {
+            "statuses": {
+                status.decode(): int(count) for status, count in statuses.items()
+            },
+            **{
+                f"p{percentile}": samples[
+                    min(len(samples) - 1, int(len(samples) * percentile / 100))
+                ]
+                for percentile in percentiles
+                if samples
+            },
+        }
+    return metrics
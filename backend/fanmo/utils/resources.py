@@ -1,19 +1,198 @@
-from django.http.response import HttpResponse
+import csv
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.mail import send_mail
+from django.db.models import Value
+from django.db.models.functions import Coalesce, NullIf
+from django.http.response import JsonResponse, StreamingHttpResponse
+from django.template.loader import render_to_string
 from django.utils import timezone
+from django.utils.crypto import get_random_string
+from django.utils.module_loading import import_string
 from import_export import resources
 from import_export.formats.base_formats import CSV
 
-from fanmo.payments.models import Payment
+from fanmo.core.tasks import async_task
+from fanmo.utils.storages import MediaRootS3Boto3Storage
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORTS_DIR = "exports"
+# signed S3 urls are valid for at most 7 days.
+EXPORT_LINK_MAX_DAYS = 7
+
+
+def display_name(user_lookup):
+    """
+    Database expression of `User.display_name` for the user at `user_lookup`.
+    """
+    return Coalesce(
+        NullIf(f"{user_lookup}__name", Value("")), f"{user_lookup}__username"
+    )
+
+
+class Echo:
+    """
+    File-like object which returns the written value instead of buffering it.
+    """
+
+    def write(self, value):
+        return value
 
 
 class ModelResource(resources.ModelResource):
-    def export_csv(self, queryset):
-        export_formatter = CSV()
-        export_file = export_formatter.export_data(self.export(queryset))
-        file_name = f"{queryset.model._meta.model_name}-{timezone.now().isoformat()}.{export_formatter.get_extension()}"
+    """
+    CSV export of model rows which streams rows instead of building the whole dataset in memory.
 
-        response = HttpResponse(
-            export_file, content_type=export_formatter.get_content_type()
+    Rows are read using a values() projection of the export fields, dehydrate_<field>
+    methods are not supported. Attributes which are not model fields need an expression
+    in `export_expressions`.
+    """
+
+    export_expressions = {}
+
+    def get_export_queryset(self, creator_user):
+        return self._meta.model.objects.filter(creator_user=creator_user).order_by(
+            "-created_at"
         )
-        response["Content-Disposition"] = f'attachment; filename="{file_name}"'
+
+    def get_export_lookup(self, field):
+        """
+        values() lookup of an export field, attributes of a non-relational field
+        (e.g. amount of a money field) are read from the field itself.
+        """
+        model = self._meta.model
+        lookup = []
+        for attr in field.attribute.split("__"):
+            if model is None:
+                break
+            lookup.append(attr)
+            model = model._meta.get_field(attr).related_model
+        return "__".join(lookup)
+
+    def iter_export_rows(self, queryset):
+        fields = self.get_export_fields()
+        lookups = []
+        annotations = {}
+        for field in fields:
+            if field.attribute in self.export_expressions:
+                lookup = f"export_{field.column_name}"
+                annotations[lookup] = self.export_expressions[field.attribute]
+            else:
+                lookup = self.get_export_lookup(field)
+            lookups.append(lookup)
+
+        rows = (
+            queryset.prefetch_related(None)
+            .annotate(**annotations)
+            .values_list(*lookups)
+            .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        )
+        for row in rows:
+            yield [
+                "" if value is None else field.widget.render(value)
+                for field, value in zip(fields, row)
+            ]
+
+    def iter_csv(self, queryset):
+        writer = csv.writer(Echo())
+        yield writer.writerow(self.get_export_headers())
+        for row in self.iter_export_rows(queryset):
+            yield writer.writerow(row)
+
+    def get_export_file_name(self, queryset):
+        return f"{queryset.model._meta.model_name}-{timezone.now().isoformat()}.{CSV().get_extension()}"
+
+    def export_csv(self, queryset):
+        response = StreamingHttpResponse(
+            self.iter_csv(queryset), content_type=CSV().get_content_type()
+        )
+        response[
+            "Content-Disposition"
+        ] = f'attachment; filename="{self.get_export_file_name(queryset)}"'
         return response
+
+    def export_csv_to_storage(self, queryset, prefix):
+        """
+        Write the export to a temporary file and upload it to the media storage.
+        """
+        file_name = f"{EXPORTS_DIR}/{prefix}/{get_random_string(32)}/{self.get_export_file_name(queryset)}"
+        with tempfile.TemporaryFile() as export_file:
+            for line in self.iter_csv(queryset):
+                export_file.write(line.encode())
+            export_file.seek(0)
+            return default_storage.save(file_name, File(export_file))
+
+    def export_csv_for_creator(self, creator_user):
+        """
+        Stream the export of a creator, large exports are prepared in background
+        and the creator is emailed a link to download them.
+        """
+        queryset = self.get_export_queryset(creator_user)
+        threshold = settings.EXPORT_BACKGROUND_THRESHOLD
+        if threshold and queryset.count() > threshold:
+            async_task(
+                export_csv_in_background,
+                f"{self.__module__}.{self.__class__.__name__}",
+                creator_user.id,
+            )
+            return JsonResponse(
+                {"detail": "The export will be emailed to you once it is ready."},
+                status=202,
+            )
+        return self.export_csv(queryset)
+
+
+def export_csv_in_background(resource_path, creator_user_id):
+    from fanmo.users.models import User
+
+    creator_user = User.objects.get(id=creator_user_id)
+    resource = import_string(resource_path)()
+    queryset = resource.get_export_queryset(creator_user)
+    file_name = resource.export_csv_to_storage(queryset, creator_user.id)
+
+    # the link is valid for as long as the export is kept.
+    expires_in_days = min(settings.EXPORT_RETENTION_DAYS, EXPORT_LINK_MAX_DAYS)
+    if isinstance(default_storage, MediaRootS3Boto3Storage):
+        url = default_storage.url(file_name, expire=expires_in_days * 24 * 60 * 60)
+    else:
+        url = default_storage.url(file_name)
+    if url.startswith("/"):
+        url = f"{settings.BASE_URL}{url}"
+
+    context = {
+        "user": creator_user,
+        "export_name": queryset.model._meta.verbose_name_plural,
+        "url": url,
+        "expires_in_days": expires_in_days,
+    }
+    send_mail(
+        render_to_string("email/export_ready_subject.txt", context).strip(),
+        render_to_string("email/export_ready_message.txt", context),
+        None,
+        [creator_user.email],
+    )
+
+
+def delete_expired_exports():
+    """
+    Delete exports stored in the media storage for longer than EXPORT_RETENTION_DAYS.
+    """
+    expire_before = timezone.now() - timedelta(days=settings.EXPORT_RETENTION_DAYS)
+    try:
+        creator_dirs, _ = default_storage.listdir(EXPORTS_DIR)
+    except FileNotFoundError:
+        return
+
+    for creator_dir in creator_dirs:
+        export_dirs, _ = default_storage.listdir(f"{EXPORTS_DIR}/{creator_dir}")
+        for export_dir in export_dirs:
+            path = f"{EXPORTS_DIR}/{creator_dir}/{export_dir}"
+            _, file_names = default_storage.listdir(path)
+            for file_name in file_names:
+                file_path = f"{path}/{file_name}"
+                if default_storage.get_modified_time(file_path) < expire_before:
+                    default_storage.delete(file_path)
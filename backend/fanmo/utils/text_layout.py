@@ -0,0 +1,60 @@
+from textwrap import wrap
+
+FONT_SIZE_STEP = 0.75
+MAX_ATTEMPTS = 100
+MAX_CACHED_METRICS = 10000
+
+# (font, font size, stroke width, text) -> (width, height)
+_metrics_cache = {}
+
+
+def get_text_metrics(image, ctx, text, font_size):
+    """
+    Width and height of (multiline) text drawn with the given font size.
+
+    Metrics are memoized per process, static texts like callouts and page links
+    are measured only once across images.
+    """
+    key = (ctx.font, font_size, ctx.stroke_width, text)
+    if key not in _metrics_cache:
+        if len(_metrics_cache) >= MAX_CACHED_METRICS:
+            _metrics_cache.clear()
+        ctx.font_size = font_size
+        metrics = ctx.get_font_metrics(image, text, True)
+        _metrics_cache[key] = (metrics.text_width, metrics.text_height)
+    return _metrics_cache[key]
+
+
+def word_wrap(image, ctx, text, roi_width, roi_height):
+    """
+    Break long text to multiple lines, and reduce point size until all text fits within a bounding box.
+
+    Same loop as the one from Wand documentation, so layouts and failures are identical,
+    but over memoized text metrics: wraps which do not change the text
+    and texts laid out before are not measured again.
+    """
+    message = text
+    attempts = MAX_ATTEMPTS
+    while ctx.font_size > 0 and attempts:
+        attempts -= 1
+        width, height = get_text_metrics(image, ctx, message, ctx.font_size)
+        if height > roi_height:
+            ctx.font_size -= FONT_SIZE_STEP
+            message = text
+        elif width > roi_width:
+            columns = len(message)
+            while columns > 0:
+                columns -= 1
+                # raises ValueError when no column count fits, like the reference.
+                message = "\n".join(wrap(message, columns))
+                wrapped_width, _ = get_text_metrics(image, ctx, message, ctx.font_size)
+                if wrapped_width <= roi_width:
+                    break
+            if columns < 1:
+                ctx.font_size -= FONT_SIZE_STEP
+                message = text
+        else:
+            break
+    if attempts < 1:
+        raise RuntimeError("Unable to calculate word_wrap for " + text)
+    return message
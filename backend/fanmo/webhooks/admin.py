@@ -13,6 +13,9 @@ class WebhookMessageAdmin(admin.ModelAdmin):
         "sender",
         "payload",
         "external_id",
+        "is_processed",
+        "processed_at",
+        "attempts",
     )
     list_filter = ("created_at", "updated_at", "is_processed")
     date_hierarchy = "created_at"
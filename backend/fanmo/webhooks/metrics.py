@@ -0,0 +1,179 @@
+import time
+from contextlib import contextmanager
+
+import structlog
+from django.db import connection
+from django.db.models import Count, Min
+from django.utils import timezone
+from django_redis import get_redis_connection
+
+from fanmo.utils import razorpay_client
+
+logger = structlog.get_logger(__name__)
+
+WEBHOOK_EVENTS_KEY = "webhook_metrics:events"
+WEBHOOK_OUTCOMES_KEY = "webhook_metrics:outcomes:%s"
+WEBHOOK_SAMPLES_KEY = "webhook_metrics:samples:%s:%s"
+WEBHOOK_SAMPLE_SIZE = 1000
+
+# recorded for every processed webhook, in seconds.
+WEBHOOK_METRICS = {
+    "lag": "Time taken by a webhook to be processed after being received.",
+    "duration": "Time taken by the handler of a webhook.",
+    "api_time": "Time spent in Razorpay API calls while handling a webhook.",
+    "db_time": "Time spent in database queries while handling a webhook.",
+}
+
+
+class WebhookTimer:
+    """
+    Time spent handling a webhook, with database and Razorpay API time tracked separately.
+    """
+
+    def __init__(self):
+        self.duration = 0
+        self.db_time = 0
+        self.api_time = 0
+
+    def execute(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+
+    def response_hook(self, response, *args, **kwargs):
+        self.api_time += response.elapsed.total_seconds()
+
+
+@contextmanager
+def measure_webhook():
+    timer = WebhookTimer()
+    response_hooks = razorpay_client.session.hooks["response"]
+    response_hooks.append(timer.response_hook)
+    started = time.perf_counter()
+    try:
+        with connection.execute_wrapper(timer.execute):
+            yield timer
+    finally:
+        timer.duration = time.perf_counter() - started
+        response_hooks.remove(timer.response_hook)
+
+
+def record_webhook_metrics(webhook_message, outcome, timer):
+    event_name = webhook_message.payload.get("event", "unknown")
+    values = {
+        "lag": (timezone.now() - webhook_message.created_at).total_seconds(),
+        "duration": timer.duration,
+        "api_time": timer.api_time,
+        "db_time": timer.db_time,
+    }
+    logger.info(
+        "webhook_processed",
+        webhook_message_id=webhook_message.id,
+        event_name=event_name,
+        outcome=outcome,
+        attempts=webhook_message.attempts,
+        **values,
+    )
+
+    # metrics must never fail the processing of webhooks.
+    try:
+        pipeline = get_redis_connection("default").pipeline()
+        pipeline.sadd(WEBHOOK_EVENTS_KEY, event_name)
+        pipeline.hincrby(WEBHOOK_OUTCOMES_KEY % event_name, outcome, 1)
+        for metric, value in values.items():
+            key = WEBHOOK_SAMPLES_KEY % (event_name, metric)
+            pipeline.lpush(key, value)
+            pipeline.ltrim(key, 0, WEBHOOK_SAMPLE_SIZE - 1)
+        pipeline.execute()
+    except Exception:
+        logger.exception(
+            "webhook_metrics_failed", webhook_message_id=webhook_message.id
+        )
+
+
+def get_webhook_metrics(percentiles=(50, 95, 99)):
+    """
+    Outcome counts and percentiles (in seconds) of recent samples of each metric, by event name.
+    """
+    redis = get_redis_connection("default")
+    event_names = sorted(name.decode() for name in redis.smembers(WEBHOOK_EVENTS_KEY))
+
+    pipeline = redis.pipeline()
+    for event_name in event_names:
+        pipeline.hgetall(WEBHOOK_OUTCOMES_KEY % event_name)
+        for metric in WEBHOOK_METRICS:
+            pipeline.lrange(WEBHOOK_SAMPLES_KEY % (event_name, metric), 0, -1)
+    results = iter(pipeline.execute())
+
+    metrics = {}
+    for event_name in event_names:
+        outcomes = next(results)
+        metrics[event_name] = {
+            "outcomes": {
+                outcome.decode(): int(count) for outcome, count in outcomes.items()
+            }
+        }
+        for metric in WEBHOOK_METRICS:
+            samples = sorted(float(sample) for sample in next(results))
+            metrics[event_name][metric] = {
+                f"p{percentile}": samples[
+                    min(len(samples) - 1, int(len(samples) * percentile / 100))
+                ]
+                for percentile in percentiles
+                if samples
+            }
+    return metrics
+
+
+def get_webhook_backlog():
+    from fanmo.webhooks.models import WebhookMessage
+
+    backlog = WebhookMessage.objects.filter(is_processed=False).aggregate(
+        count=Count("id"), oldest=Min("created_at")
+    )
+    return {
+        "count": backlog["count"],
+        "oldest_age": (timezone.now() - backlog["oldest"]).total_seconds()
+        if backlog["oldest"]
+        else 0,
+    }
+
+
+def render_webhook_metrics():
+    """
+    Webhook metrics in the Prometheus text exposition format.
+    """
+    metrics = get_webhook_metrics()
+    lines = [
+        "# HELP fanmo_webhook_messages_total Processed webhooks by outcome.",
+        "# TYPE fanmo_webhook_messages_total counter",
+    ]
+    for event_name, event_metrics in metrics.items():
+        for outcome, count in event_metrics["outcomes"].items():
+            lines.append(
+                f'fanmo_webhook_messages_total{{event="{event_name}",outcome="{outcome}"}} {count}'
+            )
+
+    for metric, description in WEBHOOK_METRICS.items():
+        name = f"fanmo_webhook_{metric}_seconds"
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} summary")
+        for event_name, event_metrics in metrics.items():
+            for percentile, value in event_metrics[metric].items():
+                quantile = int(percentile[1:]) / 100
+                lines.append(
+                    f'{name}{{event="{event_name}",quantile="{quantile}"}} {value}'
+                )
+
+    backlog = get_webhook_backlog()
+    lines += [
+        "# HELP fanmo_webhook_backlog Webhooks waiting to be processed.",
+        "# TYPE fanmo_webhook_backlog gauge",
+        f"fanmo_webhook_backlog {backlog['count']}",
+        "# HELP fanmo_webhook_backlog_age_seconds Age of the oldest unprocessed webhook.",
+        "# TYPE fanmo_webhook_backlog_age_seconds gauge",
+        f"fanmo_webhook_backlog_age_seconds {backlog['oldest_age']}",
+    ]
+    return "\n".join(lines) + "\n"
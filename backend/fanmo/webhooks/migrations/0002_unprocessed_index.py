@@ -0,0 +1,17 @@
+# Generated by Django 3.2.14 on 2026-10-18 14:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('webhooks', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='webhookmessage',
+            index=models.Index(condition=models.Q(('is_processed', False)), fields=['id'], name='webhook_message_unprocessed'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.2.14 on 2026-10-18 14:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('webhooks', '0002_unprocessed_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='webhookmessage',
+            name='attempts',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='webhookmessage',
+            name='processed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import connection, models
+from django.utils import timezone
 
 from fanmo.utils.models import BaseModel
 
@@ -11,4 +12,34 @@ class WebhookMessage(BaseModel):
     payload = models.JSONField()
 
     is_processed = models.BooleanField(default=False)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
     external_id = models.CharField(max_length=255, unique=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["id"],
+                name="webhook_message_unprocessed",
+                condition=models.Q(is_processed=False),
+            )
+        ]
+
+    @classmethod
+    def ingest(cls, sender, external_id, payload):
+        """
+        Store a raw JSON payload using a single INSERT, unless a message with
+        the same external_id was already received.
+
+        Returns whether the message was stored.
+        """
+        now = timezone.now()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {cls._meta.db_table} "
+                "(created_at, updated_at, sender, payload, is_processed, attempts, external_id) "
+                "VALUES (%s, %s, %s, %s::jsonb, false, 0, %s) "
+                "ON CONFLICT (external_id) DO NOTHING RETURNING id",
+                [now, now, sender, payload, external_id],
+            )
+            return cursor.fetchone() is not None
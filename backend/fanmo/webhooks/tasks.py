@@ -1,25 +1,136 @@
 from datetime import datetime
 from decimal import Decimal
 
+import structlog
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
 from django.db.transaction import atomic
 from django.utils import timezone
 from django_fsm import can_proceed
 from djmoney.money import Money
 from moneyed import get_currency
 
-from fanmo.analytics.tasks import refresh_stats
+from fanmo.analytics.tasks import schedule_refresh_stats
+from fanmo.core.tasks import async_task
 from fanmo.donations.models import Donation
 from fanmo.memberships.models import Subscription
 from fanmo.memberships.tasks import refresh_membership
 from fanmo.payments.models import Payment, Payout
 from fanmo.utils import razorpay_client
+from fanmo.webhooks.metrics import measure_webhook, record_webhook_metrics
 from fanmo.webhooks.models import WebhookMessage
 
+logger = structlog.get_logger(__name__)
+
+WEBHOOK_BATCH_SIZE = 100
+# webhooks received within the window are processed by the same task.
+WEBHOOK_BATCH_WINDOW = 2
+WEBHOOK_BATCH_SCHEDULED_KEY = "webhook_batch_scheduled"
+# failed messages are retried by later runs until they reach this many attempts.
+WEBHOOK_MAX_ATTEMPTS = 5
+
+
+def schedule_webhook_processing():
+    """
+    Schedule a batch to process received webhooks, unless one is already waiting to run.
+    """
+    if cache.add(WEBHOOK_BATCH_SCHEDULED_KEY, True, WEBHOOK_BATCH_WINDOW):
+        async_task(process_webhook_messages, delay=WEBHOOK_BATCH_WINDOW)
+
+
+def process_webhook_messages(batch_size=WEBHOOK_BATCH_SIZE):
+    """
+    Process unprocessed webhook messages in batches, each message in its own transaction.
+
+    A message is locked only while it is handled, so row locks taken by its handler
+    are released before the next message. Messages locked by another worker are
+    skipped. Messages of a batch are grouped by subscription (or order) so that
+    events of the same entity are handled together, in the order they were received.
+    A message which fails or is skipped is left unprocessed for the next run,
+    along with the following messages of its group. Messages are given up on after
+    WEBHOOK_MAX_ATTEMPTS failures.
+    """
+    # webhooks received from now on need another run.
+    cache.delete(WEBHOOK_BATCH_SCHEDULED_KEY)
+    messages = WebhookMessage.objects.filter(
+        is_processed=False, attempts__lt=WEBHOOK_MAX_ATTEMPTS
+    ).order_by("id")
+
+    # groups with a failed or skipped message, their later messages must wait for it.
+    blocked_groups = set()
+    last_id = 0
+    while True:
+        batch = list(messages.filter(id__gt=last_id)[:batch_size])
+        if not batch:
+            break
+
+        groups = {}
+        for webhook_message in batch:
+            groups.setdefault(get_webhook_group(webhook_message), []).append(
+                webhook_message
+            )
+
+        for group_key, group in groups.items():
+            for webhook_message in group:
+                if group_key in blocked_groups:
+                    logger.info(
+                        "webhook_processing_deferred",
+                        webhook_message_id=webhook_message.id,
+                    )
+                    continue
+
+                outcome = "processed"
+                try:
+                    with measure_webhook() as timer, transaction.atomic():
+                        # processed or being processed by another worker otherwise.
+                        locked_message = (
+                            messages.filter(id=webhook_message.id)
+                            .select_for_update(skip_locked=True)
+                            .first()
+                        )
+                        if locked_message is None:
+                            blocked_groups.add(group_key)
+                            continue
+                        webhook_message = locked_message
+                        handle_razorpay_webhook(webhook_message)
+                except Exception:
+                    logger.exception(
+                        "webhook_processing_failed",
+                        webhook_message_id=webhook_message.id,
+                    )
+                    outcome = "failed"
+                    blocked_groups.add(group_key)
+                    # the attempt is recorded after the handler rolled back.
+                    webhook_message.attempts += 1
+                    WebhookMessage.objects.filter(id=webhook_message.id).update(
+                        attempts=F("attempts") + 1
+                    )
+                    if webhook_message.attempts >= WEBHOOK_MAX_ATTEMPTS:
+                        logger.error(
+                            "webhook_processing_abandoned",
+                            webhook_message_id=webhook_message.id,
+                            attempts=webhook_message.attempts,
+                        )
+                record_webhook_metrics(webhook_message, outcome, timer)
+        last_id = batch[-1].id
+
+
+def get_webhook_group(webhook_message):
+    payload = webhook_message.payload.get("payload", {})
+    for entity in ["subscription", "order"]:
+        if entity in payload:
+            return (entity, payload[entity]["entity"]["id"])
+    return ("message", webhook_message.id)
+
 
 @atomic
 def process_razorpay_webhook(webhook_message_id):
     webhook_message = WebhookMessage.objects.get(pk=webhook_message_id)
+    handle_razorpay_webhook(webhook_message)
 
+
+def handle_razorpay_webhook(webhook_message):
     handlers = {
         "subscription.charged": subscription_charged,
         "subscription.cancelled": subscription_cancelled,
@@ -34,6 +145,8 @@ def process_razorpay_webhook(webhook_message_id):
         handlers[event_name](webhook_message.payload)
 
     webhook_message.is_processed = True
+    webhook_message.processed_at = timezone.now()
+    webhook_message.attempts += 1
     webhook_message.save()
 
 
@@ -82,7 +195,7 @@ def subscription_charged(payload):
 
     # send payout
     Payout.for_payment(payment)
-    refresh_stats(payment.creator_user_id)
+    schedule_refresh_stats(payment.creator_user_id)
 
 
 def subscription_cancelled(payload):
@@ -97,7 +210,7 @@ def subscription_cancelled(payload):
     subscription.status = Subscription.Status.SCHEDULED_TO_CANCEL
     subscription.save()
     refresh_membership(subscription.membership_id)
-    refresh_stats(subscription.creator_user_id)
+    schedule_refresh_stats(subscription.creator_user_id)
 
 
 def subscription_halted(payload):
@@ -111,7 +224,7 @@ def subscription_halted(payload):
         plan__external_id=subscription_payload["plan_id"],
     )
     refresh_membership(subscription.membership_id)
-    refresh_stats(subscription.creator_user_id)
+    schedule_refresh_stats(subscription.creator_user_id)
 
 
 def subscription_pending(payload):
@@ -125,7 +238,7 @@ def subscription_pending(payload):
         plan__external_id=subscription_payload["plan_id"],
     )
     refresh_membership(subscription.membership_id)
-    refresh_stats(subscription.creator_user_id)
+    schedule_refresh_stats(subscription.creator_user_id)
 
 
 def order_paid(payload):
@@ -156,15 +269,21 @@ def order_paid(payload):
 
     # send payout
     Payout.for_payment(payment)
-    refresh_stats(payment.creator_user_id)
+    schedule_refresh_stats(payment.creator_user_id)
 
 
 def transfer_processed(payload):
-    transfer_id = payload["payload"]["transfer"]["entity"]["id"]
-    payout = Payout.objects.get(external_id=transfer_id)
+    transfer_payload = payload["payload"]["transfer"]["entity"]
+    payout = Payout.objects.filter(external_id=transfer_payload["id"]).first()
+    if payout is None:
+        # the transfer request timed out after razorpay created the transfer.
+        payout = Payout.objects.get(
+            payment__external_id=transfer_payload["source"], external_id=""
+        )
+        payout.external_id = transfer_payload["id"]
     payout.status = Payout.Status.PROCESSED
     payout.save()
-    refresh_stats(payout.payment.creator_user_id)
+    schedule_refresh_stats(payout.payment.creator_user_id)
 
 
 def settlement_processed(payload):
@@ -173,7 +292,7 @@ def settlement_processed(payload):
     transfer_ids = [transfer["id"] for transfer in transfers["items"]]
     payouts = Payout.objects.filter(external_id__in=transfer_ids)
     payouts.update(status=Payout.Status.SETTLED)
-    refresh_stats(payouts.first().payment.creator_user_id)
+    schedule_refresh_stats(payouts.first().payment.creator_user_id)
 
 
 def get_money_from_subunit(amount, currency_code):
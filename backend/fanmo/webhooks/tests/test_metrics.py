@@ -0,0 +1,65 @@
+import pytest
+from django_redis import get_redis_connection
+
+from fanmo.webhooks.metrics import (
+    WebhookTimer,
+    get_webhook_metrics,
+    record_webhook_metrics,
+    render_webhook_metrics,
+)
+from fanmo.webhooks.models import WebhookMessage
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def clear_webhook_metrics():
+    redis = get_redis_connection("default")
+    for key in redis.keys("webhook_metrics:*"):
+        redis.delete(key)
+
+
+def create_message(external_id, event):
+    return WebhookMessage.objects.create(
+        sender=WebhookMessage.Sender.RAZORPAY,
+        external_id=external_id,
+        payload={"event": event, "payload": {}},
+    )
+
+
+def test_webhook_metrics():
+    message = create_message("rzp_001", "order.paid")
+    for duration in range(1, 101):
+        timer = WebhookTimer()
+        timer.duration = duration / 1000
+        timer.db_time = duration / 2000
+        record_webhook_metrics(message, "processed", timer)
+    record_webhook_metrics(
+        create_message("rzp_002", "transfer.processed"), "failed", WebhookTimer()
+    )
+
+    metrics = get_webhook_metrics()
+
+    assert set(metrics) == {"order.paid", "transfer.processed"}
+    assert metrics["order.paid"]["outcomes"] == {"processed": 100}
+    assert metrics["order.paid"]["duration"]["p50"] == pytest.approx(0.051)
+    assert metrics["order.paid"]["duration"]["p99"] == pytest.approx(0.1)
+    assert metrics["order.paid"]["db_time"]["p50"] == pytest.approx(0.0255)
+    assert metrics["order.paid"]["api_time"]["p50"] == 0
+    assert metrics["transfer.processed"]["outcomes"] == {"failed": 1}
+
+
+def test_render_webhook_metrics():
+    message = create_message("rzp_001", "order.paid")
+    record_webhook_metrics(message, "processed", WebhookTimer())
+    create_message("rzp_002", "order.paid")
+
+    text = render_webhook_metrics()
+
+    assert (
+        'fanmo_webhook_messages_total{event="order.paid",outcome="processed"} 1' in text
+    )
+    assert 'fanmo_webhook_duration_seconds{event="order.paid",quantile="0.95"} 0.0' in (
+        text
+    )
+    assert "fanmo_webhook_backlog 2" in text
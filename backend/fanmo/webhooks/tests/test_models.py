@@ -0,0 +1,21 @@
+import json
+
+import pytest
+
+from fanmo.webhooks.models import WebhookMessage
+
+pytestmark = pytest.mark.django_db
+
+
+def test_ingest():
+    payload = json.dumps({"event": "order.paid", "payload": {}})
+
+    assert WebhookMessage.ingest(WebhookMessage.Sender.RAZORPAY, "evt_123", payload)
+    assert not WebhookMessage.ingest(WebhookMessage.Sender.RAZORPAY, "evt_123", payload)
+
+    webhook_message = WebhookMessage.objects.get()
+    assert webhook_message.external_id == "evt_123"
+    assert webhook_message.sender == WebhookMessage.Sender.RAZORPAY
+    assert webhook_message.payload == {"event": "order.paid", "payload": {}}
+    assert not webhook_message.is_processed
+    assert webhook_message.created_at
@@ -8,7 +8,13 @@ from moneyed import INR
 from fanmo.donations.models import Donation
 from fanmo.payments.models import Payment, Payout
 from fanmo.webhooks.models import WebhookMessage
-from fanmo.webhooks.tasks import process_razorpay_webhook
+from fanmo.webhooks.tasks import (
+    WEBHOOK_MAX_ATTEMPTS,
+    get_webhook_group,
+    handle_razorpay_webhook,
+    process_razorpay_webhook,
+    process_webhook_messages,
+)
 
 pytestmark = pytest.mark.django_db
 
@@ -322,6 +328,39 @@ class TestProcessRazorpayWebhook:
         payout = Payout.objects.get(payment=payment)
         assert payout.status == Payout.Status.PROCESSED
 
+    def test_transfer_processed_of_timed_out_transfer(self, creator_user, user):
+        payment = Payment.objects.create(
+            type=Payment.Type.DONATION,
+            creator_user=creator_user,
+            fan_user=user,
+            amount=Money(Decimal("100"), INR),
+            external_id="pay_123",
+            method=Payment.Method.UPI,
+        )
+        # the transfer request timed out, its id was never recorded.
+        payout = Payout.objects.create(
+            payment=payment,
+            status=Payout.Status.SCHEDULED,
+            amount=Money(Decimal("95.10"), INR),
+            bank_account=creator_user.bank_accounts.get(),
+        )
+        webhook_message = WebhookMessage.objects.create(
+            sender=WebhookMessage.Sender.RAZORPAY,
+            external_id="rzp_001",
+            payload={
+                "event": "transfer.processed",
+                "payload": {
+                    "transfer": {"entity": {"id": "trf_123", "source": "pay_123"}}
+                },
+            },
+        )
+
+        process_razorpay_webhook(webhook_message.id)
+
+        payout.refresh_from_db()
+        assert payout.status == Payout.Status.PROCESSED
+        assert payout.external_id == "trf_123"
+
     def test_settlement_processed(self, creator_user, user, mocker):
         transfer_mock = mocker.patch(
             "fanmo.payments.models.razorpay_client.transfer.all",
@@ -372,3 +411,203 @@ class TestProcessRazorpayWebhook:
         assert payout.status == Payout.Status.SETTLED
 
         transfer_mock.assert_called_once_with({"recipient_settlement_id": "setl_123"})
+
+
+class TestProcessWebhookMessages:
+    @pytest.fixture
+    def payouts(self, creator_user, user):
+        payouts = []
+        for i in range(3):
+            donation = Donation.objects.create(
+                creator_user=creator_user,
+                fan_user=user,
+                amount=Money(Decimal("100"), INR),
+                external_id=f"don_{i}",
+                status=Donation.Status.SUCCESSFUL,
+            )
+            payment = Payment.objects.create(
+                type=Payment.Type.DONATION,
+                donation=donation,
+                creator_user=creator_user,
+                fan_user=user,
+                amount=Money(Decimal("100"), INR),
+                method=Payment.Status.CAPTURED,
+            )
+            payouts.append(
+                Payout.objects.create(
+                    payment=payment,
+                    status=Payout.Status.SCHEDULED,
+                    amount=Money(Decimal("95.10"), INR),
+                    bank_account=creator_user.bank_accounts.get(),
+                    external_id=f"trf_{i}",
+                )
+            )
+        return payouts
+
+    def create_message(self, external_id, transfer_id):
+        return WebhookMessage.objects.create(
+            sender=WebhookMessage.Sender.RAZORPAY,
+            external_id=external_id,
+            payload={
+                "event": "transfer.processed",
+                "payload": {"transfer": {"entity": {"id": transfer_id}}},
+            },
+        )
+
+    def test_messages_are_processed_in_batches(self, payouts):
+        for i, payout in enumerate(payouts):
+            self.create_message(f"rzp_{i}", payout.external_id)
+
+        process_webhook_messages(batch_size=2)
+
+        assert not WebhookMessage.objects.filter(is_processed=False).exists()
+        assert not WebhookMessage.objects.filter(processed_at__isnull=True).exists()
+        assert set(WebhookMessage.objects.values_list("attempts", flat=True)) == {1}
+        for payout in payouts:
+            payout.refresh_from_db()
+            assert payout.status == Payout.Status.PROCESSED
+
+    def test_metrics_failure_does_not_fail_processing(self, payouts, mocker):
+        mocker.patch(
+            "fanmo.webhooks.metrics.get_redis_connection",
+            side_effect=ConnectionError("Redis is down."),
+        )
+        for i, payout in enumerate(payouts):
+            self.create_message(f"rzp_{i}", payout.external_id)
+
+        process_webhook_messages()
+
+        assert not WebhookMessage.objects.filter(is_processed=False).exists()
+
+    def test_failed_message_does_not_block_others(self, payouts):
+        failing_message = self.create_message("rzp_0", "trf_missing")
+        message = self.create_message("rzp_1", payouts[0].external_id)
+
+        process_webhook_messages()
+
+        process_webhook_messages()
+
+        failing_message.refresh_from_db()
+        assert not failing_message.is_processed
+        assert failing_message.processed_at is None
+        assert failing_message.attempts == 2
+        message.refresh_from_db()
+        assert message.is_processed
+
+    def test_failed_message_blocks_its_group(self, mocker):
+        def create_order_message(external_id, order_id):
+            return WebhookMessage.objects.create(
+                sender=WebhookMessage.Sender.RAZORPAY,
+                external_id=external_id,
+                payload={
+                    "event": "order.paid",
+                    "payload": {"order": {"entity": {"id": order_id}}},
+                },
+            )
+
+        failing_message = create_order_message("rzp_0", "order_1")
+        later_message = create_order_message("rzp_1", "order_1")
+        other_message = create_order_message("rzp_2", "order_2")
+
+        def handle(webhook_message):
+            if webhook_message.id == failing_message.id:
+                raise ValueError("Handler failed.")
+            handle_razorpay_webhook(webhook_message)
+
+        mocker.patch("fanmo.webhooks.tasks.handle_razorpay_webhook", side_effect=handle)
+
+        # later messages of the group wait, even when they are in another batch.
+        process_webhook_messages(batch_size=1)
+
+        failing_message.refresh_from_db()
+        assert not failing_message.is_processed
+        assert failing_message.attempts == 1
+        later_message.refresh_from_db()
+        assert not later_message.is_processed
+        assert later_message.attempts == 0
+        other_message.refresh_from_db()
+        assert other_message.is_processed
+
+    def test_messages_taken_by_another_worker_are_skipped(self, mocker):
+        messages = [
+            WebhookMessage.objects.create(
+                sender=WebhookMessage.Sender.RAZORPAY,
+                external_id=f"rzp_{i}",
+                payload={
+                    "event": "order.paid",
+                    "payload": {"order": {"entity": {"id": order_id}}},
+                },
+            )
+            for i, order_id in enumerate(["order_1", "order_2", "order_2"])
+        ]
+
+        def handle(webhook_message):
+            # another worker handles a message of the batch in the meantime.
+            if webhook_message.id == messages[0].id:
+                WebhookMessage.objects.filter(id=messages[1].id).update(
+                    is_processed=True
+                )
+            webhook_message.is_processed = True
+            webhook_message.save()
+
+        handle_mock = mocker.patch(
+            "fanmo.webhooks.tasks.handle_razorpay_webhook", side_effect=handle
+        )
+
+        process_webhook_messages()
+
+        assert [call.args[0].id for call in handle_mock.call_args_list] == [
+            messages[0].id
+        ]
+        # the rest of the group waits for the next run.
+        messages[2].refresh_from_db()
+        assert not messages[2].is_processed
+        assert messages[2].attempts == 0
+
+    def test_failed_message_retries_are_capped(self, payouts):
+        failing_message = self.create_message("rzp_0", "trf_missing")
+        failing_message.attempts = WEBHOOK_MAX_ATTEMPTS - 1
+        failing_message.save()
+
+        process_webhook_messages()
+        failing_message.refresh_from_db()
+        assert failing_message.attempts == WEBHOOK_MAX_ATTEMPTS
+
+        # not attempted anymore
+        process_webhook_messages()
+        failing_message.refresh_from_db()
+        assert failing_message.attempts == WEBHOOK_MAX_ATTEMPTS
+        assert not failing_message.is_processed
+
+    def test_webhook_group(self):
+        subscription_message = WebhookMessage(
+            id=1,
+            payload={
+                "event": "subscription.charged",
+                "payload": {
+                    "subscription": {"entity": {"id": "sub_123"}},
+                    "payment": {"entity": {"id": "pay_123"}},
+                },
+            },
+        )
+        order_message = WebhookMessage(
+            id=2,
+            payload={
+                "event": "order.paid",
+                "payload": {
+                    "order": {"entity": {"id": "order_123"}},
+                    "payment": {"entity": {"id": "pay_123"}},
+                },
+            },
+        )
+        transfer_message = WebhookMessage(
+            id=3,
+            payload={
+                "event": "transfer.processed",
+                "payload": {"transfer": {"entity": {"id": "trf_123"}}},
+            },
+        )
+
+        assert get_webhook_group(subscription_message) == ("subscription", "sub_123")
+        assert get_webhook_group(order_message) == ("order", "order_123")
+        assert get_webhook_group(transfer_message) == ("message", 3)
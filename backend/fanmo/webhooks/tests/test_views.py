@@ -0,0 +1,81 @@
+import json
+
+import pytest
+from django.core.cache import cache
+
+from fanmo.payments.simulator import sign_webhook
+from fanmo.webhooks.models import WebhookMessage
+from fanmo.webhooks.tasks import (
+    WEBHOOK_BATCH_SCHEDULED_KEY,
+    WEBHOOK_BATCH_WINDOW,
+    process_webhook_messages,
+)
+from fanmo.webhooks.views import razorpay_webhook
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def clear_webhook_batch():
+    cache.delete(WEBHOOK_BATCH_SCHEDULED_KEY)
+
+
+@pytest.fixture
+def async_task_mock(mocker):
+    return mocker.patch("fanmo.webhooks.tasks.async_task")
+
+
+def post_webhook(rf, event_id, payload, signature=None):
+    body = json.dumps(payload)
+    headers = {"HTTP_X_RAZORPAY_EVENT_ID": event_id}
+    if signature is not False:
+        headers["HTTP_X_RAZORPAY_SIGNATURE"] = signature or sign_webhook(body)
+    request = rf.post(
+        "/api/webhooks/razorpay/", body, content_type="application/json", **headers
+    )
+    return razorpay_webhook(request)
+
+
+class TestRazorpayWebhook:
+    def test_webhook_is_stored_and_scheduled(self, rf, async_task_mock):
+        payload = {"event": "order.paid", "payload": {}}
+
+        response = post_webhook(rf, "evt_1", payload)
+
+        assert response.status_code == 200
+        assert response.content == b"Ok."
+        webhook_message = WebhookMessage.objects.get()
+        assert webhook_message.sender == WebhookMessage.Sender.RAZORPAY
+        assert webhook_message.external_id == "evt_1"
+        assert webhook_message.payload == payload
+        assert not webhook_message.is_processed
+        async_task_mock.assert_called_once_with(
+            process_webhook_messages, delay=WEBHOOK_BATCH_WINDOW
+        )
+
+    def test_webhooks_are_processed_in_one_batch(self, rf, async_task_mock):
+        for i in range(3):
+            response = post_webhook(rf, f"evt_{i}", {"event": "order.paid"})
+            assert response.status_code == 200
+
+        assert WebhookMessage.objects.count() == 3
+        assert async_task_mock.call_count == 1
+
+    def test_duplicate_webhook(self, rf, async_task_mock):
+        post_webhook(rf, "evt_1", {"event": "order.paid"})
+        cache.delete(WEBHOOK_BATCH_SCHEDULED_KEY)
+
+        response = post_webhook(rf, "evt_1", {"event": "order.paid"})
+
+        assert response.status_code == 200
+        assert response.content == b"Already Received."
+        assert WebhookMessage.objects.count() == 1
+        assert async_task_mock.call_count == 1
+
+    @pytest.mark.parametrize("signature", ["invalid", False])
+    def test_invalid_signature(self, rf, async_task_mock, signature):
+        response = post_webhook(rf, "evt_1", {"event": "order.paid"}, signature)
+
+        assert response.status_code == 403
+        assert not WebhookMessage.objects.exists()
+        assert not async_task_mock.called
@@ -1,16 +1,15 @@
-import json
-
 from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
 from django.db.transaction import non_atomic_requests
 from django.http import HttpResponse, HttpResponseForbidden
 from django.views.decorators.csrf import csrf_exempt
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import require_GET, require_POST
 from razorpay.errors import SignatureVerificationError
 
-from fanmo.core.tasks import async_task
 from fanmo.utils import razorpay_client
+from fanmo.webhooks.metrics import render_webhook_metrics
 from fanmo.webhooks.models import WebhookMessage
-from fanmo.webhooks.tasks import process_razorpay_webhook
+from fanmo.webhooks.tasks import schedule_webhook_processing
 
 
 @csrf_exempt
@@ -27,15 +26,21 @@ def razorpay_webhook(request):
     except (SignatureVerificationError, KeyError):
         return HttpResponseForbidden("Invalid payload.", content_type="text/plain")
 
-    event_id = request.headers["x-razorpay-event-id"]
-    if WebhookMessage.objects.filter(external_id=event_id).exists():
-        return HttpResponse("Already Received.", content_type="text/plain")
-
-    payload = json.loads(request_body)
-    webhook_message = WebhookMessage.objects.create(
+    received = WebhookMessage.ingest(
         sender=WebhookMessage.Sender.RAZORPAY,
-        external_id=event_id,
-        payload=payload,
+        external_id=request.headers["x-razorpay-event-id"],
+        payload=request_body,
     )
-    async_task(process_razorpay_webhook, webhook_message.pk)
+    if not received:
+        return HttpResponse("Already Received.", content_type="text/plain")
+
+    schedule_webhook_processing()
     return HttpResponse("Ok.", content_type="text/plain")
+
+
+@staff_member_required
+@require_GET
+def webhook_metrics(request):
+    return HttpResponse(
+        render_webhook_metrics(), content_type="text/plain; version=0.0.4"
+    )